@@ -1,21 +1,58 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash
+from flask import (
+    Flask, Response, render_template, request, redirect, url_for, session, jsonify, flash,
+    stream_with_context
+)
 from flask_cors import CORS
 from datetime import timedelta
+import json
+import logging
 import os
+from config.config import Config
+from config.logging_config import configurar_logging
 from src.auth.compensar_auth import CompensarAuth
 from src.auth.compensar_auth_selenium import CompensarAuthSelenium
 from src.api.compensar_api import CompensarAPI
-from src.scheduler.booking_scheduler import BookingScheduler
+from src.api.shared_availability import disponibilidad_compartida
+from src.api.slot_search import ConsultaHorarios
+from src.sessions.store import crear_session_store, crear_sesion_usuario, ConflictoSesion
+from src.scheduler.booking_executor import BookingExecutor
+from src.scheduler.job_queue import ColaTrabajos, ColaLlena
+from src.scheduler.availability_watcher import VigilanteDisponibilidad, LimiteVigilancias, validar_rango
+from src.scheduler.booking_conflicts import ConflictoReserva
 from src.models.booking import Reserva, Tiquetera, Horario
 
+configurar_logging()
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 CORS(app, supports_credentials=True, origins=["http://localhost:5173"])
-app.secret_key = os.urandom(24)
+# Con varios workers todos deben firmar la cookie de Flask con la misma clave
+app.secret_key = Config.SECRET_KEY or os.urandom(24)
 app.config['SESSION_TYPE'] = 'filesystem'
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=2)
 
-# Diccionario para almacenar sesiones de usuario (en producción usar Redis o similar)
-user_sessions = {}
+# Sesiones de usuario: en memoria (LRU + inactividad) o compartidas en SQLite entre workers
+# (sesión, carrito y slots de horarios)
+user_sessions = crear_session_store()
+# Lotes de reservas que se ejecutan en segundo plano (/api/jobs)
+cola_trabajos = ColaTrabajos()
+# Vigilancia de horarios llenos con consultas adaptativas (/api/vigilancias)
+vigilante = VigilanteDisponibilidad()
+# Trabajos y vigilancias viven en este proceso: con varios workers cada usuario
+# debe llegar siempre al mismo (sticky routing); sus ids llevan Config.WORKER_ID
+
+def no_encontrado(recurso_id, mensaje):
+    """404, o 421 si el id lo creó otro worker (el balanceador no respetó el sticky routing)"""
+    if not recurso_id.startswith(f"{Config.WORKER_ID}-"):
+        return jsonify({
+            'error': f'{mensaje}: fue creado por otro worker (se requiere sticky routing por usuario)'
+        }), 421
+    return jsonify({'error': mensaje}), 404
+
+@app.errorhandler(ConflictoSesion)
+def conflicto_sesion(e):
+    """Otro worker guardó la sesión mientras se atendía esta petición: el cliente debe reintentar"""
+    return jsonify({'error': str(e), 'reintentar': True}), 409
 
 @app.route('/')
 def index():
@@ -46,14 +83,9 @@ def selenium_login():
                 session['document_number'] = 'Usuario'
                 session.permanent = True
                 # Crear API con la sesión autenticada de Selenium
-                api = CompensarAPI(auth.get_session())
+                api = CompensarAPI(auth.get_session(), disponibilidad=disponibilidad_compartida())
                 # Guardar objetos de API en memoria
-                user_sessions[user_id] = {
-                    'auth': auth,
-                    'api': api,
-                    'scheduler': BookingScheduler(api),
-                    'reservas_pendientes': []
-                }
+                user_sessions.set(user_id, crear_sesion_usuario(auth, api))
                 flash('¡Login exitoso!', 'success')
                 return redirect(url_for('dashboard'))
             except Exception as e:
@@ -75,7 +107,7 @@ def verify_session():
         for cookie_name, cookie_value in request.cookies.items():
             auth.session.cookies.set(cookie_name, cookie_value)
         # Intentar obtener tiqueteras para verificar autenticación
-        api = CompensarAPI(auth.session)
+        api = CompensarAPI(auth.session, disponibilidad=disponibilidad_compartida())
         tiqueteras = api.get_tiqueteras()
         if tiqueteras and len(tiqueteras) > 0:
             # Login exitoso
@@ -84,12 +116,7 @@ def verify_session():
                 session['user_id'] = user_id
                 session['document_number'] = 'Usuario'
                 session.permanent = True
-                user_sessions[user_id] = {
-                    'auth': auth,
-                    'api': api,
-                    'scheduler': BookingScheduler(api),
-                    'reservas_pendientes': []
-                }
+                user_sessions.set(user_id, crear_sesion_usuario(auth, api, tiqueteras=tiqueteras))
                 flash('¡Sesión verificada exitosamente!', 'success')
                 return redirect(url_for('dashboard'))
             except Exception as e:
@@ -106,8 +133,8 @@ def verify_session():
 def logout():
     """Cerrar sesión"""
     user_id = session.get('user_id')
-    if user_id and user_id in user_sessions:
-        del user_sessions[user_id]
+    if user_id:
+        user_sessions.delete(user_id)
     session.clear()
     flash('Sesión cerrada correctamente', 'info')
     return redirect(url_for('login_page'))
@@ -118,16 +145,16 @@ def dashboard():
     if 'user_id' not in session:
         return redirect(url_for('login_page'))
     user_id = session['user_id']
-    if user_id not in user_sessions:
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
         flash('Sesión expirada. Por favor inicia sesión nuevamente.', 'warning')
         return redirect(url_for('login_page'))
-    api = user_sessions[user_id]['api']
-    tiqueteras = api.get_tiqueteras()
+    tiqueteras = sesion_usuario['tiqueteras'].get_all()
     # Agrupar por deporte
     deportes = {}
     for t in tiqueteras:
         deportes.setdefault(t.nombre_deporte, []).append(t)
-    reservas_pendientes = user_sessions[user_id]['reservas_pendientes']
+    reservas_pendientes = sesion_usuario['reservas_pendientes'].items()
     return render_template('dashboard.html',
                            deportes=deportes,
                            reservas_pendientes=reservas_pendientes,
@@ -139,11 +166,11 @@ def api_tiqueteras():
     if 'user_id' not in session:
         return jsonify({'error': 'No autenticado'}), 401
     user_id = session['user_id']
-    if user_id not in user_sessions:
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
         return jsonify({'error': 'Sesión expirada'}), 401
     try:
-        api = user_sessions[user_id]['api']
-        tiqueteras = api.get_tiqueteras()
+        tiqueteras = sesion_usuario['tiqueteras'].get_all()
         tiqueteras_json = []
         for t in tiqueteras:
             tiqueteras_json.append({
@@ -159,7 +186,7 @@ def api_tiqueteras():
             })
         return jsonify({'tiqueteras': tiqueteras_json})
     except Exception as e:
-        print(f'Error en api_tiqueteras: {e}')
+        logger.error('Error en api_tiqueteras: %s', e, exc_info=Config.DEBUG)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/horarios', methods=['POST'])
@@ -168,7 +195,8 @@ def api_horarios():
     if 'user_id' not in session:
         return jsonify({'error': 'No autenticado'}), 401
     user_id = session['user_id']
-    if user_id not in user_sessions:
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
         return jsonify({'error': 'Sesión expirada'}), 401
     try:
         data = request.json
@@ -176,24 +204,83 @@ def api_horarios():
         fecha = data.get('fecha')
         if not tiquetera_id or not fecha:
             return jsonify({'error': 'Faltan datos requeridos'}), 400
-        api = user_sessions[user_id]['api']
-        tiqueteras = api.get_tiqueteras()
-        tiquetera_obj = next((t for t in tiqueteras if str(t.id_tiquetera) == str(tiquetera_id)), None)
+        api = sesion_usuario['api']
+        tiquetera_obj = sesion_usuario['tiqueteras'].buscar(tiquetera_id)
         if not tiquetera_obj:
             return jsonify({'error': 'Tiquetera no encontrada'}), 404
         horarios = api.get_horarios(tiquetera_obj, fecha)
-        horarios_dict = [{
-            'fecha': h.fecha,
-            'hora_inicio': h.hora_inicio,
-            'hora_fin': h.hora_fin,
-            'cupos_disponibles': h.cupos_disponibles,
-            'id_turno': h.id_turno,
-            'nombre_clase': h.nombre_clase,
-            'raw_data': h.raw_data
-        } for h in horarios]
-        return jsonify({'horarios': horarios_dict})
+        registro = sesion_usuario['horarios']
+        resumenes = [registro.resumir(tiquetera_obj, h) for h in horarios]
+        # Solo los slots nuevos, para confirmar desde cualquier worker; la sesión no cambia
+        user_sessions.guardar_horarios(user_id, registro)
+        return jsonify({'horarios': resumenes})
+    except Exception as e:
+        logger.error('Error en api_horarios: %s', e, exc_info=Config.DEBUG)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/horarios_rango', methods=['POST'])
+def api_horarios_rango():
+    """API para obtener horarios de varias fechas en una sola llamada"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autenticado'}), 401
+    user_id = session['user_id']
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
+        return jsonify({'error': 'Sesión expirada'}), 401
+    try:
+        data = request.json
+        tiquetera_id = data.get('tiquetera_id')
+        fechas = data.get('fechas')
+        if not tiquetera_id or not isinstance(fechas, list) or not fechas:
+            return jsonify({'error': 'Faltan datos requeridos'}), 400
+        if len(fechas) > 31:
+            return jsonify({'error': 'Máximo 31 fechas por consulta'}), 400
+        api = sesion_usuario['api']
+        tiquetera_obj = sesion_usuario['tiqueteras'].buscar(tiquetera_id)
+        if not tiquetera_obj:
+            return jsonify({'error': 'Tiquetera no encontrada'}), 404
+        horarios_por_fecha = api.get_horarios_range(tiquetera_obj, fechas)
+        registro = sesion_usuario['horarios']
+        resumenes = {
+            fecha: [registro.resumir(tiquetera_obj, h) for h in horarios]
+            for fecha, horarios in horarios_por_fecha.items()
+        }
+        user_sessions.guardar_horarios(user_id, registro)
+        return jsonify({'horarios': resumenes})
+    except Exception as e:
+        logger.error('Error en api_horarios_rango: %s', e, exc_info=Config.DEBUG)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/buscar_horarios', methods=['POST'])
+def api_buscar_horarios():
+    """Busca franjas en todas las tiqueteras del usuario (deporte, sede, cupos, horas y días)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autenticado'}), 401
+    user_id = session['user_id']
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
+        return jsonify({'error': 'Sesión expirada'}), 401
+    try:
+        consulta = ConsultaHorarios.desde_dict(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        resultados = sesion_usuario['buscador'].buscar(sesion_usuario['tiqueteras'].get_all(), consulta)
+        registro = sesion_usuario['horarios']
+        resumenes = [
+            {
+                **registro.resumir(r.tiquetera, r.horario),
+                'tiquetera_id': r.tiquetera.id_tiquetera,
+                'nombre_centro_entrenamiento': r.tiquetera.nombre_centro_entrenamiento,
+                'nombre_sede': r.tiquetera.nombre_sede,
+                'nombre_deporte': r.tiquetera.nombre_deporte
+            }
+            for r in resultados
+        ]
+        user_sessions.guardar_horarios(user_id, registro)
+        return jsonify({'horarios': resumenes})
     except Exception as e:
-        print(f'Error en api_horarios: {e}')
+        logger.error('Error en api_buscar_horarios: %s', e, exc_info=Config.DEBUG)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/agregar_reserva', methods=['POST'])
@@ -202,35 +289,54 @@ def agregar_reserva():
     if 'user_id' not in session:
         return jsonify({'error': 'No autenticado'}), 401
     user_id = session['user_id']
-    if user_id not in user_sessions:
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
         return jsonify({'error': 'Sesión expirada'}), 401
     data = request.json
-    tiquetera_id = data.get('tiquetera_id')
-    horario_data = data.get('horario')
-    api = user_sessions[user_id]['api']
-    tiqueteras = api.get_tiqueteras()
-    tiquetera = next((t for t in tiqueteras if t.id == int(tiquetera_id)), None)
-    if not tiquetera:
-        return jsonify({'error': 'Tiquetera no encontrada'}), 404
-    horario = Horario(
-        fecha=horario_data['fecha'],
-        hora_inicio=horario_data['hora_inicio'],
-        hora_fin=horario_data['hora_fin'],
-        cupos_disponibles=horario_data['cupos_disponibles'],
-        id_turno=horario_data.get('id_turno')
-    )
-    reserva = Reserva(tiquetera=tiquetera, horario=horario)
-    user_sessions[user_id]['reservas_pendientes'].append({
+    horario_data = data.get('horario') or {}
+    slot = data.get('slot') or horario_data.get('slot')
+    if slot:
+        reserva = sesion_usuario['horarios'].obtener(slot)
+        if not reserva:
+            return jsonify({'error': 'Horario vencido, vuelve a cargar los horarios'}), 409
+    else:
+        tiquetera = sesion_usuario['tiqueteras'].buscar(data.get('tiquetera_id'), campo='id')
+        if not tiquetera:
+            return jsonify({'error': 'Tiquetera no encontrada'}), 404
+        try:
+            validar_rango(horario_data.get('fecha'), horario_data.get('hora_inicio'), horario_data.get('hora_fin'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        horario = Horario(
+            fecha=horario_data['fecha'],
+            hora_inicio=horario_data['hora_inicio'],
+            hora_fin=horario_data['hora_fin'],
+            cupos_disponibles=horario_data.get('cupos_disponibles'),
+            id_turno=horario_data.get('id_turno')
+        )
+        reserva = Reserva(tiquetera=tiquetera, horario=horario)
+    tiquetera, horario = reserva.tiquetera, reserva.horario
+    item = {
         'tiquetera_nombre': tiquetera.nombre_centro_entrenamiento,
         'sede': tiquetera.nombre_sede,
         'fecha': horario.fecha,
         'hora_inicio': horario.hora_inicio,
         'hora_fin': horario.hora_fin,
         'reserva_obj': reserva
-    })
+    }
+    try:
+        total_pendientes = sesion_usuario['reservas_pendientes'].agregar(
+            item, permitir_conflictos=data.get('permitir_conflictos')
+        )
+    except ConflictoReserva as e:
+        return jsonify({'error': str(e), 'conflictos': [c.to_dict() for c in e.conflictos]}), 409
+    except ValueError as e:  # Fecha u hora que no se pueden ubicar en el calendario
+        return jsonify({'error': f'Horario inválido: {e}'}), 400
+    user_sessions.set(user_id, sesion_usuario)
     return jsonify({
         'success': True,
-        'total_pendientes': len(user_sessions[user_id]['reservas_pendientes'])
+        'total_pendientes': total_pendientes,
+        'conflictos': item.get('conflictos', [])
     })
 
 @app.route('/api/eliminar_reserva/<int:index>', methods=['DELETE'])
@@ -239,26 +345,36 @@ def eliminar_reserva(index):
     if 'user_id' not in session:
         return jsonify({'error': 'No autenticado'}), 401
     user_id = session['user_id']
-    if user_id not in user_sessions:
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
         return jsonify({'error': 'Sesión expirada'}), 401
-    reservas = user_sessions[user_id]['reservas_pendientes']
-    if 0 <= index < len(reservas):
-        reservas.pop(index)
+    reservas = sesion_usuario['reservas_pendientes']
+    if reservas.eliminar(index):
+        user_sessions.set(user_id, sesion_usuario)
         return jsonify({'success': True, 'total_pendientes': len(reservas)})
     return jsonify({'error': 'Índice inválido'}), 400
 
-@app.route('/api/confirmar_reservas', methods=['POST'])
-def confirmar_reservas():
-    """API para confirmar y ejecutar todas las reservas pendientes, una por una"""
-    if 'user_id' not in session:
-        return jsonify({'error': 'No autenticado'}), 401
-    user_id = session['user_id']
-    if user_id not in user_sessions:
-        return jsonify({'error': 'Sesión expirada'}), 401
-    api = user_sessions[user_id]['api']
-    data = request.json
+def reservas_de_solicitud(sesion_usuario, data):
+    """
+    Obtiene las reservas a ejecutar a partir del cuerpo de la petición
+
+    Acepta {"slots": [...]}, el formato anterior {"cart": [...]} o, sin
+    cuerpo, las reservas pendientes de la sesión (que se vacían).
+
+    Returns:
+        (reservas, None) o (None, respuesta de error de Flask)
+    """
     reservas_to_process = []
-    if data and isinstance(data.get('cart'), list):
+    if data and isinstance(data.get('slots'), list):
+        # Solo identificadores: los horarios completos ya están en el servidor
+        reservas_to_process, desconocidos = sesion_usuario['horarios'].resolver(data['slots'])
+        if desconocidos:
+            return None, (jsonify({
+                'error': 'Algunos horarios vencieron, vuelve a cargar los horarios',
+                'slots_desconocidos': desconocidos
+            }), 409)
+    elif data and isinstance(data.get('cart'), list):
+        # Formato anterior: el carrito completo con raw_data
         for item in data['cart']:
             try:
                 t_data = item.get('tiquetera', {})
@@ -269,7 +385,7 @@ def confirmar_reservas():
                     nombre_deporte=t_data.get('nombre_deporte', ''),
                     id_centro_entrenamiento=t_data.get('id_centro_entrenamiento', 0),
                     id_participacion_deportista=t_data.get('id_participacion_deportista', 0),
-                    entradas=t_data.get('entradas', 0),
+                    entradas=t_data.get('entradas'),
                     ilimitado=t_data.get('ilimitado', False),
                     id_tiquetera=t_data.get('id_tiquetera', 0),
                     id_escenario=t_data.get('id_escenario', 0),
@@ -287,29 +403,219 @@ def confirmar_reservas():
                 )
                 reservas_to_process.append(Reserva(tiquetera, horario))
             except Exception as e:
-                print(f"Error reconstruyendo reserva: {e}")
+                logger.warning("Error reconstruyendo reserva: %s", e)
                 continue
     else:
-        pendientes = user_sessions[user_id].get('reservas_pendientes', [])
+        # Tomar y vaciar el carrito de forma atómica: una confirmación concurrente no lo reenvía
+        pendientes = sesion_usuario['reservas_pendientes'].vaciar()
         if not pendientes:
-            return jsonify({'error': 'No hay reservas pendientes'}), 400
+            return None, (jsonify({'error': 'No hay reservas pendientes'}), 400)
         reservas_to_process = [r['reserva_obj'] for r in pendientes]
     if not reservas_to_process:
-        return jsonify({'error': 'No se pudieron procesar las reservas'}), 400
-    exitosas = 0
-    fallidas = 0
-    for reserva in reservas_to_process:
-        if api.realizar_reserva(reserva):
-            exitosas += 1
-        else:
-            fallidas += 1
-    # Limpiar pendientes
-    user_sessions[user_id]['reservas_pendientes'] = []
+        return None, (jsonify({'error': 'No se pudieron procesar las reservas'}), 400)
+    return reservas_to_process, None
+
+@app.route('/api/confirmar_reservas', methods=['POST'])
+def confirmar_reservas():
+    """API para confirmar y ejecutar todas las reservas pendientes en paralelo"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autenticado'}), 401
+    user_id = session['user_id']
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
+        return jsonify({'error': 'Sesión expirada'}), 401
+    reservas_to_process, error = reservas_de_solicitud(sesion_usuario, request.get_json(silent=True))
+    if error:
+        return error
+    # Guardar el carrito vacío antes de reservar: un conflicto de sesión aborta sin enviar nada
+    sesion_usuario['reservas_pendientes'].vaciar()
+    user_sessions.set(user_id, sesion_usuario)
+    resultados = BookingExecutor(sesion_usuario['api']).ejecutar(reservas_to_process)
+    resumen = BookingExecutor.resumir(resultados)
+    return jsonify({
+        'success': True,
+        **resumen,
+        'resultados': [r.to_dict() for r in resultados]
+    })
+
+def evento_sse(evento, datos):
+    """Formatea un evento de Server-Sent Events con datos JSON"""
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+@app.route('/api/confirmar_reservas/stream', methods=['POST'])
+def confirmar_reservas_stream():
+    """
+    Confirma las reservas y emite un evento SSE por reserva apenas termina
+
+    Eventos: 'inicio' (total), 'reserva' (índice, estado, mensaje y
+    latencia de cada una, en orden de finalización) y 'resumen' al final.
+    Los totales se acumulan sobre la marcha, sin guardar el lote completo.
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autenticado'}), 401
+    user_id = session['user_id']
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
+        return jsonify({'error': 'Sesión expirada'}), 401
+    reservas_to_process, error = reservas_de_solicitud(sesion_usuario, request.get_json(silent=True))
+    if error:
+        return error
+    # El lote ya es de este stream: el carrito se vacía antes de empezar
+    sesion_usuario['reservas_pendientes'].vaciar()
+    user_sessions.set(user_id, sesion_usuario)
+    executor = BookingExecutor(sesion_usuario['api'])
+    total = len(reservas_to_process)
+
+    def eventos():
+        yield evento_sse('inicio', {'total': total})
+        exitosas = omitidas = 0
+        for indice, resultado in executor.iterar(reservas_to_process):
+            exitosas += resultado.exitosa
+            omitidas += resultado.omitida
+            yield evento_sse('reserva', {'indice': indice, **resultado.to_dict()})
+        yield evento_sse('resumen', {
+            'exitosas': exitosas,
+            'fallidas': total - exitosas,
+            'omitidas': omitidas,
+            'total': total,
+            'llamadas_evitadas': omitidas
+        })
+
+    return Response(
+        stream_with_context(eventos()),
+        mimetype='text/event-stream',
+        # Sin cache ni buffering de proxies: cada evento debe salir apenas se produce
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/jobs', methods=['POST'])
+def crear_job():
+    """Encola las reservas como trabajo de fondo y retorna su id de inmediato"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autenticado'}), 401
+    user_id = session['user_id']
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
+        return jsonify({'error': 'Sesión expirada'}), 401
+    reservas_to_process, error = reservas_de_solicitud(sesion_usuario, request.get_json(silent=True))
+    if error:
+        return error
+    # Guardar el carrito vacío antes de encolar: un conflicto de sesión aborta sin enviar nada
+    carrito = sesion_usuario['reservas_pendientes']
+    anteriores = carrito.vaciar()
+    user_sessions.set(user_id, sesion_usuario)
+    try:
+        trabajo = cola_trabajos.enviar(sesion_usuario['api'], reservas_to_process, user_id=user_id)
+    except ColaLlena as e:
+        carrito.reemplazar(anteriores)
+        user_sessions.set(user_id, sesion_usuario)
+        return jsonify({'error': str(e)}), 503
     return jsonify({
         'success': True,
-        'exitosas': exitosas,
-        'fallidas': fallidas,
-        'total': exitosas + fallidas
+        'job_id': trabajo.id,
+        'estado': trabajo.estado,
+        'total': len(reservas_to_process),
+        'url': url_for('consultar_job', job_id=trabajo.id)
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def consultar_job(job_id):
+    """Estado de un trabajo de reservas y de cada reserva del lote"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autenticado'}), 401
+    trabajo = cola_trabajos.obtener(job_id)
+    if trabajo is None or trabajo.user_id != session['user_id']:
+        return no_encontrado(job_id, 'Trabajo no encontrado')
+    return jsonify(trabajo.to_dict())
+
+@app.route('/api/jobs/metricas', methods=['GET'])
+def metricas_jobs():
+    """Profundidad de la cola y utilización de workers de este proceso"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autenticado'}), 401
+    return jsonify(cola_trabajos.metricas())
+
+@app.route('/api/vigilancias', methods=['POST'])
+def crear_vigilancia():
+    """Vigila una tiquetera y fecha hasta que se abra un cupo en el rango de horas"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autenticado'}), 401
+    user_id = session['user_id']
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
+        return jsonify({'error': 'Sesión expirada'}), 401
+    data = request.get_json(silent=True) or {}
+    fecha = data.get('fecha')
+    hora_desde = data.get('hora_desde')
+    hora_hasta = data.get('hora_hasta') or hora_desde
+    if not data.get('tiquetera_id') or not fecha or not hora_desde:
+        return jsonify({'error': 'Faltan datos requeridos'}), 400
+    tiquetera = sesion_usuario['tiqueteras'].buscar(data['tiquetera_id'])
+    if not tiquetera:
+        return jsonify({'error': 'Tiquetera no encontrada'}), 404
+    try:
+        vigilancia = vigilante.registrar(
+            sesion_usuario['api'], tiquetera, fecha, hora_desde, hora_hasta,
+            reservar=bool(data.get('reservar')), user_id=user_id
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except LimiteVigilancias as e:
+        return jsonify({'error': str(e)}), 429
+    return jsonify({'success': True, **vigilancia.to_dict()}), 201
+
+@app.route('/api/vigilancias', methods=['GET'])
+def listar_vigilancias():
+    """Vigilancias del usuario, activas y terminadas recientemente"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autenticado'}), 401
+    return jsonify({'vigilancias': [v.to_dict() for v in vigilante.listar(session['user_id'])]})
+
+@app.route('/api/vigilancias/<vigilancia_id>', methods=['DELETE'])
+def cancelar_vigilancia(vigilancia_id):
+    """Cancela una vigilancia del usuario"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autenticado'}), 401
+    if not vigilante.cancelar(vigilancia_id, session['user_id']):
+        return no_encontrado(vigilancia_id, 'Vigilancia no encontrada')
+    return jsonify({'success': True})
+
+@app.route('/api/stats', methods=['GET'])
+def api_stats():
+    """Estadísticas de conexiones y caches de la sesión del usuario"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autenticado'}), 401
+    user_id = session['user_id']
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
+        return jsonify({'error': 'Sesión expirada'}), 401
+    api = sesion_usuario['api']
+    return jsonify({
+        'transporte': api.transporte.estadisticas(),
+        'participantes': api.participantes_stats(),
+        'horarios': api.horarios_stats(),
+        'tiqueteras': sesion_usuario['tiqueteras'].stats(),
+        'busqueda': sesion_usuario['buscador'].stats(),
+        'sesiones': user_sessions.stats(),
+        'jobs': cola_trabajos.metricas(),
+        'vigilancias': vigilante.metricas()
+    })
+
+@app.route('/api/debug/intercambios', methods=['GET'])
+def api_debug_intercambios():
+    """Últimos intercambios con el servidor de Compensar de la sesión del usuario"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autenticado'}), 401
+    user_id = session['user_id']
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
+        return jsonify({'error': 'Sesión expirada'}), 401
+    limite = request.args.get('limite', default=20, type=int)
+    solo_errores = request.args.get('errores', '').lower() in ('1', 'true')
+    buffer = sesion_usuario['api'].transporte.intercambios
+    return jsonify({
+        'intercambios': buffer.recientes(limite=limite, solo_errores=solo_errores),
+        'capacidad': buffer.capacidad
     })
 
 @app.route('/api/limpiar_reservas', methods=['POST'])
@@ -317,9 +623,11 @@ def limpiar_reservas():
     if 'user_id' not in session:
         return jsonify({'error': 'No autenticado'}), 401
     user_id = session['user_id']
-    if user_id not in user_sessions:
+    sesion_usuario = user_sessions.get(user_id)
+    if sesion_usuario is None:
         return jsonify({'error': 'Sesión expirada'}), 401
-    user_sessions[user_id]['reservas_pendientes'] = []
+    sesion_usuario['reservas_pendientes'].vaciar()
+    user_sessions.set(user_id, sesion_usuario)
     return jsonify({'success': True})
 
 if __name__ == '__main__':
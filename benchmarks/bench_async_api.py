@@ -0,0 +1,127 @@
+"""
+CompensarAPI (hilos) vs AsyncCompensarAPI (asyncio) contra un servidor local
+
+Cada operación es una consulta de horarios para una fecha distinta (sin
+aciertos de cache) a un servidor HTTP local que tarda LATENCIA segundos en
+responder, como el de Compensar. Se miden 1, 10 y 100 operaciones
+simultáneas: el cliente con hilos usa un hilo por operación; el asíncrono,
+una corrutina por operación sobre un solo pool.
+
+Uso:
+    python -m benchmarks.bench_async_api [latencia_segundos] [tamaño_pool]
+"""
+
+import asyncio
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from config.config import Config
+from src.api.async_compensar_api import AsyncCompensarAPI
+from src.api.compensar_api import CompensarAPI
+from src.models.booking import Tiquetera
+
+NIVELES = (1, 10, 100)
+LATENCIA = 0.05
+SLOT = {'conteo': 10, 'totalTurnos': 14, 'ids': [113513310],
+        'caracteristicas': {'1427': {'nombre': 'Semiolímpica'}}}
+
+
+class UpstreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # Con el backlog por defecto (5) se pierden conexiones a 100 simultáneas
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # Headers y cuerpo salen en escrituras separadas
+
+    def _responder(self, datos):
+        time.sleep(LATENCIA)
+        cuerpo = json.dumps(datos).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        self._responder({'personas': [{'id': 1, 'id_participacion': 4626802}]})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        fecha = payload.get('fecha', '')
+        self._responder({fecha: {f'{h:02d}:00 - {h + 1:02d}:00': {'1427': SLOT} for h in range(6, 22)}})
+
+    def log_message(self, *args):
+        pass
+
+
+def servir(latencia, puertos):
+    """Servidor en su propio proceso para no competir por el GIL con los clientes"""
+    global LATENCIA
+    LATENCIA = latencia
+    servidor = UpstreamServer(('127.0.0.1', 0), UpstreamHandler)
+    puertos.put(servidor.server_address[1])
+    servidor.serve_forever()
+
+
+def fechas(n):
+    inicio = date(2026, 1, 1)
+    return [(inicio + timedelta(days=i)).isoformat() for i in range(n)]
+
+
+def tiquetera():
+    return Tiquetera(id=7, nombre_centro_entrenamiento='Calle 94', nombre_sede='Salones Calle 94',
+                     nombre_deporte='Natación', id_centro_entrenamiento=1, id_participacion_deportista=1,
+                     entradas=10, ilimitado=False, id_tiquetera=7, id_escenario=602, id_centro=93)
+
+
+def medir_hilos(n):
+    api = CompensarAPI(requests.Session())
+    api.obtener_participantes()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        resultados = list(executor.map(lambda f: api.get_horarios(tiquetera(), f), fechas(n)))
+    duracion = time.perf_counter() - inicio
+    assert all(len(r) == 16 for r in resultados)
+    return duracion
+
+
+async def medir_async(n):
+    async with AsyncCompensarAPI(max_lecturas=n) as api:
+        await api.obtener_participantes()
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(*(api.get_horarios(tiquetera(), f) for f in fechas(n)))
+        duracion = time.perf_counter() - inicio
+    assert all(len(r) == 16 for r in resultados)
+    return duracion
+
+
+def main():
+    puertos = multiprocessing.Queue()
+    servidor = multiprocessing.Process(target=servir, args=(LATENCIA, puertos), daemon=True)
+    servidor.start()
+    Config.API_BASE_URL = f'http://127.0.0.1:{puertos.get(timeout=10)}'
+    # Por defecto el pool se amplía para medir el modelo de concurrencia y no el límite del pool
+    Config.HTTP_POOL_MAXSIZE = int(sys.argv[2]) if len(sys.argv) > 2 else max(NIVELES)
+
+    print(f"Consultas de horarios con {LATENCIA * 1000:.0f} ms de latencia del servidor")
+    print(f"{'simultáneas':>12} {'hilos (s)':>10} {'async (s)':>10} {'ops/s hilos':>12} {'ops/s async':>12}")
+    try:
+        for n in NIVELES:
+            t_hilos = medir_hilos(n)
+            t_async = asyncio.run(medir_async(n))
+            print(f"{n:>12} {t_hilos:>10.3f} {t_async:>10.3f} {n / t_hilos:>12.0f} {n / t_async:>12.0f}")
+    finally:
+        servidor.terminate()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        LATENCIA = float(sys.argv[1])
+    main()
@@ -0,0 +1,210 @@
+"""
+Benchmark de punta a punta contra el servidor simulado (benchmarks.mock_upstream)
+
+Recorre las tres capas con peticiones HTTP reales a un servidor local:
+CompensarAPI (tiqueteras, horarios sin cache y reservas con contención de
+cupos), la ventana de BookingScheduler y las rutas de Flask (con el test
+client, sin servidor WSGI). Reporta operaciones por segundo y latencias
+p50/p95/p99 por escenario.
+
+En "api.realizar_reserva (contención)" todas las operaciones compiten por 4 franjas
+con `--cupos` cupos cada una: las fallidas son rechazos del servidor por
+falta de cupo, no errores del cliente.
+
+Uso:
+    python -m benchmarks.bench_e2e [--operaciones 200] [--concurrencia 10] [--latencia 0.02]
+                                   [--jitter 0.01] [--errores 0.0] [--cupos 5] [--json resultados.json]
+"""
+
+import argparse
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List
+import requests
+from config.config import Config
+from config.logging_config import configurar_logging
+from benchmarks.mock_upstream import iniciar_proceso
+
+FRANJAS_EN_CONTENCION = 4
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por rango más cercano"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def resumir(escenario: str, latencias: List[float], fallidas: int, duracion: float,
+            concurrencia: int) -> Dict[str, Any]:
+    return {
+        'escenario': escenario,
+        'operaciones': len(latencias),
+        'concurrencia': concurrencia,
+        'fallidas': fallidas,
+        'ops_s': len(latencias) / duracion if duracion else 0.0,
+        'p50_ms': percentil(latencias, 50) * 1000,
+        'p95_ms': percentil(latencias, 95) * 1000,
+        'p99_ms': percentil(latencias, 99) * 1000
+    }
+
+
+def medir(escenario: str, operacion: Callable[[int], bool], n: int, concurrencia: int) -> Dict[str, Any]:
+    """Ejecuta operacion(i) n veces con `concurrencia` hilos; operacion retorna True si tuvo éxito"""
+    def una(i: int):
+        inicio = time.perf_counter()
+        try:
+            ok = operacion(i)
+        except Exception:
+            ok = False
+        return time.perf_counter() - inicio, ok
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        resultados = list(executor.map(una, range(n)))
+    duracion = time.perf_counter() - inicio
+    return resumir(escenario, [r[0] for r in resultados], sum(1 for r in resultados if not r[1]),
+                   duracion, concurrencia)
+
+
+def fecha(i: int) -> str:
+    # Cada respuesta trae 7 fechas: separar las operaciones una semana para que ninguna sea acierto de cache
+    return (date.today() + timedelta(days=7 * (i + 1))).isoformat()
+
+
+def escenarios_api(n: int, concurrencia: int) -> List[Dict[str, Any]]:
+    from src.api.compensar_api import CompensarAPI
+    from src.models.booking import Reserva
+
+    api = CompensarAPI(requests.Session())
+    tiquetera = api.get_tiqueteras()[0]
+    resultados = [
+        medir('api.get_tiqueteras', lambda i: bool(api.get_tiqueteras()), n, concurrencia),
+        medir('api.get_horarios (sin cache)',
+              lambda i: len(api.get_horarios(tiquetera, fecha(n + i))) > 0, n, concurrencia)
+    ]
+    franjas = api.get_horarios(tiquetera, date.today().isoformat())[:FRANJAS_EN_CONTENCION]
+    resultados.append(medir(
+        'api.realizar_reserva (contención)',
+        lambda i: api.realizar_reserva(Reserva(tiquetera, franjas[i % len(franjas)])), n, concurrencia
+    ))
+    return resultados
+
+
+def escenario_ventana(n: int) -> Dict[str, Any]:
+    from src.api.compensar_api import CompensarAPI
+    from src.models.booking import Reserva
+    from src.scheduler.booking_scheduler import BookingScheduler
+
+    api = CompensarAPI(requests.Session())
+    tiquetera = api.get_tiqueteras()[0]
+    horarios = api.get_horarios(tiquetera, fecha(3 * n))
+    scheduler = BookingScheduler(api)
+    scheduler.ventana.preparacion = 1.0
+    scheduler.reloj.sincronizar()
+    objetivo = scheduler.reloj.server_now() + 2.5
+    for i in range(n):
+        scheduler.programar_reserva(Reserva(tiquetera, horarios[i % len(horarios)]), objetivo)
+    disparos = scheduler.ventana.ejecutar()
+    fin = max(d.enviado_en + d.resultado.latencia_ms / 1000 for d in disparos)
+    resumen = resumir(
+        'scheduler.ventana (T-0 simultáneo)',
+        [d.resultado.latencia_ms / 1000 for d in disparos],
+        sum(1 for d in disparos if not d.resultado.exitosa),
+        fin - min(d.enviado_en for d in disparos),
+        n
+    )
+    resumen['jitter_max_ms'] = max(abs(d.jitter_ms) for d in disparos)
+    return resumen
+
+
+def escenarios_flask(n: int, concurrencia: int) -> List[Dict[str, Any]]:
+    import app as aplicacion
+    from src.api.compensar_api import CompensarAPI
+    from src.api.shared_availability import disponibilidad_compartida
+    from src.sessions.store import crear_sesion_usuario
+
+    api = CompensarAPI(requests.Session(), disponibilidad=disponibilidad_compartida())
+    tiqueteras = api.get_tiqueteras()
+    tiquetera = tiqueteras[0]
+    sesion = crear_sesion_usuario(None, api, tiqueteras=tiqueteras)
+    aplicacion.user_sessions.set('bench', sesion)
+    registro = sesion['horarios']
+    slots = [registro.registrar(tiquetera, h) for h in api.get_horarios(tiquetera, fecha(4 * n))]
+
+    locales = threading.local()
+
+    def cliente():
+        if not hasattr(locales, 'cliente'):
+            locales.cliente = aplicacion.app.test_client()
+            with locales.cliente.session_transaction() as s:
+                s['user_id'] = 'bench'
+        return locales.cliente
+
+    def horarios_rango(i: int) -> bool:
+        respuesta = cliente().post('/api/horarios_rango', json={
+            'tiquetera_id': tiquetera.id, 'fechas': [fecha(2 * n + i)]
+        })
+        return respuesta.status_code == 200
+
+    def confirmar(i: int) -> bool:
+        respuesta = cliente().post('/api/confirmar_reservas', json={'slots': [slots[i % len(slots)]]})
+        return respuesta.status_code == 200 and respuesta.get_json()['exitosas'] == 1
+
+    return [
+        medir('flask /api/tiqueteras', lambda i: cliente().get('/api/tiqueteras').status_code == 200,
+              n, concurrencia),
+        medir('flask /api/horarios_rango', horarios_rango, n, concurrencia),
+        medir('flask /api/confirmar_reservas', confirmar, n, concurrencia)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de punta a punta contra el mock de Compensar')
+    parser.add_argument('--operaciones', type=int, default=200)
+    parser.add_argument('--concurrencia', type=int, default=10)
+    parser.add_argument('--latencia', type=float, default=0.02)
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--errores', type=float, default=0.0)
+    parser.add_argument('--cupos', type=int, default=5)
+    parser.add_argument('--json', help='Archivo donde guardar los resultados')
+    args = parser.parse_args()
+
+    # Los rechazos por falta de cupo son esperados: sin logging la salida es solo la tabla
+    configurar_logging(nivel='CRITICAL', niveles='')
+    servidor, url = iniciar_proceso(latencia=args.latencia, jitter=args.jitter, errores=args.errores,
+                                    cupos=args.cupos, semilla=1)
+    Config.API_BASE_URL = url
+    Config.HTTP_POOL_MAXSIZE = max(Config.HTTP_POOL_MAXSIZE, args.concurrencia)
+
+    print(f"Mock en {url}: latencia {args.latencia * 1000:.0f} ms (+0..{args.jitter * 1000:.0f} ms), "
+          f"errores {args.errores:.0%}, {args.cupos} cupos por franja")
+    try:
+        resultados = escenarios_api(args.operaciones, args.concurrencia)
+        resultados.append(escenario_ventana(min(args.operaciones, 20)))
+        resultados.extend(escenarios_flask(args.operaciones, args.concurrencia))
+        contadores = requests.get(f'{url}/__mock/stats', timeout=5).json()
+    finally:
+        servidor.terminate()
+
+    print(f"\n{'escenario':<36} {'ops':>5} {'conc':>5} {'fallidas':>8} {'ops/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for r in resultados:
+        print(f"{r['escenario']:<36} {r['operaciones']:>5} {r['concurrencia']:>5} {r['fallidas']:>8} "
+              f"{r['ops_s']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+    print(f"\nServidor: {contadores['peticiones']} peticiones, {contadores['errores']} errores 503, "
+          f"{contadores['reservas']} reservas aceptadas, {contadores['rechazadas']} rechazadas sin cupo")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'parametros': vars(args), 'resultados': resultados, 'servidor': contadores},
+                      f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Costo de logging por llamada a get_horarios: antes vs. ahora
+
+Antes: logging.basicConfig(DEBUG) escribiendo a server_debug.log en el hilo
+de la petición (incluyendo el DEBUG de urllib3) más cuatro print() con el
+payload completo y str(data)[:500], que construye el repr de toda la
+respuesta antes de recortarlo.
+
+Ahora: logger del módulo con formato perezoso, nivel INFO y QueueHandler;
+el formateo y la escritura ocurren en el hilo del QueueListener.
+
+Uso:
+    python -m benchmarks.bench_logging [iteraciones]
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+PARTICIPANTES = [{'id': i, 'id_participacion': 4626800 + i, 'nombre': f'Participante {i}'} for i in range(4)]
+PAYLOAD = {
+    'idTiquetera': 7, 'idEscenario': 602, 'participantes': PARTICIPANTES,
+    'inicioInmediato': False, 'turnosSeguidos': 1, 'idCentro': 93, 'fecha': '2025-11-30'
+}
+# Respuesta típica: una semana, 16 franjas por día, 3 zonas por franja
+RESPUESTA = {
+    f'2025-12-{dia:02d}': {
+        f'{h:02d}:00 - {h + 1:02d}:00': {
+            str(1427 + z): {
+                'conteo': 10, 'totalTurnos': 14, 'ids': [113513310 + h * 10 + z],
+                'caracteristicas': {str(1427 + z): {'nombre': 'Semiolímpica'}},
+                'centroEntrenamiento': {'id': 93, 'idEscenario': 602}
+            } for z in range(3)
+        } for h in range(6, 22)
+    } for dia in range(1, 8)
+}
+URLLIB3_DEBUG = '%s://%s:%s "%s %s %s" %s %s'
+
+
+def logging_anterior(log: logging.Logger, urllib3_log: logging.Logger, horarios: int):
+    print(f"🕐 Obteniendo horarios para Calle 94 - {PAYLOAD['fecha']}...")
+    urllib3_log.debug(URLLIB3_DEBUG, 'https', 'sistemaplanbienestar', 443, 'GET',
+                      '/sistema.php/grupofamiliar/lista/json', 'HTTP/1.1', 200, None)
+    print(f"   📡 Consultando horarios con POST: {PAYLOAD}")
+    urllib3_log.debug(URLLIB3_DEBUG, 'https', 'sistemaplanbienestar', 443, 'POST',
+                      '/entrenamiento/reserva/practica/libre/horarios', 'HTTP/1.1', 200, None)
+    print(f"   📥 Respuesta Horarios: {str(RESPUESTA)[:500]}...")
+    print(f"✅ Se encontraron {horarios} horarios disponibles")
+
+
+def logging_nuevo(log: logging.Logger, urllib3_log: logging.Logger, horarios: int):
+    log.debug("Obteniendo horarios para %s - %s", 'Calle 94', '2025-12-01')
+    urllib3_log.debug(URLLIB3_DEBUG, 'https', 'sistemaplanbienestar', 443, 'POST',
+                      '/entrenamiento/reserva/practica/libre/horarios', 'HTTP/1.1', 200, None)
+    log.info("Se encontraron %d horarios para %s (%d fechas en la respuesta)",
+             horarios, '2025-12-01', len(RESPUESTA))
+
+
+def _logger(nombre: str, nivel: int, handler: logging.Handler) -> logging.Logger:
+    log = logging.getLogger(nombre)
+    log.handlers[:] = [handler]
+    log.setLevel(nivel)
+    log.propagate = False
+    return log
+
+
+def medir(funcion, log, urllib3_log, iteraciones: int) -> float:
+    """Microsegundos promedio por llamada"""
+    with open(os.devnull, 'w', encoding='utf-8') as nulo, redirect_stdout(nulo):
+        inicio = time.perf_counter()
+        for _ in range(iteraciones):
+            funcion(log, urllib3_log, 48)
+        return (time.perf_counter() - inicio) / iteraciones * 1e6
+
+
+def main(iteraciones: int = 2000):
+    formato = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    with tempfile.TemporaryDirectory() as directorio:
+        # Antes: FileHandler síncrono con todo en DEBUG
+        archivo = logging.FileHandler(os.path.join(directorio, 'server_debug.log'), encoding='utf-8')
+        archivo.setFormatter(formato)
+        antes = medir(
+            logging_anterior,
+            _logger('bench.anterior', logging.DEBUG, archivo),
+            _logger('bench.anterior.urllib3', logging.DEBUG, archivo),
+            iteraciones
+        )
+        archivo.close()
+
+        # Ahora: QueueHandler en el hilo de la petición, consola + archivo en el listener
+        rotativo = logging.handlers.RotatingFileHandler(os.path.join(directorio, 'app.log'), encoding='utf-8')
+        consola = logging.StreamHandler(open(os.devnull, 'w', encoding='utf-8'))
+        for destino in (rotativo, consola):
+            destino.setFormatter(formato)
+        cola = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(cola, consola, rotativo)
+        listener.start()
+        encolar = logging.handlers.QueueHandler(cola)
+        ahora = medir(
+            logging_nuevo,
+            _logger('bench.nuevo', logging.INFO, encolar),
+            _logger('bench.nuevo.urllib3', logging.WARNING, encolar),
+            iteraciones
+        )
+        listener.stop()
+        rotativo.close()
+        consola.stream.close()
+
+    print(f"Logging por llamada a get_horarios ({iteraciones} iteraciones, {len(str(RESPUESTA))} bytes de respuesta)")
+    print(f"  antes (print + archivo DEBUG síncrono): {antes:8.1f} µs")
+    print(f"  ahora (logger perezoso + cola):         {ahora:8.1f} µs")
+    print(f"  mejora: {antes / ahora:.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
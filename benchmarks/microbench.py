@@ -0,0 +1,239 @@
+"""
+Microbenchmarks de las partes de CPU del cliente, con baselines en JSON
+
+Casos:
+  - parsear_horarios con respuestas sintéticas de cientos a miles de franjas y zonas
+  - parsear_horarios_compacto y HorarioTable (construcción y consulta) sobre la más grande
+  - memoria retenida por franja (tracemalloc) de parsear_horarios frente a
+    parsear_horarios_compacto con y sin Internador, después de soltar la respuesta
+  - extraer_tiqueteras_html (el scraper de BeautifulSoup del login con Selenium)
+    sobre reservas_page_debug.html y tiqueteras_page_debug.html
+  - payload_reserva + json.dumps, lo que realizar_reserva hace antes de enviar
+  - Reserva.to_api_payload
+
+Cada caso se repite hasta ~0.2 s por muestra (timeit.autorange) y se
+guardan la mediana y el mínimo de 5 muestras por operación. La tabla
+muestra la mediana; comparar usa el mínimo, que es el menos afectado por
+el ruido de la máquina.
+
+Uso:
+    python -m benchmarks.microbench correr [--guardar ARCHIVO] [--filtro TEXTO]
+    python -m benchmarks.microbench comparar [BASELINE] [ACTUAL] [--umbral 0.25]
+
+Sin ACTUAL, comparar corre los casos en el momento. Termina con código 1 si
+algún caso es más lento (o retiene más memoria) que la baseline por más
+del umbral (25% por defecto), para usarlo antes de desplegar. La baseline por defecto es
+benchmarks/baselines/microbench.json.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+from src.api.compensar_api import parsear_horarios, payload_reserva
+from src.api.horarios_compactos import parsear_horarios_compacto
+from src.auth.tiqueteras_scraper import extraer_tiqueteras_html
+from src.models.booking import Tiquetera, Horario, Reserva
+from src.models.compact import Internador
+from src.models.horario_table import HorarioTable
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(RAIZ, 'benchmarks', 'baselines', 'microbench.json')
+MUESTRAS = 5
+
+
+def _leer(nombre: str) -> str:
+    with open(os.path.join(RAIZ, nombre), encoding='utf-8') as f:
+        return f.read()
+
+
+def respuesta_horarios(dias: int, franjas: int, zonas: int) -> Dict[str, Any]:
+    """Respuesta sintética de horarios con la forma real: fecha > franja > zona"""
+    plantilla = json.loads(_leer('last_reservation_payload.json'))['horario']
+    respuesta = {}
+    for dia in range(dias):
+        fecha = f'2026-{1 + dia // 28:02d}-{1 + dia % 28:02d}'
+        respuesta[fecha] = {}
+        for f in range(franjas):
+            minutos = 6 * 60 + f * 20
+            rango = f'{minutos // 60:02d}:{minutos % 60:02d} - {(minutos + 20) // 60:02d}:{(minutos + 20) % 60:02d}'
+            timestamp = plantilla['timestamp'] + dia * 86400 + f * 1200
+            respuesta[fecha][rango] = {
+                str(1427 + z): {
+                    **plantilla,
+                    'conteo': (dia + f + z) % 11,
+                    'totalUtilizado': 100 * (1 - ((dia + f + z) % 11) / 10),
+                    'timestamp': timestamp,
+                    'timestamp_fin': timestamp + 1200,
+                    'ids': [113513310 + dia * 10000 + f * 100 + z],
+                    'caracteristicas': {str(1427 + z): {'nombre': f'Carril {z + 1:02d}'}}
+                } for z in range(zonas)
+            }
+    return respuesta
+
+
+def casos() -> List[Tuple[str, Callable[[], Any]]]:
+    """(nombre, función sin argumentos) de cada caso, con los datos ya preparados"""
+    lista = []
+    for dias, franjas, zonas in ((7, 16, 1), (7, 16, 10), (31, 48, 10)):
+        datos = respuesta_horarios(dias, franjas, zonas)
+        lista.append((f'parsear_horarios[{dias * franjas * zonas} franjas]', lambda d=datos: parsear_horarios(d)))
+    lista.append((f'parsear_horarios_compacto+Internador[{dias * franjas * zonas} franjas]',
+                  lambda d=datos: parsear_horarios_compacto(d, Internador())))
+    horarios = parsear_horarios_compacto(datos, Internador())
+    lista.append((f'HorarioTable[{dias * franjas * zonas} franjas]', lambda h=horarios: HorarioTable.desde_respuesta(h)))
+    tabla = HorarioTable.desde_respuesta(horarios)
+    semana = (tabla.inicio[0] + 7 * 86400, tabla.inicio[0] + 14 * 86400)
+    lista.append((f'HorarioTable.consultar[{dias * franjas * zonas} franjas]',
+                  lambda: tabla.consultar(('utilizacion', 'inicio'), 20, cupos_min=1, desde=semana[0], hasta=semana[1])))
+
+    for pagina in ('reservas_page_debug.html', 'tiqueteras_page_debug.html'):
+        html = _leer(pagina)
+        lista.append((f'extraer_tiqueteras_html[{pagina}]', lambda h=html: extraer_tiqueteras_html(h)))
+
+    participantes = tuple(json.loads(_leer('debug_deportistas.json'))['personas'])
+    tiquetera = Tiquetera(
+        id=1, nombre_centro_entrenamiento='Cajicá', nombre_sede='Piscina Cajicá', nombre_deporte='Natación',
+        id_centro_entrenamiento=93, id_participacion_deportista=4626802, entradas=10, ilimitado=False,
+        id_tiquetera=131525776, id_escenario=602, id_centro=93
+    )
+    plantilla = json.loads(_leer('last_reservation_payload.json'))['horario']
+    reserva = Reserva(tiquetera, Horario('2025-11-30', '06:00', '07:00', 10, id_turno=113513310, raw_data=plantilla))
+    lista.append(('payload_reserva+json.dumps',
+                  lambda: json.dumps(payload_reserva(reserva, participantes)).encode('utf-8')))
+    lista.append(('Reserva.to_api_payload', reserva.to_api_payload))
+    return lista
+
+
+def casos_memoria() -> List[Tuple[str, Callable[[Any], Any]]]:
+    """(nombre, parser) de los casos de memoria; cada parser recibe la respuesta recién decodificada"""
+    return [
+        ('parsear_horarios', parsear_horarios),
+        ('parsear_horarios_compacto', lambda d: parsear_horarios_compacto(d)),
+        ('parsear_horarios_compacto+Internador', lambda d: parsear_horarios_compacto(d, Internador())),
+    ]
+
+
+def medir_memoria(parsear: Callable[[Any], Any], texto: str, franjas: int) -> Dict[str, float]:
+    """
+    Bytes retenidos por franja: decodifica `texto` (como hace requests),
+    parsea, suelta la respuesta y cuenta lo que siguen ocupando los horarios
+    """
+    tracemalloc.start()
+    try:
+        data = json.loads(texto)
+        horarios = parsear(data)
+        del data
+        retenido = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del horarios
+    return {'bytes_por_franja': retenido / franjas}
+
+
+def medir(funcion: Callable[[], Any]) -> Dict[str, float]:
+    """Segundos por operación: mediana y mínimo de MUESTRAS muestras"""
+    timer = timeit.Timer(funcion)
+    numero, _ = timer.autorange()
+    tiempos = [t / numero for t in timer.repeat(repeat=MUESTRAS, number=numero)]
+    return {'mediana_s': statistics.median(tiempos), 'min_s': min(tiempos), 'iteraciones': numero}
+
+
+def correr(filtro: str = '') -> Dict[str, Any]:
+    resultados = {}
+    for nombre, funcion in casos():
+        if filtro and filtro not in nombre:
+            continue
+        resultados[nombre] = medir(funcion)
+        print(f"{nombre:<52} {resultados[nombre]['mediana_s'] * 1e6:>12.1f} µs", flush=True)
+
+    dias, franjas, zonas = 31, 48, 10
+    # JSON de ida y vuelta: la respuesta sintética ya comparte los dicts de la plantilla
+    texto = json.dumps(respuesta_horarios(dias, franjas, zonas))
+    memoria = {}
+    for nombre, parsear in casos_memoria():
+        nombre = f'{nombre}[{dias * franjas * zonas} franjas]'
+        if filtro and filtro not in nombre:
+            continue
+        memoria[nombre] = medir_memoria(parsear, texto, dias * franjas * zonas)
+        print(f"{nombre:<52} {memoria[nombre]['bytes_por_franja']:>12.0f} B/franja", flush=True)
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'casos': resultados,
+        'memoria': memoria
+    }
+
+
+def comparar(baseline: Dict[str, Any], actual: Dict[str, Any], umbral: float) -> bool:
+    """Imprime la comparación caso por caso; False si alguno empeoró más del umbral"""
+    ok = True
+    print(f"\n{'caso (mínimo)':<52} {'baseline µs':>12} {'actual µs':>12} {'cambio':>8}")
+    for nombre, medicion in actual['casos'].items():
+        base = baseline['casos'].get(nombre)
+        if base is None:
+            print(f"{nombre:<52} {'-':>12} {medicion['min_s'] * 1e6:>12.1f} {'nuevo':>8}")
+            continue
+        cambio = medicion['min_s'] / base['min_s'] - 1
+        regresion = cambio > umbral
+        ok = ok and not regresion
+        print(f"{nombre:<52} {base['min_s'] * 1e6:>12.1f} {medicion['min_s'] * 1e6:>12.1f} "
+              f"{cambio:>+8.1%}{'  REGRESIÓN' if regresion else ''}")
+
+    memoria_base = baseline.get('memoria', {})
+    if actual.get('memoria'):
+        print(f"\n{'memoria retenida':<52} {'baseline B':>12} {'actual B':>12} {'cambio':>8}")
+    for nombre, medicion in actual.get('memoria', {}).items():
+        base = memoria_base.get(nombre)
+        if base is None:
+            print(f"{nombre:<52} {'-':>12} {medicion['bytes_por_franja']:>12.0f} {'nuevo':>8}")
+            continue
+        cambio = medicion['bytes_por_franja'] / base['bytes_por_franja'] - 1
+        regresion = cambio > umbral
+        ok = ok and not regresion
+        print(f"{nombre:<52} {base['bytes_por_franja']:>12.0f} {medicion['bytes_por_franja']:>12.0f} "
+              f"{cambio:>+8.1%}{'  REGRESIÓN' if regresion else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmarks de parseo y construcción de payloads')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p_correr = sub.add_parser('correr', help='Corre los casos y opcionalmente guarda una baseline')
+    p_correr.add_argument('--guardar', nargs='?', const=BASELINE, help=f'Archivo JSON (por defecto {BASELINE})')
+    p_correr.add_argument('--filtro', default='', help='Solo los casos cuyo nombre contiene este texto')
+    p_comparar = sub.add_parser('comparar', help='Compara contra una baseline')
+    p_comparar.add_argument('baseline', nargs='?', default=BASELINE)
+    p_comparar.add_argument('actual', nargs='?', help='Resultados guardados (por defecto se corren ahora)')
+    p_comparar.add_argument('--umbral', type=float, default=0.25, help='Empeoramiento tolerado (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    if args.comando == 'correr':
+        resultados = correr(args.filtro)
+        if args.guardar:
+            os.makedirs(os.path.dirname(os.path.abspath(args.guardar)), exist_ok=True)
+            with open(args.guardar, 'w', encoding='utf-8') as f:
+                json.dump(resultados, f, ensure_ascii=False, indent=2)
+            print(f"\nBaseline guardada en {args.guardar}")
+        return
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if args.actual:
+        with open(args.actual, encoding='utf-8') as f:
+            actual = json.load(f)
+    else:
+        actual = correr()
+    if not comparar(baseline, actual, args.umbral):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+Servidor local que imita los endpoints de Compensar usados por el cliente
+
+Implementa grupofamiliar/lista/json, tiqueteras, horarios y guardar (más
+HEAD con header Date para el precalentamiento y la sincronización del
+reloj). Los datos salen de los fixtures del repositorio:
+debug_deportistas.json, tiqueteras_cache.json y el horario de
+last_reservation_payload.json como plantilla de cada franja.
+
+Cada franja arranca con `cupos` cupos; guardar los descuenta bajo un lock
+y rechaza cuando se agotan, así que muchas reservas simultáneas sobre la
+misma franja reproducen la contención real. La latencia, el jitter y la
+tasa de errores 503 son configurables.
+
+Uso:
+    python -m benchmarks.mock_upstream [--puerto 8765] [--latencia 0.05] [--jitter 0.02]
+                                       [--errores 0.01] [--cupos 5] [--dias 7]
+    API_BASE_URL=http://127.0.0.1:8765 python app.py
+"""
+
+import argparse
+import copy
+import json
+import multiprocessing
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _fixture(nombre: str) -> Any:
+    with open(os.path.join(RAIZ, nombre), encoding='utf-8') as f:
+        return json.load(f)
+
+
+class MockCompensar:
+    """Estado del servidor simulado: fixtures, cupos por franja y contadores"""
+
+    def __init__(self, latencia: float = 0.05, jitter: float = 0.0, errores: float = 0.0,
+                 cupos: int = 5, dias: int = 7, semilla: Optional[int] = None):
+        self.latencia = latencia
+        self.jitter = jitter
+        self.errores = errores
+        self.cupos = cupos
+        self.dias = max(1, dias)
+        self.personas = _fixture('debug_deportistas.json')
+        self.tiqueteras = _fixture('tiqueteras_cache.json')
+        self.plantilla = _fixture('last_reservation_payload.json')['horario']
+        self._random = random.Random(semilla)
+        self._cupos: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.contadores = {'peticiones': 0, 'errores': 0, 'reservas': 0, 'rechazadas': 0}
+
+    def esperar(self):
+        with self._lock:
+            demora = self.latencia + self._random.uniform(0, self.jitter)
+        time.sleep(demora)
+
+    def fallar(self) -> bool:
+        """True si esta petición debe responder 503"""
+        with self._lock:
+            self.contadores['peticiones'] += 1
+            falla = self._random.random() < self.errores
+            self.contadores['errores'] += falla
+            return falla
+
+    @staticmethod
+    def id_turno(id_centro: Any, fecha: str, hora: int) -> int:
+        return zlib.crc32(f'{id_centro}|{fecha}|{hora}'.encode('utf-8'))
+
+    def horarios(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Respuesta de horarios: `dias` fechas desde la pedida, franjas de 06:00 a 22:00"""
+        inicio = date.fromisoformat(payload.get('fecha') or date.today().isoformat())
+        id_centro = payload.get('idCentro')
+        respuesta = {}
+        for dia in range(self.dias):
+            fecha = (inicio + timedelta(days=dia)).isoformat()
+            franjas = {}
+            for hora in range(6, 22):
+                id_turno = self.id_turno(id_centro, fecha, hora)
+                with self._lock:
+                    disponibles = self._cupos.get(id_turno, self.cupos)
+                franja = copy.deepcopy(self.plantilla)
+                timestamp = int(datetime.fromisoformat(f'{fecha}T{hora:02d}:00').timestamp())
+                franja.update({
+                    'conteo': disponibles,
+                    'ids': [id_turno],
+                    'idTiquetera': payload.get('idTiquetera'),
+                    'timestamp': timestamp,
+                    'timestamp_fin': timestamp + 3600,
+                    'totalUtilizado': 100 * (self.cupos - disponibles) / self.cupos if self.cupos else 100.0
+                })
+                franja['centroEntrenamiento'].update({'id': id_centro, 'idEscenario': payload.get('idEscenario')})
+                franjas[f'{hora:02d}:00 - {hora + 1:02d}:00'] = {'1427': franja}
+            respuesta[fecha] = franjas
+        return respuesta
+
+    def guardar(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Descuenta un cupo de la franja; rechaza si ya no quedan"""
+        ids = (payload.get('horario') or {}).get('ids') or [None]
+        with self._lock:
+            disponibles = self._cupos.get(ids[0], self.cupos)
+            if disponibles <= 0:
+                self.contadores['rechazadas'] += 1
+                return {'success': False, 'mensaje': 'No hay cupos disponibles'}
+            self._cupos[ids[0]] = disponibles - 1
+            self.contadores['reservas'] += 1
+        return {'success': True, 'mensaje': 'Reserva exitosa'}
+
+
+class UpstreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # Con el backlog por defecto (5) se pierden conexiones bajo carga
+
+    def __init__(self, direccion: Tuple[str, int], mock: MockCompensar):
+        super().__init__(direccion, MockHandler)
+        self.mock = mock
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # Headers y cuerpo salen en escrituras separadas
+
+    def _responder(self, datos: Any, status: int = 200):
+        cuerpo = json.dumps(datos).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _ruta(self) -> str:
+        return self.path.split('?', 1)[0].rstrip('/')
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        mock = self.server.mock
+        if self._ruta() == '/__mock/stats':
+            with mock._lock:
+                return self._responder(dict(mock.contadores))
+        mock.esperar()
+        if mock.fallar():
+            return self._responder({'error': 'Servicio no disponible'}, 503)
+        if self._ruta().endswith('/grupofamiliar/lista/json'):
+            return self._responder(mock.personas)
+        self._responder({'error': 'No encontrado'}, 404)
+
+    def do_POST(self):
+        mock = self.server.mock
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        mock.esperar()
+        if mock.fallar():
+            return self._responder({'error': 'Servicio no disponible'}, 503)
+        ruta = self._ruta()
+        if ruta.endswith('/tiqueteras'):
+            return self._responder(mock.tiqueteras)
+        if ruta.endswith('/horarios'):
+            return self._responder(mock.horarios(payload))
+        if ruta.endswith('/guardar'):
+            return self._responder(mock.guardar(payload))
+        self._responder({'error': 'No encontrado'}, 404)
+
+    def log_message(self, *args):
+        pass
+
+
+def servir(puerto: int, opciones: Dict[str, Any], puertos=None):
+    servidor = UpstreamServer(('127.0.0.1', puerto), MockCompensar(**opciones))
+    if puertos is not None:
+        puertos.put(servidor.server_address[1])
+    servidor.serve_forever()
+
+
+def iniciar_proceso(**opciones) -> Tuple[multiprocessing.Process, str]:
+    """
+    Arranca el servidor en otro proceso (para no competir por el GIL con los clientes)
+
+    Returns:
+        (proceso, url base para Config.API_BASE_URL)
+    """
+    puertos = multiprocessing.Queue()
+    proceso = multiprocessing.Process(target=servir, args=(0, opciones, puertos), daemon=True)
+    proceso.start()
+    return proceso, f'http://127.0.0.1:{puertos.get(timeout=10)}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor local que imita la API de Compensar')
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--latencia', type=float, default=0.05, help='Segundos por respuesta')
+    parser.add_argument('--jitter', type=float, default=0.02, help='Segundos extra aleatorios (0..jitter)')
+    parser.add_argument('--errores', type=float, default=0.0, help='Fracción de respuestas 503')
+    parser.add_argument('--cupos', type=int, default=5, help='Cupos iniciales por franja')
+    parser.add_argument('--dias', type=int, default=7, help='Fechas por respuesta de horarios')
+    args = parser.parse_args()
+    print(f"Mock de Compensar en http://127.0.0.1:{args.puerto} (Ctrl+C para salir)")
+    try:
+        servir(args.puerto, {
+            'latencia': args.latencia, 'jitter': args.jitter, 'errores': args.errores,
+            'cupos': args.cupos, 'dias': args.dias
+        })
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
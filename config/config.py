@@ -1,4 +1,5 @@
 import os
+import uuid
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,7 +13,7 @@ class Config:
     # URLs del sistema Compensar
     BASE_URL = "https://planbienestar.deportescompensar.com"
     LOGIN_URL = "https://seguridad.compensar.com/views/index.html"
-    API_BASE_URL = "https://sistemaplanbienestar.deportescompensar.com"
+    API_BASE_URL = os.getenv('API_BASE_URL', "https://sistemaplanbienestar.deportescompensar.com")  # benchmarks.mock_upstream para pruebas locales
     
     # Endpoints API
     TIQUETERAS_ENDPOINT = "/sistema.php/entrenamiento/reserva/practica/libre"
@@ -21,6 +22,86 @@ class Config:
     
     # Configuración
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'  # True por defecto para debugging
+    DEBUG_BUFFER_SIZE = int(os.getenv('DEBUG_BUFFER_SIZE', '50'))  # Intercambios recientes en memoria por sesión
+    DEBUG_MAX_BODY = int(os.getenv('DEBUG_MAX_BODY', '20000'))  # Bytes de cuerpo guardados por intercambio
+    DEBUG_FLUSH_DIR = os.getenv('DEBUG_FLUSH_DIR', '')  # Vacío = no escribir a disco
+    DEBUG_FLUSH_MAX_FILES = int(os.getenv('DEBUG_FLUSH_MAX_FILES', '200'))  # Rotación del directorio
+    
+    # Logging
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')  # Nivel por defecto (raíz)
+    LOG_LEVELS = os.getenv('LOG_LEVELS', '')  # Por módulo, ej: "src.api=DEBUG,src.auth=WARNING"
+    LOG_FILE = os.getenv('LOG_FILE', '')  # Vacío = solo consola
+    LOG_FILE_MAX_BYTES = int(os.getenv('LOG_FILE_MAX_BYTES', str(5 * 1024 * 1024)))
+    LOG_FILE_BACKUPS = int(os.getenv('LOG_FILE_BACKUPS', '3'))
+    
+    # Sesiones de usuario
+    SECRET_KEY = os.getenv('SECRET_KEY')  # Obligatoria con varios workers; sin ella se genera una por proceso
+    SESSION_STORE = os.getenv('SESSION_STORE', 'memory')  # 'memory' o 'sqlite'
+    SESSION_DB_PATH = os.getenv('SESSION_DB_PATH', 'sessions.db')
+    SESSION_MAX_ENTRIES = int(os.getenv('SESSION_MAX_ENTRIES', '500'))  # Sesiones vivas por proceso
+    SESSION_IDLE_TTL = float(os.getenv('SESSION_IDLE_TTL', '7200'))  # Segundos de inactividad antes de expirar
+    SESSION_PURGE_INTERVAL = float(os.getenv('SESSION_PURGE_INTERVAL', '300'))  # Cada cuánto se borran las sesiones expiradas
+    WORKER_ID = os.getenv('WORKER_ID') or uuid.uuid4().hex[:6]  # Prefijo de los ids de trabajos y vigilancias de este proceso
+    
+    # Conflictos en el carrito (duplicados, solapamientos, traslados entre sedes)
+    CART_CONFLICT_POLICY = os.getenv('CART_CONFLICT_POLICY', 'rechazar')  # 'rechazar' o 'marcar'
+    CART_TRAVEL_BUFFER = float(os.getenv('CART_TRAVEL_BUFFER', '0'))  # Minutos mínimos entre reservas de sedes distintas
+    
+    # Cache
+    PARTICIPANTES_CACHE_TTL = float(os.getenv('PARTICIPANTES_CACHE_TTL', '600'))  # Segundos
+    TIQUETERAS_CACHE_TTL = float(os.getenv('TIQUETERAS_CACHE_TTL', '300'))  # Segundos
+    HORARIOS_CACHE_TTL = float(os.getenv('HORARIOS_CACHE_TTL', '30'))  # Frescura de la disponibilidad
+    SHARED_HORARIOS_CACHE_TTL = float(os.getenv('SHARED_HORARIOS_CACHE_TTL', '15'))  # Disponibilidad compartida entre usuarios por centro
+    SEARCH_INDEX_TTL = float(os.getenv('SEARCH_INDEX_TTL', '30'))  # Vigencia del índice de /api/buscar_horarios
+    HORARIOS_REGISTRY_SIZE = int(os.getenv('HORARIOS_REGISTRY_SIZE', '2000'))  # Slots recordados por usuario
+    
+    # Concurrencia
+    HORARIOS_MAX_WORKERS = int(os.getenv('HORARIOS_MAX_WORKERS', '7'))  # Consultas de horarios simultáneas
+    BOOKING_MAX_CONCURRENCY = int(os.getenv('BOOKING_MAX_CONCURRENCY', '4'))  # Reservas simultáneas
+    BOOKING_PREFLIGHT = os.getenv('BOOKING_PREFLIGHT', 'true').lower() == 'true'  # Descartar antes de enviar las reservas que van a fallar
+    BOOKING_ORDER = os.getenv('BOOKING_ORDER', 'contencion')  # 'contencion' (las franjas más disputadas primero) o 'carrito'
+    ASYNC_MAX_CONCURRENCY = int(os.getenv('ASYNC_MAX_CONCURRENCY', '50'))  # Lecturas simultáneas en AsyncCompensarAPI
+    
+    # Trabajos de reserva en segundo plano
+    JOBS_MAX_WORKERS = int(os.getenv('JOBS_MAX_WORKERS', '2'))  # Lotes ejecutándose a la vez por proceso
+    JOBS_QUEUE_SIZE = int(os.getenv('JOBS_QUEUE_SIZE', '100'))  # Lotes en espera antes de rechazar (503)
+    JOBS_RETENTION = float(os.getenv('JOBS_RETENTION', '3600'))  # Segundos que se conserva un lote terminado
+    
+    # Vigilancia de cupos (horarios llenos)
+    WATCH_INTERVAL_MIN = float(os.getenv('WATCH_INTERVAL_MIN', '15'))  # Segundos entre consultas cerca de la clase o con alta demanda
+    WATCH_INTERVAL_MAX = float(os.getenv('WATCH_INTERVAL_MAX', '300'))  # Segundos entre consultas cuando no hay cambios
+    WATCH_NEAR_START = float(os.getenv('WATCH_NEAR_START', '7200'))  # Desde cuántos segundos antes de la clase se acelera
+    WATCH_HIGH_UTILIZATION = float(os.getenv('WATCH_HIGH_UTILIZATION', '80'))  # totalUtilizado (%) considerado alta demanda
+    WATCH_USER_POLLS_PER_MIN = int(os.getenv('WATCH_USER_POLLS_PER_MIN', '6'))  # Consultas por minuto de cada usuario
+    WATCH_GLOBAL_POLLS_PER_MIN = int(os.getenv('WATCH_GLOBAL_POLLS_PER_MIN', '60'))  # Consultas por minuto del proceso
+    WATCH_MAX_PER_USER = int(os.getenv('WATCH_MAX_PER_USER', '10'))  # Vigilancias activas por usuario
+    WATCH_MAX_INTENTOS = int(os.getenv('WATCH_MAX_INTENTOS', '3'))  # Reservas automáticas fallidas antes de rendirse
+    WATCH_MAX_ERRORES = int(os.getenv('WATCH_MAX_ERRORES', '5'))  # Consultas fallidas seguidas antes de terminar el grupo
+    WATCH_RETENTION = float(os.getenv('WATCH_RETENTION', '3600'))  # Segundos que se conserva una vigilancia terminada
+    
+    # Transporte HTTP
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))  # Hosts distintos en el pool
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))  # Conexiones keep-alive por host
+    HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))  # Reintentos de lecturas idempotentes
+    HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', '0.3'))  # Segundos
+    HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', '3'))  # Segundos
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+    # Timeouts (connect, read) por endpoint
+    HTTP_TIMEOUTS = {
+        'default': (HTTP_CONNECT_TIMEOUT, float(os.getenv('HTTP_READ_TIMEOUT', '30'))),
+        'login': (HTTP_CONNECT_TIMEOUT, 30.0),
+        'participantes': (HTTP_CONNECT_TIMEOUT, 10.0),
+        'tiqueteras': (HTTP_CONNECT_TIMEOUT, 15.0),
+        'horarios': (HTTP_CONNECT_TIMEOUT, 15.0),
+        'reserva': (HTTP_CONNECT_TIMEOUT, float(os.getenv('HTTP_BOOKING_READ_TIMEOUT', '20'))),
+        'warmup': (HTTP_CONNECT_TIMEOUT, 5.0),
+    }
+    
+    # Ventana de reserva programada
+    BOOKING_WINDOW_PREPARE_SECONDS = float(os.getenv('BOOKING_WINDOW_PREPARE_SECONDS', '20'))  # Preparación antes de T-0
+    CLOCK_SYNC_SAMPLES = int(os.getenv('CLOCK_SYNC_SAMPLES', '8'))  # Muestras del header Date por sincronización
+    CLOCK_SYNC_TTL = float(os.getenv('CLOCK_SYNC_TTL', '300'))  # Segundos antes de resincronizar
+    CLOCK_SYNC_SAFETY_MS = float(os.getenv('CLOCK_SYNC_SAFETY_MS', '0'))  # Retraso extra para no llegar antes de T-0
     
     @classmethod
     def validate(cls):
@@ -0,0 +1,75 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import Dict, Optional
+from config.config import Config
+
+FORMATO = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_lock = threading.Lock()
+
+
+def parsear_niveles(texto: str) -> Dict[str, int]:
+    """
+    Convierte "src.api=DEBUG,src.auth=WARNING" en {nombre_logger: nivel}
+
+    Las entradas vacías o con niveles desconocidos se ignoran.
+    """
+    niveles = {}
+    for entrada in texto.split(','):
+        nombre, _, nivel = entrada.partition('=')
+        nivel = logging.getLevelName(nivel.strip().upper())
+        if nombre.strip() and isinstance(nivel, int):
+            niveles[nombre.strip()] = nivel
+    return niveles
+
+
+def configurar_logging(nivel: Optional[str] = None, niveles: Optional[str] = None,
+                       archivo: Optional[str] = None) -> logging.handlers.QueueListener:
+    """
+    Configura el logging de la aplicación una sola vez
+
+    Los módulos solo emiten a una cola (QueueHandler en el logger raíz); un
+    hilo del QueueListener formatea y escribe a consola y, si LOG_FILE está
+    configurado, a un archivo rotativo. Así el hot path nunca espera E/S.
+
+    Args:
+        nivel: Nivel raíz (por defecto Config.LOG_LEVEL)
+        niveles: Niveles por módulo (por defecto Config.LOG_LEVELS)
+        archivo: Archivo de log (por defecto Config.LOG_FILE)
+
+    Returns:
+        El QueueListener activo
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        formato = logging.Formatter(FORMATO)
+        destinos = [logging.StreamHandler()]
+        archivo = Config.LOG_FILE if archivo is None else archivo
+        if archivo:
+            destinos.append(logging.handlers.RotatingFileHandler(
+                archivo,
+                maxBytes=Config.LOG_FILE_MAX_BYTES,
+                backupCount=Config.LOG_FILE_BACKUPS,
+                encoding='utf-8'
+            ))
+        for destino in destinos:
+            destino.setFormatter(formato)
+
+        cola = queue.SimpleQueue()
+        raiz = logging.getLogger()
+        raiz.handlers[:] = [logging.handlers.QueueHandler(cola)]
+        raiz.setLevel(logging.getLevelName((nivel or Config.LOG_LEVEL).upper()))
+        for nombre, nivel_modulo in parsear_niveles(Config.LOG_LEVELS if niveles is None else niveles).items():
+            logging.getLogger(nombre).setLevel(nivel_modulo)
+
+        _listener = logging.handlers.QueueListener(cola, *destinos, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _listener
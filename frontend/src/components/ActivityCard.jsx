@@ -7,6 +7,10 @@ function ActivityCard({ tiquetera, cart, onAddToCart }) {
     const [horarios, setHorarios] = useState([])
     const [loadingHorarios, setLoadingHorarios] = useState(false)
     const [error, setError] = useState(null)
+    // Horarios ya consultados, por fecha (se llenan con una sola llamada por semana)
+    const [horariosPorFecha, setHorariosPorFecha] = useState({})
+    // Slots llenos que el servidor está vigilando
+    const [watched, setWatched] = useState({})
 
     const toggleExpand = () => {
         setExpanded(!expanded)
@@ -24,26 +28,43 @@ function ActivityCard({ tiquetera, cart, onAddToCart }) {
         }
     }, [expanded, selectedDate])
 
+    const weekFrom = (fecha) => {
+        const fechas = []
+        const start = new Date(`${fecha}T00:00:00`)
+        for (let i = 0; i < 7; i++) {
+            const d = new Date(start)
+            d.setDate(start.getDate() + i)
+            fechas.push(d.toISOString().split('T')[0])
+        }
+        return fechas
+    }
+
     const loadHorarios = async () => {
-        setLoadingHorarios(true)
         setError(null)
+        if (horariosPorFecha[selectedDate]) {
+            setHorarios(horariosPorFecha[selectedDate])
+            return
+        }
+        setLoadingHorarios(true)
         setHorarios([])
         try {
-            const response = await fetch('/api/horarios', {
+            const response = await fetch('/api/horarios_rango', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
                 },
                 body: JSON.stringify({
                     tiquetera_id: tiquetera.id,
-                    fecha: selectedDate
+                    fechas: weekFrom(selectedDate)
                 })
             })
             const data = await response.json()
 
             if (data.error) throw new Error(data.error)
 
-            setHorarios(data.horarios || [])
+            const porFecha = data.horarios || {}
+            setHorariosPorFecha(prev => ({ ...prev, ...porFecha }))
+            setHorarios(porFecha[selectedDate] || [])
         } catch (err) {
             console.error(err)
             setError('No hay horarios disponibles para esta fecha')
@@ -64,13 +85,34 @@ function ActivityCard({ tiquetera, cart, onAddToCart }) {
         })
     }
 
+    // Horario lleno: el servidor lo vigila y reserva apenas se abra un cupo
+    const watchSlot = async (horario) => {
+        if (!confirm(`${horario.hora_inicio} está lleno. ¿Reservar automáticamente si se abre un cupo?`)) return
+        try {
+            const response = await fetch('/api/vigilancias', {
+                method: 'POST',
+                credentials: 'include',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({
+                    tiquetera_id: tiquetera.id,
+                    fecha: selectedDate,
+                    hora_desde: horario.hora_inicio,
+                    reservar: true
+                })
+            })
+            const data = await response.json()
+            if (data.error) throw new Error(data.error)
+            setWatched(prev => ({ ...prev, [horario.slot]: true }))
+        } catch (err) {
+            alert(`⚠️ ${err.message}`)
+        }
+    }
+
     const isReserved = (horario) => {
         if (!cart) return false
-        return cart.some(item =>
-            item.tiquetera.id === tiquetera.id &&
-            item.fecha === selectedDate &&
-            item.horario.hora_inicio === horario.hora_inicio
-        )
+        return cart.some(item => item.horario.slot === horario.slot)
     }
 
     return (
@@ -117,16 +159,20 @@ function ActivityCard({ tiquetera, cart, onAddToCart }) {
                         <div className="horarios-grid">
                             {horarios.map((h, index) => {
                                 const reserved = isReserved(h)
+                                const full = h.cupos_disponibles === 0
+                                const watching = watched[h.slot]
                                 return (
                                     <button
-                                        key={index}
-                                        className={`time-slot ${reserved ? 'reserved' : ''}`}
-                                        onClick={() => !reserved && handleTimeSelect(h)}
-                                        disabled={reserved}
+                                        key={h.slot || index}
+                                        className={`time-slot ${reserved || watching ? 'reserved' : ''}`}
+                                        onClick={() => !reserved && !watching && (full ? watchSlot(h) : handleTimeSelect(h))}
+                                        disabled={reserved || watching}
                                     >
                                         <span className="time">{h.hora_inicio} - {h.hora_fin}</span>
                                         {h.nombre_clase && <span className="class-name">{h.nombre_clase}</span>}
-                                        <span className="cupos">{reserved ? 'Añadido' : `${h.cupos_disponibles} cupos`}</span>
+                                        <span className="cupos">
+                                            {reserved ? 'Añadido' : watching ? '🔔 Vigilando' : full ? 'Lleno · 🔔 Avisarme' : `${h.cupos_disponibles} cupos`}
+                                        </span>
                                     </button>
                                 )
                             })}
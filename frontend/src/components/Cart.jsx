@@ -1,6 +1,13 @@
 import './Cart.css'
 
-function Cart({ items, onRemove, onClear, onConfirm }) {
+const ESTADOS = {
+    exitosa: '✅ Reservada',
+    fallida: '❌ Falló',
+    omitida: '⏭️ Omitida',
+    incierta: '⏳ Sin confirmar'
+}
+
+function Cart({ items, onRemove, onClear, onConfirm, progress = {}, booking = false }) {
     return (
         <div className="cart">
             <div className="cart-header">
@@ -15,6 +22,7 @@ function Cart({ items, onRemove, onClear, onConfirm }) {
                             <button
                                 className="remove-btn"
                                 onClick={() => onRemove(index)}
+                                disabled={booking}
                             >
                                 ×
                             </button>
@@ -23,6 +31,13 @@ function Cart({ items, onRemove, onClear, onConfirm }) {
                                 <p>📍 {item.tiquetera.nombre_sede}</p>
                                 <p>📅 {item.fecha}</p>
                                 <p>🕐 {item.horario.hora_inicio} - {item.horario.hora_fin}</p>
+                                {progress[index] ? (
+                                    <p className={`cart-item-status ${progress[index].estado}`}>
+                                        {ESTADOS[progress[index].estado]}: {progress[index].mensaje} ({Math.round(progress[index].latencia_ms)} ms)
+                                    </p>
+                                ) : booking && (
+                                    <p className="cart-item-status">⏳ Enviando...</p>
+                                )}
                             </div>
                         </div>
                     ))
@@ -46,12 +61,14 @@ function Cart({ items, onRemove, onClear, onConfirm }) {
                         <button
                             className="btn btn-success btn-block"
                             onClick={onConfirm}
+                            disabled={booking}
                         >
-                            ✅ Confirmar Todas
+                            {booking ? '⏳ Reservando...' : '✅ Confirmar Todas'}
                         </button>
                         <button
                             className="btn btn-secondary btn-block"
                             onClick={onClear}
+                            disabled={booking}
                         >
                             🗑️ Limpiar Carrito
                         </button>
@@ -9,6 +9,9 @@ function Dashboard({ onLogout }) {
     const [loading, setLoading] = useState(true)
     const [selectedDeporte, setSelectedDeporte] = useState('all')
     const [selectedSede, setSelectedSede] = useState('all')
+    // Resultado de cada reserva del carrito mientras se confirma, por índice
+    const [progress, setProgress] = useState({})
+    const [booking, setBooking] = useState(false)
 
     useEffect(() => {
         loadTiqueteras()
@@ -41,28 +44,79 @@ function Dashboard({ onLogout }) {
     }
 
     const confirmCart = async () => {
-        if (cart.length === 0) return
+        if (cart.length === 0 || booking) return
 
         if (!confirm(`¿Confirmar ${cart.length} reservas?`)) return
 
+        setBooking(true)
+        setProgress({})
         try {
-            const response = await fetch('/api/confirmar_reservas', {
+            // El servidor emite un evento por reserva apenas termina (Server-Sent Events)
+            const response = await fetch('/api/confirmar_reservas/stream', {
                 method: 'POST',
                 credentials: 'include',
                 headers: {
                     'Content-Type': 'application/json'
                 },
-                body: JSON.stringify({ cart })
+                // Solo los slots: el servidor ya tiene los horarios completos
+                body: JSON.stringify({ slots: cart.map(item => item.horario.slot) })
             })
 
-            const data = await response.json()
-
-            if (data.success) {
-                alert(`✅ Completado!\n\nExitosas: ${data.exitosas}\nFallidas: ${data.fallidas}`)
-                clearCart()
+            if (!response.ok) {
+                const data = await response.json()
+                if (data.error) alert(`⚠️ ${data.error}`)
+                return
             }
+
+            let resumen = null
+            const resultados = []
+            await readEvents(response, (event, data) => {
+                if (event === 'reserva') {
+                    resultados.push(data)
+                    setProgress(prev => ({ ...prev, [data.indice]: data }))
+                } else if (event === 'resumen') {
+                    resumen = data
+                }
+            })
+
+            if (!resumen) throw new Error('Stream interrumpido')
+            const detalle = resultados
+                .filter(r => r.estado !== 'exitosa')
+                .map(r => `• ${r.fecha} ${r.hora_inicio} ${r.tiquetera}: ${r.mensaje || r.estado}`)
+                .join('\n')
+            alert(`✅ Completado!\n\nExitosas: ${resumen.exitosas}\nFallidas: ${resumen.fallidas}${detalle ? `\n\n${detalle}` : ''}`)
+            // Las que fallaron (o quedaron sin confirmar) siguen en el carrito para reintentarlas
+            const reservadas = new Set(resultados.filter(r => r.estado === 'exitosa').map(r => r.indice))
+            setCart(prev => prev.filter((_, i) => !reservadas.has(i)))
         } catch (error) {
             alert('Error al confirmar reservas')
+        } finally {
+            setBooking(false)
+            setProgress({})
+        }
+    }
+
+    // EventSource solo hace GET: el stream del POST se lee y se separa a mano
+    const readEvents = async (response, onEvent) => {
+        const reader = response.body.getReader()
+        const decoder = new TextDecoder()
+        let buffer = ''
+        while (true) {
+            const { done, value } = await reader.read()
+            if (done) break
+            buffer += decoder.decode(value, { stream: true })
+            let end
+            while ((end = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, end)
+                buffer = buffer.slice(end + 2)
+                let event = 'message'
+                let data = ''
+                for (const line of block.split('\n')) {
+                    if (line.startsWith('event:')) event = line.slice(6).trim()
+                    else if (line.startsWith('data:')) data += line.slice(5).trim()
+                }
+                if (data) onEvent(event, JSON.parse(data))
+            }
         }
     }
 
@@ -158,6 +212,8 @@ function Dashboard({ onLogout }) {
                     onRemove={removeFromCart}
                     onClear={clearCart}
                     onConfirm={confirmCart}
+                    progress={progress}
+                    booking={booking}
                 />
             </div>
         </div>
@@ -6,8 +6,10 @@ Sistema automatizado para agendar múltiples clases/gimnasio/piscina en Compensa
 
 import sys
 from config.config import Config
+from config.logging_config import configurar_logging
 from src.auth.compensar_auth import CompensarAuth
 from src.api.compensar_api import CompensarAPI
+from src.api.slot_search import BuscadorHorarios
 from src.scheduler.booking_scheduler import BookingScheduler
 
 def print_banner():
@@ -25,6 +27,7 @@ def print_banner():
 
 def main():
     """Función principal de la aplicación"""
+    configurar_logging()
     print_banner()
     
     try:
@@ -43,7 +46,9 @@ def main():
         
         # Paso 2: Inicializar API y Scheduler
         api = CompensarAPI(auth.get_session())
+        api.calentar_conexiones(Config.BOOKING_MAX_CONCURRENCY)
         scheduler = BookingScheduler(api)
+        buscador = BuscadorHorarios(api)
         
         # Paso 3: Obtener tiqueteras disponibles
         tiqueteras = api.get_tiqueteras()
@@ -61,7 +66,9 @@ def main():
             print("2. 👀 Ver reservas pendientes")
             print("3. ✅ Confirmar y ejecutar reservas")
             print("4. 🗑️  Limpiar reservas pendientes")
-            print("5. 🚪 Salir")
+            print("5. ⏱️  Programar reservas para una hora exacta")
+            print("6. 🔎 Buscar horarios en todas las tiqueteras")
+            print("7. 🚪 Salir")
             print("="*80)
             
             opcion = input("\nSelecciona una opción: ").strip()
@@ -78,9 +85,10 @@ def main():
                 # Seleccionar fechas
                 fechas = scheduler.seleccionar_fechas(dias_adelante=7)
                 
-                # Para cada fecha, obtener horarios y seleccionar
+                # Obtener horarios de todas las fechas en paralelo y seleccionar por fecha
+                horarios_por_fecha = api.get_horarios_range(tiquetera, fechas)
                 for fecha in fechas:
-                    horarios = api.get_horarios(tiquetera, fecha)
+                    horarios = horarios_por_fecha.get(fecha, [])
                     horarios_seleccionados = scheduler.seleccionar_horarios(horarios, tiquetera, fecha)
                     
                     for horario in horarios_seleccionados:
@@ -106,6 +114,17 @@ def main():
                 scheduler.limpiar_reservas()
             
             elif opcion == '5':
+                # Enviar las pendientes justo cuando abra la ventana
+                if scheduler.programar_y_ejecutar():
+                    print("\n✅ Ventana ejecutada")
+            
+            elif opcion == '6':
+                # Buscar por deporte, sede, cupos y horas sin recorrer tiquetera por tiquetera
+                for resultado in scheduler.buscar_horarios(buscador, tiqueteras):
+                    scheduler.agregar_reserva(resultado.tiquetera, resultado.horario)
+                print(f"\n✅ Total de reservas pendientes: {len(scheduler.reservas_pendientes)}")
+            
+            elif opcion == '7':
                 # Salir
                 print("\n👋 ¡Hasta luego!")
                 break
@@ -0,0 +1,307 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+import requests
+from config.config import Config
+from src.models.booking import Tiquetera, Horario, Reserva, ResultadoReserva
+from src.api.cache import TTLCache
+from src.api.compensar_api import (
+    HEADERS_AJAX, HEADERS_JSON, parsear_horarios, parsear_tiqueteras,
+    payload_horarios, payload_reserva, evaluar_respuesta_reserva
+)
+from src.api.debug_buffer import BufferIntercambios
+from src.api.transport import ESTADOS_INCIERTOS, ESTADOS_REINTENTABLES, TransporteHTTP
+from src.scheduler.booking_executor import BookingExecutor, SIN_ENTRADAS, omitir
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCompensarAPI:
+    """
+    Variante asyncio de CompensarAPI sobre httpx.AsyncClient.
+
+    Misma superficie y mismos modelos que el cliente con hilos, pero todas
+    las consultas comparten un solo pool de conexiones y un event loop; los
+    semáforos limitan cuántas lecturas y reservas van al servidor a la vez.
+
+    Uso:
+        async with AsyncCompensarAPI.desde_sesion(auth.session) as api:
+            horarios = await api.get_horarios_range(tiquetera, fechas)
+    """
+
+    def __init__(self, cookies=None, headers: Optional[Dict[str, str]] = None,
+                 client: Optional[httpx.AsyncClient] = None,
+                 max_lecturas: Optional[int] = None, max_reservas: Optional[int] = None):
+        self.client = client or httpx.AsyncClient(
+            cookies=cookies,
+            headers=headers,
+            limits=httpx.Limits(
+                max_connections=Config.HTTP_POOL_MAXSIZE,
+                max_keepalive_connections=Config.HTTP_POOL_MAXSIZE
+            ),
+            follow_redirects=True
+        )
+        self.intercambios = BufferIntercambios()
+        self.max_lecturas = max_lecturas or Config.ASYNC_MAX_CONCURRENCY
+        self.max_reservas = max(1, max_reservas or Config.BOOKING_MAX_CONCURRENCY)
+        self._lecturas = asyncio.Semaphore(self.max_lecturas)
+        self._reservas = asyncio.Semaphore(self.max_reservas)
+        self._participantes_cache = TTLCache(Config.PARTICIPANTES_CACHE_TTL)
+        self._participantes_lock = asyncio.Lock()
+        self._horarios_cache = TTLCache(Config.HORARIOS_CACHE_TTL)
+
+    @classmethod
+    def desde_sesion(cls, session: requests.Session, **kwargs) -> 'AsyncCompensarAPI':
+        """Crea el cliente con las cookies y headers de una sesión ya autenticada"""
+        cookies = httpx.Cookies()
+        for c in session.cookies:
+            cookies.set(c.name, c.value, domain=c.domain, path=c.path)
+        return cls(cookies=cookies, headers=dict(session.headers), **kwargs)
+
+    async def __aenter__(self) -> 'AsyncCompensarAPI':
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def _request(self, metodo: str, endpoint: str, url: str, reintentar: bool = False,
+                       **kwargs) -> httpx.Response:
+        """Petición con timeout por endpoint y reintentos solo para lecturas idempotentes"""
+        conectar, leer = TransporteHTTP.timeout(endpoint)
+        kwargs.setdefault('timeout', httpx.Timeout(leer, connect=conectar))
+        intentos = 1 + (Config.HTTP_RETRIES if reintentar else 0)
+
+        for intento in range(intentos):
+            ultimo = intento == intentos - 1
+            inicio = time.perf_counter()
+            try:
+                response = await self.client.request(metodo.upper(), url, **kwargs)
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                self._registrar(metodo, endpoint, url, kwargs, inicio, error=str(e))
+                if ultimo:
+                    raise
+            else:
+                self._registrar(metodo, endpoint, url, kwargs, inicio, response=response)
+                if ultimo or response.status_code not in ESTADOS_REINTENTABLES:
+                    return response
+            await asyncio.sleep(TransporteHTTP._backoff(intento))
+
+    def _registrar(self, metodo: str, endpoint: str, url: str, kwargs: Dict[str, Any],
+                   inicio: float, response: Optional[httpx.Response] = None, error: Optional[str] = None):
+        self.intercambios.registrar(
+            metodo=metodo,
+            endpoint=endpoint,
+            url=url,
+            status=getattr(response, 'status_code', None),
+            latencia_ms=(time.perf_counter() - inicio) * 1000,
+            request_body=kwargs.get('json', kwargs.get('content')),
+            response_body=getattr(response, 'content', None),
+            error=error
+        )
+
+    async def obtener_participantes(self) -> Tuple[Dict[str, Any], ...]:
+        """Grupo familiar del usuario, consultado una sola vez por TTL"""
+        participantes = self._participantes_cache.get('participantes')
+        if participantes is not None:
+            return participantes
+
+        async with self._participantes_lock:
+            participantes = self._participantes_cache.get('participantes', contar=False)
+            if participantes is not None:
+                return participantes
+            async with self._lecturas:
+                response = await self._request(
+                    'get', 'participantes',
+                    f"{Config.API_BASE_URL}/sistema.php/grupofamiliar/lista/json",
+                    reintentar=True,
+                    params={'autenticador': 'compensar'},
+                    headers=HEADERS_AJAX
+                )
+            participantes = ()
+            if response.status_code == 200:
+                try:
+                    participantes = tuple(response.json().get('personas') or ())
+                except ValueError:
+                    logger.warning("No se pudo extraer el grupo familiar")
+            if participantes:
+                self._participantes_cache.set('participantes', participantes)
+            return participantes
+
+    def invalidar_horarios(self, tiquetera: Optional[Tiquetera] = None, fecha: Optional[str] = None):
+        """Descarta disponibilidad cacheada (toda, o de una tiquetera y fecha)"""
+        if tiquetera is None or fecha is None:
+            self._horarios_cache.invalidate()
+        else:
+            self._horarios_cache.invalidate((self._clave_tiquetera(tiquetera), fecha))
+
+    def horarios_cacheados(self, tiquetera: Tiquetera, fecha: str) -> Optional[List[Horario]]:
+        """Horarios de la fecha si siguen frescos en cache, sin consultar (como en CompensarAPI)"""
+        cacheados = self._horarios_cache.get((self._clave_tiquetera(tiquetera), fecha), contar=False)
+        return None if cacheados is None else list(cacheados)
+
+    @staticmethod
+    def _clave_tiquetera(tiquetera: Tiquetera) -> int:
+        return tiquetera.id_tiquetera if tiquetera.id_tiquetera else tiquetera.id
+
+    async def get_tiqueteras(self) -> List[Tiquetera]:
+        """Obtiene todas las tiqueteras (membresías) disponibles del usuario"""
+        try:
+            participantes = await self.obtener_participantes()
+            id_participacion = participantes[0].get('id_participacion') if participantes else None
+            if not id_participacion:
+                raise Exception("No se pudo obtener el ID de participante")
+
+            async with self._lecturas:
+                response = await self._request(
+                    'post', 'tiqueteras',
+                    f"{Config.API_BASE_URL}/sistema.php/entrenamiento/reserva/tiqueteras",
+                    reintentar=True,
+                    json={"idParticipante": id_participacion, "historico": False},
+                    params={'autenticador': 'compensar'},
+                    headers=HEADERS_JSON
+                )
+            if response.status_code != 200:
+                raise Exception(f"Error al obtener tiqueteras: {response.status_code}")
+
+            tiqueteras = parsear_tiqueteras(response.json())
+            logger.info("Se encontraron %d tiqueteras", len(tiqueteras))
+            return tiqueteras
+
+        except Exception as e:
+            logger.error("Error obteniendo tiqueteras: %s", e, exc_info=Config.DEBUG)
+            return []
+
+    async def get_horarios(self, tiquetera: Tiquetera, fecha: str) -> List[Horario]:
+        """
+        Obtiene los horarios de una tiquetera en una fecha
+
+        Como en CompensarAPI, todas las fechas de la respuesta quedan en cache.
+        """
+        clave_tiquetera = self._clave_tiquetera(tiquetera)
+        cacheados = self._horarios_cache.get((clave_tiquetera, fecha))
+        if cacheados is not None:
+            return list(cacheados)
+
+        try:
+            participantes = await self.obtener_participantes()
+            async with self._lecturas:
+                response = await self._request(
+                    'post', 'horarios',
+                    f"{Config.API_BASE_URL}{Config.SCHEDULE_ENDPOINT}",
+                    reintentar=True,
+                    json=payload_horarios(tiquetera, fecha, participantes),
+                    params={'autenticador': 'compensar'},
+                    headers=HEADERS_JSON
+                )
+            if response.status_code != 200:
+                raise Exception(f"Error al obtener horarios: {response.status_code}")
+
+            horarios_por_fecha = parsear_horarios(response.json())
+            horarios_por_fecha.setdefault(fecha, [])
+            for fecha_respuesta, horarios_respuesta in horarios_por_fecha.items():
+                self._horarios_cache.set((clave_tiquetera, fecha_respuesta), horarios_respuesta)
+            return list(horarios_por_fecha[fecha])
+
+        except Exception as e:
+            logger.error("Error obteniendo horarios: %s", e, exc_info=Config.DEBUG)
+            return []
+
+    async def get_horarios_range(self, tiquetera: Tiquetera, fechas: List[str]) -> Dict[str, List[Horario]]:
+        """Horarios de varias fechas consultadas a la vez; {fecha: [Horario]} en orden"""
+        fechas = list(dict.fromkeys(fechas))
+        if not fechas:
+            return {}
+        await self.obtener_participantes()
+        resultados = await asyncio.gather(*(self.get_horarios(tiquetera, f) for f in fechas))
+        return dict(zip(fechas, resultados))
+
+    async def construir_payload_reserva(self, reserva: Reserva) -> Dict[str, Any]:
+        """Payload de guardar reserva con los participantes de la sesión"""
+        participantes = await self.obtener_participantes()
+        if not participantes:
+            logger.warning("No se pudieron obtener los participantes de la sesión")
+        return payload_reserva(reserva, participantes)
+
+    async def realizar_reserva(self, reserva: Reserva) -> bool:
+        """Realiza una reserva; True si fue exitosa"""
+        return (await self.realizar_reserva_detallada(reserva)).exitosa
+
+    async def realizar_reserva_detallada(self, reserva: Reserva) -> ResultadoReserva:
+        """Realiza una reserva y retorna el detalle del resultado"""
+        inicio = time.perf_counter()
+
+        def resultado(exitosa: bool, mensaje: str, incierta: bool = False) -> ResultadoReserva:
+            return ResultadoReserva(reserva, exitosa, mensaje, (time.perf_counter() - inicio) * 1000,
+                                    incierta=incierta)
+
+        if not reserva.horario.raw_data:
+            return resultado(False, 'No hay datos crudos del horario')
+
+        try:
+            cuerpo = json.dumps(await self.construir_payload_reserva(reserva)).encode('utf-8')
+            async with self._reservas:
+                # Guardar no es idempotente: sin reintentos automáticos
+                response = await self._request(
+                    'post', 'reserva',
+                    f"{Config.API_BASE_URL}{Config.BOOKING_ENDPOINT}",
+                    content=cuerpo,
+                    params={'autenticador': 'compensar'},
+                    headers=HEADERS_JSON
+                )
+            if response.status_code != 200:
+                logger.error("Error HTTP %s al realizar reserva (%s)", response.status_code, response.url)
+                return resultado(False, f'Error HTTP {response.status_code}',
+                                 incierta=response.status_code in ESTADOS_INCIERTOS)
+
+            exitosa, mensaje = evaluar_respuesta_reserva(response.json())
+            if exitosa:
+                logger.info("Reserva exitosa: %s", reserva)
+                self.invalidar_horarios(reserva.tiquetera, reserva.horario.fecha)
+            else:
+                logger.error("Error en reserva: %s", mensaje)
+            return resultado(exitosa, mensaje)
+
+        except (httpx.ReadTimeout, httpx.RemoteProtocolError) as e:
+            # La petición salió: el servidor pudo guardar la reserva aunque no respondiera
+            logger.error("Sin respuesta al enviar reserva %s: %s", reserva, e)
+            return resultado(False, f'Sin respuesta del servidor, verifica la reserva: {e}', incierta=True)
+        except Exception as e:
+            logger.error("Error crítico enviando reserva: %s", e)
+            return resultado(False, str(e))
+
+    async def realizar_reservas_multiples(self, reservas: List[Reserva]) -> Dict[str, Any]:
+        """
+        Realiza un lote de reservas a la vez (limitadas por max_reservas)
+
+        La validación previa y las entradas de cada tiquetera se manejan igual
+        que en BookingExecutor: las suplentes van después de las principales.
+
+        Returns:
+            Resumen de BookingExecutor.resumir con 'resultados' en el orden recibido
+        """
+        plan = BookingExecutor(self).preparar(reservas)
+        resultados: List[Optional[ResultadoReserva]] = [None] * len(reservas)
+        for indice, resultado in plan.omitidas.items():
+            resultados[indice] = resultado
+
+        async def una(indice: int, entrada_tomada: bool):
+            reserva = reservas[indice]
+            if not entrada_tomada and not plan.entradas.tomar(reserva.tiquetera):
+                resultados[indice] = omitir(reserva, SIN_ENTRADAS)
+                return
+            resultado = await self.realizar_reserva_detallada(reserva)
+            if not resultado.exitosa:
+                plan.entradas.devolver(reserva.tiquetera)
+            resultados[indice] = resultado
+
+        await asyncio.gather(*(una(i, True) for i in plan.principales))
+        await asyncio.gather(*(una(i, False) for i in plan.suplentes))
+        resumen = BookingExecutor.resumir(resultados)
+        resumen['resultados'] = resultados
+        return resumen
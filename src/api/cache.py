@@ -0,0 +1,59 @@
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Cache en memoria con expiración por tiempo (TTL), seguro entre hilos"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._datos: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, clave: Hashable, contar: bool = True) -> Optional[Any]:
+        """
+        Obtiene un valor si existe y no ha expirado
+
+        Args:
+            clave: Clave del valor
+            contar: Registrar el acceso en hits/misses (False para re-verificaciones)
+
+        Returns:
+            El valor cacheado o None si no existe o expiró
+        """
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and time.monotonic() - entrada[0] < self.ttl:
+                self.hits += contar
+                return entrada[1]
+            if entrada is not None:
+                del self._datos[clave]
+            self.misses += contar
+            return None
+
+    def set(self, clave: Hashable, valor: Any):
+        """Guarda un valor con la marca de tiempo actual"""
+        with self._lock:
+            self._datos[clave] = (time.monotonic(), valor)
+
+    def invalidate(self, clave: Optional[Hashable] = None):
+        """Elimina una clave, o todo el cache si no se indica ninguna"""
+        with self._lock:
+            if clave is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(clave, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna los contadores de aciertos y fallos del cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total) if total else 0.0,
+                'entradas': len(self._datos)
+            }
@@ -2,25 +2,322 @@ import requests
 import json
 import time
 import logging
-from typing import List, Dict, Optional, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import List, Dict, Optional, Any, Callable, Mapping, Tuple
 from datetime import datetime, timedelta
 from config.config import Config
-from src.models.booking import Tiquetera, Horario, Reserva
+from src.models.booking import Tiquetera, Horario, Reserva, ResultadoReserva
+from src.api.cache import TTLCache
+from src.api.shared_availability import DisponibilidadCompartida
+from src.api.transport import ESTADOS_INCIERTOS, configurar_transporte
+from src.scheduler.booking_executor import BookingExecutor
+
+logger = logging.getLogger(__name__)
+
+# Headers de una petición AJAX de Angular. Se envían por petición (nunca en
+# session.headers) para que hilos concurrentes no modifiquen la sesión compartida.
+HEADERS_AJAX: Mapping[str, str] = MappingProxyType({
+    'Referer': f"{Config.API_BASE_URL}/sistema.php/entrenamiento/reserva/practica/libre",
+    'Origin': Config.API_BASE_URL,
+    'X-Requested-With': 'XMLHttpRequest',
+    'Accept': 'application/json, text/plain, */*'
+})
+HEADERS_JSON: Mapping[str, str] = MappingProxyType({**HEADERS_AJAX, 'Content-Type': 'application/json'})
+
+
+def parsear_horarios(data: Any) -> Dict[str, List[Horario]]:
+    """
+    Parsea la respuesta del endpoint de horarios para todas las fechas presentes
+    
+    Estructura: { "YYYY-MM-DD": { "HH:MM - HH:MM": { "ID": { ... } } } }
+    
+    Args:
+        data: JSON decodificado de la respuesta
+        
+    Returns:
+        Diccionario {fecha: [Horario]}
+    """
+    return _parsear_horarios(data, Horario)
+
+
+def _parsear_horarios(data: Any, crear: Callable[..., Any]) -> Dict[str, List[Any]]:
+    """crear(fecha, hora_inicio, hora_fin, cupos, id_turno, nombre_clase, raw_data) construye cada horario"""
+    resultado = {}
+    if not isinstance(data, dict):
+        return resultado
+    
+    for fecha, horarios_fecha in data.items():
+        if not isinstance(horarios_fecha, dict):
+            continue
+        horarios = []
+        for rango_horario, detalles in horarios_fecha.items():
+            try:
+                # rango_horario es tipo "06:00 - 07:00"
+                partes = rango_horario.split(' - ')
+                if len(partes) != 2:
+                    continue
+                    
+                hora_inicio = partes[0].strip()
+                hora_fin = partes[1].strip()
+                
+                # Iterar sobre los detalles (pueden haber múltiples zonas/IDs)
+                for id_zona, info in detalles.items():
+                    if not isinstance(info, dict):
+                        continue
+                        
+                    cupos = info.get('conteo', 0)
+                    total_turnos = info.get('totalTurnos', 0)
+                    
+                    # ID del turno para reservar
+                    # Preferimos 'ids' (numérico) o 'turnos' (string)
+                    id_turno = None
+                    if info.get('ids') and len(info['ids']) > 0:
+                        id_turno = info['ids'][0]
+                    elif info.get('turnos') and len(info['turnos']) > 0:
+                        id_turno = info['turnos'][0]
+                        
+                    # Intentar obtener el nombre de la clase
+                    nombre_clase = ""
+                    caracteristicas = info.get('caracteristicas', {})
+                    # El ID de la característica suele coincidir con el id_zona (la clave del dict superior)
+                    if id_zona in caracteristicas:
+                        nombre_clase = caracteristicas[id_zona].get('nombre', '')
+                    else:
+                        # Si no coincide, tomamos el primero que encontremos
+                        for k, v in caracteristicas.items():
+                            if isinstance(v, dict) and 'nombre' in v:
+                                nombre_clase = v['nombre']
+                                break
+                        
+                    horario = crear(fecha, hora_inicio, hora_fin, cupos, id_turno, nombre_clase, info)
+                    
+                    # Solo agregar si hay cupos o si queremos mostrar todo
+                    horarios.append(horario)
+                    
+            except Exception as e:
+                logger.warning("Error parseando horario %s: %s", rango_horario, e)
+                continue
+        
+        resultado[fecha] = horarios
+    
+    return resultado
+
+
+def parsear_tiqueteras(data: Any) -> List[Tiquetera]:
+    """
+    Convierte la respuesta del endpoint de tiqueteras en objetos Tiquetera
+    
+    Args:
+        data: JSON decodificado de la respuesta
+        
+    Returns:
+        Lista de objetos Tiquetera
+    """
+    # Verificar estructura de respuesta (puede estar anidada)
+    items = data.get('tiqueteras', []) if isinstance(data, dict) else []
+    
+    tiqueteras = []
+    for t in items:
+        tiqueteras.append(Tiquetera(
+            id=t.get('id'),
+            nombre_centro_entrenamiento=t.get('nombre_centro_entrenamiento', 'Desconocido'),
+            nombre_sede=t.get('nombre_sede', 'Desconocida'),
+            nombre_deporte=t.get('nombre_deporte', 'Desconocido'),
+            id_centro_entrenamiento=t.get('id_centro_entrenamiento'),
+            id_participacion_deportista=t.get('id_participacion_deportista'),
+            entradas=t.get('entradas'),  # None = la API no envió el dato
+            ilimitado=t.get('ilimitado', False),
+            id_tiquetera=t.get('id_tiquetera', t.get('id', 0)),
+            id_escenario=t.get('id_escenario', t.get('id_centro_entrenamiento', 0)),
+            id_centro=t.get('id_centro', t.get('id_centro_entrenamiento', 0))
+        ))
+    return tiqueteras
+
+
+def payload_horarios(tiquetera: Tiquetera, fecha: str, participantes) -> Dict[str, Any]:
+    """Payload del endpoint de horarios para una tiquetera y fecha"""
+    return {
+        "idTiquetera": tiquetera.id_tiquetera if tiquetera.id_tiquetera else tiquetera.id,
+        "idEscenario": tiquetera.id_escenario if tiquetera.id_escenario else tiquetera.id_centro_entrenamiento,
+        "participantes": list(participantes),
+        "inicioInmediato": False,
+        "turnosSeguidos": 1,
+        "idCentro": tiquetera.id_centro if tiquetera.id_centro else tiquetera.id_centro_entrenamiento,
+        "fecha": fecha  # Agregamos la fecha
+    }
+
+
+def payload_reserva(reserva: Reserva, participantes) -> Dict[str, Any]:
+    """
+    Payload que espera el endpoint de guardar reserva
+    
+    Args:
+        reserva: Objeto Reserva con raw_data del horario
+        participantes: Participantes de la sesión (no se modifican)
+    """
+    # Obtener datos del centro/escenario desde el raw_data del horario
+    centro_info = reserva.horario.raw_data.get('centroEntrenamiento', {})
+    id_centro = centro_info.get('id', reserva.tiquetera.id_centro)
+    id_escenario = centro_info.get('idEscenario', reserva.tiquetera.id_escenario)
+    
+    return {
+        "idTiquetera": reserva.tiquetera.id_tiquetera if reserva.tiquetera.id_tiquetera else reserva.tiquetera.id,
+        "arregloTurnos": {"1": 1},
+        "horario": reserva.horario.raw_data,
+        "idEscenario": id_escenario,
+        "idCentro": id_centro,
+        # Copias con los campos requeridos: los dicts cacheados se comparten entre hilos
+        "participantes": [{**p, 'usos': 1, 'turno': 1} for p in participantes],
+        "turnosSeguidos": 1
+    }
+
+
+def evaluar_respuesta_reserva(result: Any) -> Tuple[bool, str]:
+    """Interpreta el JSON de guardar reserva como (exitosa, mensaje)"""
+    if not isinstance(result, dict):
+        return False, 'Respuesta inesperada del servidor'
+    if result.get('success') or result.get('estado') == 'exitoso':
+        return True, result.get('mensaje', 'Reserva exitosa')
+    return False, result.get('mensaje', 'Error desconocido')
 
-# Configure logging
-logging.basicConfig(
-    filename='server_debug.log',
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filemode='a'
-)
 
 class CompensarAPI:
-    """Maneja las interacciones con la API de Compensar"""
+    """
+    Maneja las interacciones con la API de Compensar
+
+    Es seguro usar una instancia desde varios hilos: no modifica
+    session.headers y los participantes cacheados son de solo lectura.
+    
+    Con `disponibilidad` los horarios se leen del cache compartido entre
+    usuarios en lugar del cache propio de la instancia.
+    """
     
-    def __init__(self, session: requests.Session):
+    def __init__(self, session: requests.Session, disponibilidad: Optional[DisponibilidadCompartida] = None):
         self.session = session
-        self.participantes_data = []
+        self.disponibilidad = disponibilidad
+        self.transporte = configurar_transporte(session)
+        self.participantes_data: Tuple[Dict[str, Any], ...] = ()
+        self._participantes_cache = TTLCache(Config.PARTICIPANTES_CACHE_TTL)
+        self._participantes_lock = threading.Lock()
+        # Disponibilidad por (tiquetera, fecha), llenada con todas las fechas de cada respuesta
+        self._horarios_cache = TTLCache(Config.HORARIOS_CACHE_TTL)
+        self._stats_lock = threading.Lock()
+        self._consultas_horarios = 0
+        self._fechas_cosechadas = 0
+        # Sube con cada invalidación; quien guarda horarios derivados (BuscadorHorarios) la compara
+        self.invalidaciones_horarios = 0
+
+    def obtener_participantes(self) -> Tuple[Dict[str, Any], ...]:
+        """
+        Obtiene el grupo familiar (participantes) del usuario, usando cache por sesión
+        
+        La tupla retornada se comparte entre hilos: no modificar sus dicts,
+        copiarlos (ver construir_payload_reserva).
+        
+        Returns:
+            Personas tal como las retorna grupofamiliar/lista/json
+        """
+        clave = id(self.session)
+        participantes = self._participantes_cache.get(clave)
+        if participantes is not None:
+            return participantes
+        
+        # Un solo hilo consulta; los demás esperan y usan su resultado
+        with self._participantes_lock:
+            participantes = self._participantes_cache.get(clave, contar=False)
+            if participantes is not None:
+                return participantes
+            return self._consultar_participantes(clave)
+
+    def _consultar_participantes(self, clave: int) -> Tuple[Dict[str, Any], ...]:
+        deportistas_url = f"{Config.API_BASE_URL}/sistema.php/grupofamiliar/lista/json"
+        logger.debug("Consultando participantes: %s", deportistas_url)
+        resp_dep = self.transporte.get(
+            'participantes',
+            deportistas_url,
+            reintentar=True,
+            params={'autenticador': 'compensar'},
+            headers=HEADERS_AJAX
+        )
+        
+        participantes = ()
+        if resp_dep.status_code == 200:
+            try:
+                data_dep = resp_dep.json()
+                if data_dep.get('personas') and len(data_dep['personas']) > 0:
+                    participantes = tuple(data_dep['personas'])
+            except:
+                logger.warning("No se pudo extraer el grupo familiar")
+        
+        # Solo cachear respuestas válidas para reintentar si la sesión aún no está lista
+        if participantes:
+            self._participantes_cache.set(clave, participantes)
+            self.participantes_data = participantes
+        return participantes
+
+    def invalidar_participantes(self):
+        """Descarta los participantes cacheados de la sesión actual"""
+        self._participantes_cache.invalidate(id(self.session))
+        self.participantes_data = ()
+
+    def participantes_stats(self) -> Dict[str, Any]:
+        """Retorna los contadores de hits/misses del cache de participantes"""
+        return self._participantes_cache.stats()
+
+    @staticmethod
+    def _clave_tiquetera(tiquetera: Tiquetera) -> int:
+        return tiquetera.id_tiquetera if tiquetera.id_tiquetera else tiquetera.id
+
+    def invalidar_horarios(self, tiquetera: Optional[Tiquetera] = None, fecha: Optional[str] = None):
+        """
+        Descarta disponibilidad cacheada
+        
+        Args:
+            tiquetera: Tiquetera a invalidar (todas si es None)
+            fecha: Fecha a invalidar; requiere tiquetera
+        """
+        with self._stats_lock:
+            self.invalidaciones_horarios += 1
+        if tiquetera is None or fecha is None:
+            self._horarios_cache.invalidate()
+        else:
+            self._horarios_cache.invalidate((self._clave_tiquetera(tiquetera), fecha))
+            if self.disponibilidad is not None:
+                self.disponibilidad.invalidar(tiquetera, fecha)
+
+    def horarios_cacheados(self, tiquetera: Tiquetera, fecha: str) -> Optional[List[Horario]]:
+        """
+        Horarios de la fecha si la disponibilidad cacheada sigue fresca, sin ir al servidor
+        
+        No cuenta como acierto ni fallo del cache. Con cache compartido los
+        horarios pueden traer el idTiquetera de otro usuario: sirven para
+        leer cupos, no para reservar.
+        
+        Returns:
+            Lista de Horario, o None si no hay datos frescos
+        """
+        if self.disponibilidad is not None:
+            return self.disponibilidad.cacheados(tiquetera, fecha)
+        cacheados = self._horarios_cache.get((self._clave_tiquetera(tiquetera), fecha), contar=False)
+        return None if cacheados is None else list(cacheados)
+
+    def horarios_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estadísticas del cache de disponibilidad
+        
+        'llamadas_ahorradas' cuenta las consultas de horarios servidas desde
+        cache en lugar de ir al servidor.
+        """
+        stats = self._horarios_cache.stats()
+        with self._stats_lock:
+            stats['consultas_upstream'] = self._consultas_horarios
+            stats['fechas_cosechadas'] = self._fechas_cosechadas
+        stats['llamadas_ahorradas'] = stats['hits']
+        if self.disponibilidad is not None:
+            stats['compartido'] = self.disponibilidad.stats()
+        return stats
 
     def get_tiqueteras(self) -> List[Tiquetera]:
         """
@@ -30,43 +327,19 @@ class CompensarAPI:
             Lista de objetos Tiquetera
         """
         try:
-            print("📋 Obteniendo tiqueteras disponibles...")
-            
-            # NO usar cache - siempre obtener datos frescos de la API
-            print("   📡 No hay cache, consultando API...")
+            # NO usar cache - siempre obtener datos frescos de la API (el cache vive en TiqueterasCache)
+            logger.debug("Obteniendo tiqueteras disponibles")
             
             # Endpoint correcto descubierto en el JS de la página
             # url_tiqueteras: '/sistema.php/entrenamiento/reserva/tiqueteras'
             api_url = f"{Config.API_BASE_URL}/sistema.php/entrenamiento/reserva/tiqueteras"
             
-            # Sincronizar headers para parecer una petición AJAX de Angular
-            self.session.headers.update({
-                'Referer': f"{Config.API_BASE_URL}/sistema.php/entrenamiento/reserva/practica/libre",
-                'Origin': Config.API_BASE_URL,
-                'X-Requested-With': 'XMLHttpRequest',
-                'Accept': 'application/json, text/plain, */*',
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            })
-            
             # 1. Obtener ID de deportista primero (ya que este endpoint sí funciona)
-            deportistas_url = f"{Config.API_BASE_URL}/sistema.php/grupofamiliar/lista/json"
-            print(f"   📡 Consultando ID deportista: {deportistas_url}")
-            
-            resp_dep = self.session.get(
-                deportistas_url, 
-                params={'autenticador': 'compensar'},
-                headers={'X-Requested-With': 'XMLHttpRequest'}
-            )
-            
             id_participacion = None
-            if resp_dep.status_code == 200:
-                try:
-                    data_dep = resp_dep.json()
-                    if data_dep.get('personas') and len(data_dep['personas']) > 0:
-                        id_participacion = data_dep['personas'][0]['id_participacion']
-                        print(f"   👤 ID Deportista encontrado: {id_participacion}")
-                except:
-                    print("   ⚠️ No se pudo extraer ID de deportista")
+            participantes = self.obtener_participantes()
+            if participantes:
+                id_participacion = participantes[0].get('id_participacion')
+                logger.debug("ID deportista encontrado: %s", id_participacion)
             
             if not id_participacion:
                 raise Exception("No se pudo obtener el ID de participante")
@@ -80,22 +353,18 @@ class CompensarAPI:
                 "historico": False
             }
             
-            print(f"   🔄 Consultando tiqueteras con POST: {api_url}")
-            response = self.session.post(
+            response = self.transporte.post(
+                'tiqueteras',
                 api_url,
+                reintentar=True,
                 json=payload,  # Enviar como JSON
                 params={'autenticador': 'compensar'},
-                headers={
-                    'Content-Type': 'application/json',
-                    'X-Requested-With': 'XMLHttpRequest'
-                },
+                headers=HEADERS_JSON,
                 allow_redirects=True
             )
             
             if response.status_code != 200:
-                # Si falla, guardar debug
-                with open('debug_api_error.html', 'w', encoding='utf-8') as f:
-                    f.write(response.text)
+                # El cuerpo de la respuesta queda en transporte.intercambios (/api/debug/intercambios)
                 raise Exception(f"Error al obtener tiqueteras: {response.status_code}")
             
             
@@ -103,46 +372,27 @@ class CompensarAPI:
             try:
                 data = response.json()
             except Exception as e:
-                # Si no es JSON, guardar respuesta para debug
-                with open('debug_response_content.txt', 'w', encoding='utf-8') as f:
-                    f.write(response.text)
+                # Si no es JSON, el contenido queda en transporte.intercambios para debug
                 raise Exception(f"La respuesta no es JSON válido: {str(e)}")
 
-            tiqueteras = []
-            
-            # Verificar estructura de respuesta (puede estar anidada)
-            items = data.get('tiqueteras', []) if isinstance(data, dict) else []
-            
-            for t in items:
-                tiquetera = Tiquetera(
-                    id=t.get('id'),
-                    nombre_centro_entrenamiento=t.get('nombre_centro_entrenamiento', 'Desconocido'),
-                    nombre_sede=t.get('nombre_sede', 'Desconocida'),
-                    nombre_deporte=t.get('nombre_deporte', 'Desconocido'),
-                    id_centro_entrenamiento=t.get('id_centro_entrenamiento'),
-                    id_participacion_deportista=t.get('id_participacion_deportista'),
-                    entradas=t.get('entradas', 0),
-                    ilimitado=t.get('ilimitado', False),
-                    id_tiquetera=t.get('id_tiquetera', t.get('id', 0)),
-                    id_escenario=t.get('id_escenario', t.get('id_centro_entrenamiento', 0)),
-                    id_centro=t.get('id_centro', t.get('id_centro_entrenamiento', 0))
-                )
-                tiqueteras.append(tiquetera)
+            tiqueteras = parsear_tiqueteras(data)
             
-            print(f"✅ Se encontraron {len(tiqueteras)} tiqueteras")
+            logger.info("Se encontraron %d tiqueteras", len(tiqueteras))
             return tiqueteras
             
         except Exception as e:
-            print(f"❌ Error obteniendo tiqueteras: {str(e)}")
-            if Config.DEBUG:
-                import traceback
-                traceback.print_exc()
+            logger.error("Error obteniendo tiqueteras: %s", e, exc_info=Config.DEBUG)
             return []
     
     def get_horarios(self, tiquetera: Tiquetera, fecha: str) -> List[Horario]:
         """
         Obtiene los horarios disponibles para una tiquetera en una fecha específica
         
+        Todas las fechas incluidas en la respuesta quedan en cache durante
+        HORARIOS_CACHE_TTL, así que consultas posteriores no van al servidor.
+        Con cache compartido, la respuesta de otro usuario que mira el mismo
+        centro sirve también para esta tiquetera.
+        
         Args:
             tiquetera: Objeto Tiquetera
             fecha: Fecha en formato 'YYYY-MM-DD'
@@ -151,134 +401,108 @@ class CompensarAPI:
             Lista de objetos Horario
         """
         try:
-            print(f"🕐 Obteniendo horarios para {tiquetera.nombre_centro_entrenamiento} - {fecha}...")
-            
-            # Obtener datos del deportista primero
-            deportistas_url = f"{Config.API_BASE_URL}/sistema.php/grupofamiliar/lista/json"
-            resp_dep = self.session.get(
-                deportistas_url,
-                params={'autenticador': 'compensar'},
-                headers={'X-Requested-With': 'XMLHttpRequest'}
-            )
-            
-            participantes_data = []
-            if resp_dep.status_code == 200:
-                try:
-                    data_dep = resp_dep.json()
-                    if data_dep.get('personas') and len(data_dep['personas']) > 0:
-                        participantes_data = data_dep['personas']
-                        self.participantes_data = participantes_data
-                except:
-                    pass
-            
-            # Payload correcto según el usuario
-            payload = {
-                "idTiquetera": tiquetera.id_tiquetera if tiquetera.id_tiquetera else tiquetera.id,
-                "idEscenario": tiquetera.id_escenario if tiquetera.id_escenario else tiquetera.id_centro_entrenamiento,
-                "participantes": participantes_data,
-                "inicioInmediato": False,
-                "turnosSeguidos": 1,
-                "idCentro": tiquetera.id_centro if tiquetera.id_centro else tiquetera.id_centro_entrenamiento,
-                "fecha": fecha  # Agregamos la fecha
-            }
-            
-            print(f"   📡 Consultando horarios con POST: {payload}")
-            response = self.session.post(
-                f"{Config.API_BASE_URL}{Config.SCHEDULE_ENDPOINT}",
-                json=payload,
-                params={'autenticador': 'compensar'},
-                headers={
-                    'Content-Type': 'application/json',
-                    'X-Requested-With': 'XMLHttpRequest'
-                }
-            )
-            
-            if response.status_code != 200:
-                print(f"❌ Error API Horarios ({response.status_code}): {response.text}")
-                raise Exception(f"Error al obtener horarios: {response.status_code}")
-            
-            data = response.json()
-            print(f"   📥 Respuesta Horarios: {str(data)[:500]}...") # Debug respuesta
-            
-            horarios = []
-            
-            # Parsear respuesta compleja
-            # Estructura: { "YYYY-MM-DD": { "HH:MM - HH:MM": { "ID": { ... } } } }
-            
-            horarios_fecha = data.get(fecha, {})
-            if not horarios_fecha and isinstance(data, dict):
-                # Intentar buscar la fecha en las claves
-                for k in data.keys():
-                    if k == fecha:
-                        horarios_fecha = data[k]
-                        break
+            if self.disponibilidad is not None:
+                return self.disponibilidad.obtener(
+                    tiquetera, fecha, lambda: self._consultar_horarios(tiquetera, fecha)
+                )
             
-            for rango_horario, detalles in horarios_fecha.items():
-                try:
-                    # rango_horario es tipo "06:00 - 07:00"
-                    partes = rango_horario.split(' - ')
-                    if len(partes) != 2:
-                        continue
-                        
-                    hora_inicio = partes[0].strip()
-                    hora_fin = partes[1].strip()
-                    
-                    # Iterar sobre los detalles (pueden haber múltiples zonas/IDs)
-                    for id_zona, info in detalles.items():
-                        if not isinstance(info, dict):
-                            continue
-                            
-                        cupos = info.get('conteo', 0)
-                        total_turnos = info.get('totalTurnos', 0)
-                        
-                        # ID del turno para reservar
-                        # Preferimos 'ids' (numérico) o 'turnos' (string)
-                        id_turno = None
-                        if info.get('ids') and len(info['ids']) > 0:
-                            id_turno = info['ids'][0]
-                        elif info.get('turnos') and len(info['turnos']) > 0:
-                            id_turno = info['turnos'][0]
-                            
-                        # Intentar obtener el nombre de la clase
-                        nombre_clase = ""
-                        caracteristicas = info.get('caracteristicas', {})
-                        # El ID de la característica suele coincidir con el id_zona (la clave del dict superior)
-                        if id_zona in caracteristicas:
-                            nombre_clase = caracteristicas[id_zona].get('nombre', '')
-                        else:
-                            # Si no coincide, tomamos el primero que encontremos
-                            for k, v in caracteristicas.items():
-                                if isinstance(v, dict) and 'nombre' in v:
-                                    nombre_clase = v['nombre']
-                                    break
-                            
-                        horario = Horario(
-                            fecha=fecha,
-                            hora_inicio=hora_inicio,
-                            hora_fin=hora_fin,
-                            cupos_disponibles=cupos,
-                            id_turno=id_turno,
-                            nombre_clase=nombre_clase,
-                            raw_data=info
-                        )
-                        
-                        # Solo agregar si hay cupos o si queremos mostrar todo
-                        horarios.append(horario)
-                        
-                except Exception as e:
-                    print(f"⚠️ Error parseando horario {rango_horario}: {e}")
-                    continue
+            clave_tiquetera = self._clave_tiquetera(tiquetera)
+            cacheados = self._horarios_cache.get((clave_tiquetera, fecha))
+            if cacheados is not None:
+                return list(cacheados)
             
-            print(f"✅ Se encontraron {len(horarios)} horarios disponibles")
-            return horarios
+            # Cosechar todas las fechas de la respuesta, no solo la solicitada
+            horarios_por_fecha = self._consultar_horarios(tiquetera, fecha)
+            horarios_por_fecha.setdefault(fecha, [])
+            for fecha_respuesta, horarios_respuesta in horarios_por_fecha.items():
+                self._horarios_cache.set((clave_tiquetera, fecha_respuesta), horarios_respuesta)
+            return list(horarios_por_fecha[fecha])
             
         except Exception as e:
-            print(f"❌ Error obteniendo horarios: {str(e)}")
-            if Config.DEBUG:
-                import traceback
-                traceback.print_exc()
+            logger.error("Error obteniendo horarios: %s", e, exc_info=Config.DEBUG)
             return []
     
+    def get_horarios_frescos(self, tiquetera: Tiquetera, fecha: str) -> List[Horario]:
+        """
+        Horarios consultados al servidor ahora, sin leer del cache
+        
+        La respuesta reemplaza lo cacheado (todas sus fechas) en lugar de
+        invalidarlo, así que los demás usuarios siguen leyendo del cache y
+        reciben los datos nuevos. A diferencia de get_horarios, los errores
+        del servidor se propagan: una caída no parece "sin cupos".
+        
+        Raises:
+            Exception: si la consulta falla o el servidor responde con error
+        """
+        horarios_por_fecha = self._consultar_horarios(tiquetera, fecha)
+        horarios_por_fecha.setdefault(fecha, [])
+        if self.disponibilidad is not None:
+            self.disponibilidad.guardar(tiquetera, horarios_por_fecha)
+        else:
+            clave_tiquetera = self._clave_tiquetera(tiquetera)
+            for fecha_respuesta, horarios_respuesta in horarios_por_fecha.items():
+                self._horarios_cache.set((clave_tiquetera, fecha_respuesta), horarios_respuesta)
+        return list(horarios_por_fecha[fecha])
+    
+    def _consultar_horarios(self, tiquetera: Tiquetera, fecha: str) -> Dict[str, List[Horario]]:
+        """Consulta el servidor con la sesión del usuario; {fecha: [Horario]} de toda la respuesta"""
+        logger.debug("Obteniendo horarios para %s - %s", tiquetera.nombre_centro_entrenamiento, fecha)
+        
+        # Obtener datos del deportista primero (cacheados por sesión)
+        participantes_data = self.obtener_participantes()
+        
+        payload = payload_horarios(tiquetera, fecha, participantes_data)
+        
+        response = self.transporte.post(
+            'horarios',
+            f"{Config.API_BASE_URL}{Config.SCHEDULE_ENDPOINT}",
+            reintentar=True,
+            json=payload,
+            params={'autenticador': 'compensar'},
+            headers=HEADERS_JSON
+        )
+        
+        if response.status_code != 200:
+            logger.error("Error API horarios (%s)", response.status_code)
+            raise Exception(f"Error al obtener horarios: {response.status_code}")
+        
+        horarios_por_fecha = parsear_horarios(response.json())
+        with self._stats_lock:
+            self._consultas_horarios += 1
+            self._fechas_cosechadas += len(horarios_por_fecha) - (fecha in horarios_por_fecha)
+        
+        logger.info("Se encontraron %d horarios para %s (%d fechas en la respuesta)",
+                    len(horarios_por_fecha.get(fecha, [])), fecha, len(horarios_por_fecha))
+        return horarios_por_fecha
+    
+    def get_horarios_range(self, tiquetera: Tiquetera, fechas: List[str],
+                           max_workers: Optional[int] = None) -> Dict[str, List[Horario]]:
+        """
+        Obtiene los horarios de varias fechas en paralelo
+        
+        Las consultas comparten la sesión (y su pool de conexiones), por lo que
+        el número de hilos se limita a HORARIOS_MAX_WORKERS.
+        
+        Args:
+            tiquetera: Objeto Tiquetera
+            fechas: Lista de fechas en formato 'YYYY-MM-DD'
+            max_workers: Límite de consultas simultáneas (opcional)
+            
+        Returns:
+            Diccionario {fecha: [Horario]} en el mismo orden de fechas
+        """
+        fechas = list(dict.fromkeys(fechas))
+        if not fechas:
+            return {}
+        
+        # Resolver participantes antes de abrir el pool para no repetir la consulta en cada hilo
+        self.obtener_participantes()
+        
+        workers = min(max_workers or Config.HORARIOS_MAX_WORKERS, len(fechas))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            resultados = executor.map(lambda fecha: self.get_horarios(tiquetera, fecha), fechas)
+            return dict(zip(fechas, resultados))
+    
     def realizar_reserva(self, reserva: Reserva) -> bool:
         """
         Realiza una reserva
@@ -289,127 +513,154 @@ class CompensarAPI:
         Returns:
             True si la reserva fue exitosa, False en caso contrario
         """
+        return self.realizar_reserva_detallada(reserva).exitosa
+    
+    def realizar_reserva_detallada(self, reserva: Reserva) -> ResultadoReserva:
+        """
+        Realiza una reserva y retorna el detalle del resultado
+        
+        Args:
+            reserva: Objeto Reserva con los datos de la reserva
+            
+        Returns:
+            ResultadoReserva con el estado, el mensaje del servidor y la latencia
+        """
+        inicio = time.perf_counter()
+        
+        def resultado(exitosa: bool, mensaje: str) -> ResultadoReserva:
+            return ResultadoReserva(
+                reserva=reserva,
+                exitosa=exitosa,
+                mensaje=mensaje,
+                latencia_ms=(time.perf_counter() - inicio) * 1000
+            )
+        
         try:
-            logging.info(f"📅 Reservando: {reserva}...")
+            logger.info("Reservando: %s", reserva)
             
             # Construir payload complejo requerido por Compensar
             if not reserva.horario.raw_data:
-                logging.error("❌ Error: No hay datos crudos del horario para realizar la reserva")
-                return False
-                
-            # Obtener datos del centro/escenario desde el raw_data del horario
-            centro_info = reserva.horario.raw_data.get('centroEntrenamiento', {})
-            id_centro = centro_info.get('id', reserva.tiquetera.id_centro)
-            id_escenario = centro_info.get('idEscenario', reserva.tiquetera.id_escenario)
+                logger.error("No hay datos crudos del horario para realizar la reserva")
+                return resultado(False, 'No hay datos crudos del horario')
             
-            # Usar participantes cacheados o intentar obtenerlos si no existen
-            participantes = self.participantes_data
-            if not participantes:
-                logging.warning("⚠️ No hay participantes cacheados, intentando obtenerlos...")
-                # Aquí podríamos llamar a un método para obtener participantes si fuera necesario
-                # Por ahora usaremos una lista vacía o lo que tenga la tiquetera
-                pass
+            payload = self.construir_payload_reserva(reserva)
             
-            # Agregar campos requeridos a cada participante
-            for p in participantes:
-                p['usos'] = 1
-                p['turno'] = 1
-
-            payload = {
-                "idTiquetera": reserva.tiquetera.id_tiquetera if reserva.tiquetera.id_tiquetera else reserva.tiquetera.id,
-                "arregloTurnos": {"1": 1},
-                "horario": reserva.horario.raw_data,
-                "idEscenario": id_escenario,
-                "idCentro": id_centro,
-                "participantes": participantes,
-                "turnosSeguidos": 1
-            }
-            
-            # Debug payload
-            import json
-            payload_str = json.dumps(payload, indent=2)
-            logging.info(f"📦 Payload Reserva: {payload_str}")
+            # El payload enviado queda en transporte.intercambios; no se escribe a disco aquí
+            return self.enviar_reserva_serializada(reserva, json.dumps(payload).encode('utf-8'), inicio)
+                
+        except Exception as e:
+            logger.error("Error crítico en realizar_reserva: %s", e, exc_info=Config.DEBUG)
+            return resultado(False, str(e))
+    
+    def construir_payload_reserva(self, reserva: Reserva) -> Dict[str, Any]:
+        """
+        Construye el payload que espera el endpoint de guardar reserva
+        
+        Args:
+            reserva: Objeto Reserva con raw_data del horario
             
-            # Save payload to file for inspection
-            try:
-                with open('last_reservation_payload.json', 'w', encoding='utf-8') as f:
-                    f.write(payload_str)
-            except Exception as e:
-                logging.error(f"Error saving payload: {e}")
+        Returns:
+            Diccionario listo para serializar como JSON
+        """
+        # Usar el mismo cache de participantes que get_horarios/get_tiqueteras
+        participantes = self.obtener_participantes()
+        if not participantes:
+            logger.warning("No se pudieron obtener los participantes de la sesión")
+        return payload_reserva(reserva, participantes)
+    
+    def enviar_reserva_serializada(self, reserva: Reserva, cuerpo: bytes,
+                                   inicio: Optional[float] = None) -> ResultadoReserva:
+        """
+        Envía un payload de reserva ya serializado y analiza la respuesta
+        
+        Permite construir y serializar el payload con anticipación para que el
+        envío en el momento crítico sea solo la petición HTTP.
+        
+        Args:
+            reserva: Reserva a la que corresponde el payload
+            cuerpo: Payload JSON ya codificado
+            inicio: perf_counter desde el que se mide la latencia (por defecto, ahora)
             
-            response = self.session.post(
+        Returns:
+            ResultadoReserva con el estado, el mensaje del servidor y la latencia
+        """
+        if inicio is None:
+            inicio = time.perf_counter()
+        
+        def resultado(exitosa: bool, mensaje: str, incierta: bool = False) -> ResultadoReserva:
+            return ResultadoReserva(
+                reserva=reserva,
+                exitosa=exitosa,
+                mensaje=mensaje,
+                latencia_ms=(time.perf_counter() - inicio) * 1000,
+                incierta=incierta
+            )
+        
+        try:
+            # Guardar no es idempotente: sin reintentos automáticos
+            response = self.transporte.post(
+                'reserva',
                 f"{Config.API_BASE_URL}{Config.BOOKING_ENDPOINT}",
-                json=payload,
+                data=cuerpo,
                 params={'autenticador': 'compensar'},
-                headers={
-                    'Content-Type': 'application/json',
-                    'X-Requested-With': 'XMLHttpRequest',
-                    'Referer': f"{Config.API_BASE_URL}/sistema.php/entrenamiento/reserva/practica/libre"
-                }
+                headers=HEADERS_JSON
             )
             
             if response.status_code == 200:
                 result = response.json()
-                if result.get('success') or result.get('estado') == 'exitoso':
-                    logging.info(f"✅ Reserva exitosa: {reserva}")
-                    return True
+                exitosa, mensaje = evaluar_respuesta_reserva(result)
+                if exitosa:
+                    logger.info("Reserva exitosa: %s", reserva)
+                    # Los cupos de esa fecha cambiaron
+                    self.invalidar_horarios(reserva.tiquetera, reserva.horario.fecha)
                 else:
-                    error_msg = result.get('mensaje', 'Error desconocido')
-                    logging.error(f"❌ Error en reserva: {error_msg}")
-                    logging.error(f"   Respuesta completa: {result}")
-                    return False
+                    logger.error("Error en reserva: %s", mensaje)
+                    logger.debug("Respuesta completa: %s", result)
+                return resultado(exitosa, mensaje)
             else:
-                logging.error(f"❌ Error HTTP {response.status_code} al realizar reserva")
-                logging.error(f"   URL: {response.url}")
-                logging.error(f"   Respuesta: {response.text[:200]}...")
-                
-                # Guardar HTML de error para debug
-                try:
-                    with open('debug_reservation_error.html', 'w', encoding='utf-8') as f:
-                        f.write(response.text)
-                except Exception as e:
-                    logging.error(f"Error guardando debug html: {e}")
-                    
-                return False
-                
+                logger.error("Error HTTP %s al realizar reserva (%s)", response.status_code, response.url)
+                return resultado(False, f'Error HTTP {response.status_code}',
+                                 incierta=response.status_code in ESTADOS_INCIERTOS)
+        
+        except (requests.ReadTimeout, requests.exceptions.ChunkedEncodingError) as e:
+            # La petición salió: el servidor pudo guardar la reserva aunque no respondiera
+            logger.error("Sin respuesta al enviar reserva %s: %s", reserva, e)
+            return resultado(False, f'Sin respuesta del servidor, verifica la reserva: {e}', incierta=True)
         except Exception as e:
-            logging.error(f"❌ Error crítico en realizar_reserva: {str(e)}")
-            if Config.DEBUG:
-                import traceback
-                logging.error(traceback.format_exc())
-            return False
-                
-
+            logger.error("Error crítico enviando reserva: %s", e)
+            return resultado(False, str(e))
     
-    def realizar_reservas_multiples(self, reservas: List[Reserva]) -> Dict[str, int]:
+    def calentar_conexiones(self, cantidad: int = 1) -> int:
         """
-        Realiza múltiples reservas
+        Abre `cantidad` conexiones TLS hacia API_BASE_URL antes de necesitarlas
+        
+        Returns:
+            Número de conexiones que respondieron
+        """
+        return self.transporte.calentar(cantidad)
+    
+    def realizar_reservas_multiples(self, reservas: List[Reserva],
+                                    max_concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Realiza múltiples reservas de forma concurrente
         
         Args:
             reservas: Lista de objetos Reserva
+            max_concurrency: Límite de reservas simultáneas (por defecto BOOKING_MAX_CONCURRENCY)
             
         Returns:
-            Diccionario con estadísticas de las reservas
+            Diccionario con estadísticas y el ResultadoReserva de cada reserva
         """
-        print(f"\n🚀 Iniciando {len(reservas)} reservas...\n")
+        logger.info("Iniciando %d reservas", len(reservas))
         
-        exitosas = 0
-        fallidas = 0
+        resultados = BookingExecutor(self, max_concurrency).ejecutar(reservas)
+        resumen = BookingExecutor.resumir(resultados)
         
-        for i, reserva in enumerate(reservas, 1):
-            print(f"[{i}/{len(reservas)}] ", end="")
-            if self.realizar_reserva(reserva):
-                exitosas += 1
-            else:
-                fallidas += 1
-        
-        print(f"\n📊 Resumen:")
-        print(f"   ✅ Exitosas: {exitosas}")
-        print(f"   ❌ Fallidas: {fallidas}")
-        print(f"   📈 Total: {len(reservas)}")
-        
-        return {
-            'exitosas': exitosas,
-            'fallidas': fallidas,
-            'total': len(reservas)
-        }
+        for i, r in enumerate(resultados, 1):
+            logger.info("[%d/%d] %s", i, len(resultados), r)
+        
+        logger.info("Resumen: %d exitosas, %d fallidas, %d total, %d sin enviar",
+                    resumen['exitosas'], resumen['fallidas'], resumen['total'], resumen['llamadas_evitadas'])
+        
+        resumen['resultados'] = resultados
+        return resumen
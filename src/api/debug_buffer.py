@@ -0,0 +1,127 @@
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from config.config import Config
+
+# Un solo hilo escribe a disco para todos los buffers; la cola desacopla el hot path
+_cola_flush: queue.Queue = queue.Queue(maxsize=1000)
+_hilo_flush: Optional[threading.Thread] = None
+_hilo_lock = threading.Lock()
+
+
+def _serializable(valor: Any, limite: int) -> Any:
+    """Convierte cuerpos de request/response a algo que json pueda escribir"""
+    if isinstance(valor, (bytes, bytearray)):
+        valor = bytes(valor[:limite]).decode('utf-8', errors='replace')
+    if isinstance(valor, str) and len(valor) > limite:
+        return valor[:limite] + '...'
+    return valor
+
+
+def _escribir_rotando(directorio: str, intercambio: Dict[str, Any]):
+    os.makedirs(directorio, exist_ok=True)
+    nombre = f"{intercambio['timestamp']:.3f}_{intercambio['id']:06d}_{intercambio['endpoint']}.json"
+    with open(os.path.join(directorio, nombre), 'w', encoding='utf-8') as f:
+        json.dump(intercambio, f, ensure_ascii=False, indent=2, default=str)
+
+    archivos = sorted(a for a in os.listdir(directorio) if a.endswith('.json'))
+    for viejo in archivos[:-Config.DEBUG_FLUSH_MAX_FILES]:
+        try:
+            os.remove(os.path.join(directorio, viejo))
+        except OSError:
+            pass
+
+
+def _flush_worker():
+    while True:
+        directorio, intercambio = _cola_flush.get()
+        try:
+            _escribir_rotando(directorio, intercambio)
+        except Exception:
+            pass
+        finally:
+            _cola_flush.task_done()
+
+
+def _asegurar_hilo_flush():
+    global _hilo_flush
+    with _hilo_lock:
+        if _hilo_flush is None or not _hilo_flush.is_alive():
+            _hilo_flush = threading.Thread(target=_flush_worker, name='debug-flush', daemon=True)
+            _hilo_flush.start()
+
+
+class BufferIntercambios:
+    """
+    Ring buffer en memoria con los últimos intercambios con el servidor.
+
+    Registrar es O(1) y no serializa nada: los cuerpos se guardan por
+    referencia (las respuestas truncadas) y solo se convierten a JSON al
+    consultarlos o al escribirlos a disco en el hilo de flush.
+    """
+
+    def __init__(self, capacidad: Optional[int] = None, directorio: Optional[str] = None):
+        self.capacidad = capacidad or Config.DEBUG_BUFFER_SIZE
+        self.directorio = Config.DEBUG_FLUSH_DIR if directorio is None else directorio
+        self._intercambios = deque(maxlen=self.capacidad)
+        self._ids = itertools.count(1)
+        self.descartados = 0
+
+    def registrar(self, metodo: str, endpoint: str, url: str, status: Optional[int],
+                  latencia_ms: float, request_body: Any = None, response_body: Any = None,
+                  error: Optional[str] = None):
+        """Agrega un intercambio al buffer (y a la cola de disco si está habilitada)"""
+        if isinstance(response_body, (bytes, bytearray)) and len(response_body) > Config.DEBUG_MAX_BODY:
+            response_body = response_body[:Config.DEBUG_MAX_BODY]
+        intercambio = {
+            'id': next(self._ids),
+            'timestamp': time.time(),
+            'metodo': metodo.upper(),
+            'endpoint': endpoint,
+            'url': url,
+            'status': status,
+            'latencia_ms': round(latencia_ms, 1),
+            'error': error,
+            'request': request_body,
+            'response': response_body
+        }
+        self._intercambios.append(intercambio)
+
+        if self.directorio:
+            _asegurar_hilo_flush()
+            try:
+                _cola_flush.put_nowait((self.directorio, self._a_json(intercambio)))
+            except queue.Full:
+                self.descartados += 1
+
+    def recientes(self, limite: Optional[int] = None, solo_errores: bool = False) -> List[Dict[str, Any]]:
+        """
+        Retorna los intercambios más recientes primero, listos para JSON
+
+        Args:
+            limite: Máximo de intercambios a retornar
+            solo_errores: Solo los que fallaron (status != 200 o excepción)
+        """
+        resultado = []
+        for intercambio in reversed(list(self._intercambios)):
+            if solo_errores and intercambio['status'] == 200 and not intercambio['error']:
+                continue
+            resultado.append(self._a_json(intercambio))
+            if limite and len(resultado) >= limite:
+                break
+        return resultado
+
+    def limpiar(self):
+        self._intercambios.clear()
+
+    @staticmethod
+    def _a_json(intercambio: Dict[str, Any]) -> Dict[str, Any]:
+        datos = dict(intercambio)
+        datos['request'] = _serializable(intercambio['request'], Config.DEBUG_MAX_BODY)
+        datos['response'] = _serializable(intercambio['response'], Config.DEBUG_MAX_BODY)
+        return datos
@@ -0,0 +1,24 @@
+"""
+Parseo de horarios a modelos compactos, para escaneos grandes
+
+Vive aparte de compensar_api para que el cliente de producción no cargue
+los modelos compactos; lo usan la HorarioTable, los benchmarks y las pruebas.
+"""
+
+from functools import partial
+from typing import Any, Dict, List, Optional
+from src.api.compensar_api import _parsear_horarios
+from src.models.compact import HorarioCompacto, Internador
+
+
+def parsear_horarios_compacto(data: Any, internador: Optional[Internador] = None) -> Dict[str, List[HorarioCompacto]]:
+    """
+    Como parsear_horarios, pero con HorarioCompacto
+
+    Con un internador, las franjas comparten cadenas y las subestructuras
+    repetidas de raw_data; `data` no se modifica (raw_data es una copia
+    superficial cuando hubo algo que compartir). Ahorra memoria retenida a
+    costa de tiempo de parseo. Pasar el mismo internador a todas las
+    respuestas de un escaneo.
+    """
+    return _parsear_horarios(data, partial(HorarioCompacto.desde_api, internador=internador))
@@ -0,0 +1,114 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config.config import Config
+from src.models.booking import Tiquetera, Horario, Reserva
+
+
+def slot_id(tiquetera: Tiquetera, horario: Horario) -> str:
+    """
+    Identificador corto y estable de un horario para una tiquetera
+
+    Es determinístico: volver a listar la misma fecha produce el mismo
+    identificador, así que los slots en el carrito sobreviven a un refresco.
+    """
+    clave = (
+        f"{tiquetera.id_tiquetera or tiquetera.id}|{horario.fecha}|"
+        f"{horario.hora_inicio}|{horario.hora_fin}|{horario.id_turno}"
+    )
+    return hashlib.blake2b(clave.encode('utf-8'), digest_size=6).hexdigest()
+
+
+class RegistroHorarios:
+    """
+    Registro por usuario de los horarios mostrados, indexados por slot.
+
+    El navegador solo recibe resúmenes compactos con el slot; al confirmar
+    envía los slots y aquí se recupera el Horario original (con raw_data)
+    junto con su Tiquetera, sin reconstruir nada desde el JSON del cliente.
+
+    Con varios workers, el store de sesiones guarda los slots nuevos
+    (tomar_nuevos) y pone en `respaldo` una función que busca los que este
+    proceso no mostró: obtener() la consulta antes de dar un slot por vencido.
+    """
+
+    def __init__(self, capacidad: Optional[int] = None):
+        self.capacidad = capacidad or Config.HORARIOS_REGISTRY_SIZE
+        self._slots: 'OrderedDict[str, Tuple[Tiquetera, Horario]]' = OrderedDict()
+        self._nuevos: 'OrderedDict[str, None]' = OrderedDict()  # Registrados desde el último tomar_nuevos()
+        self._lock = threading.Lock()
+        self.respaldo: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None
+
+    def registrar(self, tiquetera: Tiquetera, horario: Horario) -> str:
+        """Guarda (o actualiza) un horario y retorna su slot"""
+        slot = slot_id(tiquetera, horario)
+        with self._lock:
+            if slot not in self._slots:
+                self._nuevos[slot] = None
+            self._guardar(slot, (tiquetera, horario))
+        return slot
+
+    def _guardar(self, slot: str, registro: Tuple[Tiquetera, Horario]):
+        self._slots[slot] = registro
+        self._slots.move_to_end(slot)
+        while len(self._slots) > self.capacidad:
+            viejo, _ = self._slots.popitem(last=False)
+            self._nuevos.pop(viejo, None)
+
+    def resumir(self, tiquetera: Tiquetera, horario: Horario) -> Dict[str, Any]:
+        """Registra el horario y retorna el resumen compacto para el navegador"""
+        return {
+            'slot': self.registrar(tiquetera, horario),
+            'fecha': horario.fecha,
+            'hora_inicio': horario.hora_inicio,
+            'hora_fin': horario.hora_fin,
+            'cupos_disponibles': horario.cupos_disponibles,
+            'nombre_clase': horario.nombre_clase
+        }
+
+    def obtener(self, slot: str) -> Optional[Reserva]:
+        """Reserva lista para enviar a partir de un slot (None si no existe)"""
+        with self._lock:
+            registro = self._slots.get(slot)
+        if registro is None and self.respaldo is not None:
+            datos = self.respaldo(slot)
+            if datos is not None:
+                registro = (Tiquetera(**datos['tiquetera']), Horario(**datos['horario']))
+                with self._lock:
+                    self._guardar(slot, registro)
+        if registro is None:
+            return None
+        return Reserva(*registro)
+
+    def resolver(self, slots: List[str]) -> Tuple[List[Reserva], List[str]]:
+        """
+        Convierte una lista de slots en reservas
+
+        Returns:
+            (reservas en el orden recibido, slots desconocidos o vencidos)
+        """
+        reservas = []
+        desconocidos = []
+        for slot in slots:
+            reserva = self.obtener(slot) if isinstance(slot, str) else None
+            if reserva is None:
+                desconocidos.append(slot)
+            else:
+                reservas.append(reserva)
+        return reservas, desconocidos
+
+    def tomar_nuevos(self) -> List[Dict[str, Any]]:
+        """Slots registrados desde la última llamada, serializables (del más viejo al más reciente)"""
+        with self._lock:
+            registros = [(slot, self._slots[slot]) for slot in self._nuevos]
+            self._nuevos.clear()
+        return [
+            {'slot': slot, 'tiquetera': asdict(tiquetera), 'horario': asdict(horario)}
+            for slot, (tiquetera, horario) in registros
+        ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._slots)
@@ -0,0 +1,218 @@
+import threading
+import time
+from dataclasses import replace
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config.config import Config
+from src.models.booking import Tiquetera, Horario
+from src.models.franjas import utilizacion_franja
+from src.api.cache import TTLCache
+
+_compartida: Optional['DisponibilidadCompartida'] = None
+_compartida_lock = threading.Lock()
+
+
+def disponibilidad_compartida() -> 'DisponibilidadCompartida':
+    """Cache de disponibilidad del proceso, compartido por todos los usuarios"""
+    global _compartida
+    with _compartida_lock:
+        if _compartida is None:
+            _compartida = DisponibilidadCompartida()
+        return _compartida
+
+
+def clave_disponibilidad(tiquetera: Tiquetera, fecha: str) -> Tuple[int, int, str]:
+    """(idEscenario, idCentro, fecha), con los mismos valores que payload_horarios"""
+    return (
+        tiquetera.id_escenario if tiquetera.id_escenario else tiquetera.id_centro_entrenamiento,
+        tiquetera.id_centro if tiquetera.id_centro else tiquetera.id_centro_entrenamiento,
+        fecha
+    )
+
+
+def horarios_para_tiquetera(horarios: List[Horario], tiquetera: Tiquetera) -> List[Horario]:
+    """
+    Copia horarios de otro usuario con el idTiquetera de esta tiquetera
+
+    raw_data termina en el payload de la reserva, así que nunca debe
+    llevar la tiquetera de quien llenó el cache.
+    """
+    id_tiquetera = tiquetera.id_tiquetera if tiquetera.id_tiquetera else tiquetera.id
+    copias = []
+    for horario in horarios:
+        raw_data = horario.raw_data
+        if isinstance(raw_data, dict) and 'idTiquetera' in raw_data:
+            raw_data = {**raw_data, 'idTiquetera': id_tiquetera}
+        copias.append(replace(horario, raw_data=raw_data))
+    return copias
+
+
+class HistorialLlenado:
+    """
+    Ritmo al que se llenan las franjas, aprendido de respuestas sucesivas
+
+    Cada respuesta nueva se compara con la observación anterior de la misma
+    franja (centro, fecha, hora y clase): lo que subió totalUtilizado por
+    hora alimenta un promedio móvil por centro, día de la semana, hora y
+    clase, que sirve para estimar las franjas de las semanas siguientes.
+    Las bajas (cancelaciones) cuentan como ritmo 0.
+    """
+
+    ALFA = 0.3  # Peso de la observación nueva en el promedio móvil
+    MIN_INTERVALO = 5.0  # Segundos mínimos entre observaciones comparables
+    MAX_FRANJAS = 20000  # Últimas observaciones recordadas
+
+    def __init__(self):
+        self._ultimas: Dict[Tuple, Tuple[float, float]] = {}  # franja -> (epoch, utilización)
+        self._tasas: Dict[Tuple, float] = {}  # patrón -> puntos de utilización por hora
+        self._lock = threading.Lock()
+
+    def observar(self, tiquetera: Tiquetera, horarios_por_fecha: Dict[str, List[Horario]],
+                 ahora: Optional[float] = None):
+        """Registra la utilización de todas las franjas de una respuesta"""
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            for fecha, horarios in horarios_por_fecha.items():
+                try:
+                    dia = date.fromisoformat(fecha).weekday()
+                except ValueError:
+                    continue
+                centro = clave_disponibilidad(tiquetera, fecha)[:2]
+                for horario in horarios:
+                    utilizacion = utilizacion_franja(horario)
+                    if utilizacion is None:
+                        continue
+                    franja = (centro, fecha, horario.hora_inicio, horario.nombre_clase)
+                    anterior = self._ultimas.get(franja)
+                    if anterior is not None and ahora - anterior[0] < self.MIN_INTERVALO:
+                        continue
+                    # Reinsertar deja las franjas más recientes al final
+                    self._ultimas.pop(franja, None)
+                    self._ultimas[franja] = (ahora, utilizacion)
+                    if anterior is None:
+                        continue
+                    tasa = max(0.0, utilizacion - anterior[1]) * 3600 / (ahora - anterior[0])
+                    patron = (centro, dia, horario.hora_inicio, horario.nombre_clase)
+                    previa = self._tasas.get(patron)
+                    self._tasas[patron] = tasa if previa is None else previa + self.ALFA * (tasa - previa)
+            while len(self._ultimas) > self.MAX_FRANJAS:
+                del self._ultimas[next(iter(self._ultimas))]
+
+    def tasa(self, tiquetera: Tiquetera, horario: Horario) -> Optional[float]:
+        """Puntos de totalUtilizado por hora que suele ganar la franja, o None sin historial"""
+        try:
+            dia = date.fromisoformat(horario.fecha).weekday()
+        except (TypeError, ValueError):
+            return None
+        patron = (clave_disponibilidad(tiquetera, horario.fecha)[:2], dia, horario.hora_inicio, horario.nombre_clase)
+        with self._lock:
+            return self._tasas.get(patron)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'franjas': len(self._ultimas), 'patrones': len(self._tasas)}
+
+
+class _Consulta:
+    """Una consulta al servidor en curso; los demás hilos esperan su resultado"""
+
+    def __init__(self):
+        self.lista = threading.Event()
+        self.resultado: Optional[List[Horario]] = None
+        self.error: Optional[BaseException] = None
+
+
+class DisponibilidadCompartida:
+    """
+    Disponibilidad por (idEscenario, idCentro, fecha) compartida entre usuarios.
+
+    Cualquier respuesta de horarios la llena (todas sus fechas) y sirve a
+    los demás usuarios que miran el mismo centro. Si varios hilos fallan el
+    cache a la vez, solo uno consulta al servidor (single-flight) y los
+    demás reciben su resultado. Las reservas siguen yendo por la sesión de
+    cada usuario; una reserva exitosa invalida la fecha para todos.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self._cache = TTLCache(Config.SHARED_HORARIOS_CACHE_TTL if ttl is None else ttl)
+        self._en_curso: Dict[Tuple, _Consulta] = {}
+        self._lock = threading.Lock()
+        self.coalescidas = 0
+        self.consultas = 0
+        self.historial = HistorialLlenado()
+
+    def guardar(self, tiquetera: Tiquetera, horarios_por_fecha: Dict[str, List[Horario]]):
+        """Guarda todas las fechas de una respuesta de horarios (y las observa en el historial)"""
+        for fecha, horarios in horarios_por_fecha.items():
+            self._cache.set(clave_disponibilidad(tiquetera, fecha), tuple(horarios))
+        self.historial.observar(tiquetera, horarios_por_fecha)
+
+    def obtener(self, tiquetera: Tiquetera, fecha: str,
+                consultar: Callable[[], Dict[str, List[Horario]]]) -> List[Horario]:
+        """
+        Horarios de la fecha para esta tiquetera, consultando solo si hace falta
+
+        Args:
+            consultar: Hace la consulta con la sesión del usuario y retorna
+                {fecha: [Horario]}; se llama a lo sumo una vez por clave a la vez
+
+        Raises:
+            La excepción de consultar, también en los hilos que la esperaban
+        """
+        clave = clave_disponibilidad(tiquetera, fecha)
+        horarios = self._cache.get(clave)
+        if horarios is not None:
+            return horarios_para_tiquetera(horarios, tiquetera)
+
+        with self._lock:
+            # Otro hilo pudo llenar el cache mientras se esperaba el lock
+            horarios = self._cache.get(clave, contar=False)
+            consulta = self._en_curso.get(clave)
+            propia = horarios is None and consulta is None
+            if propia:
+                consulta = self._en_curso[clave] = _Consulta()
+            elif consulta is not None:
+                self.coalescidas += 1
+        if horarios is not None:
+            return horarios_para_tiquetera(horarios, tiquetera)
+
+        if not propia:
+            consulta.lista.wait()
+            if consulta.error is not None:
+                raise consulta.error
+            return horarios_para_tiquetera(consulta.resultado, tiquetera)
+
+        try:
+            horarios_por_fecha = consultar()
+            horarios_por_fecha.setdefault(fecha, [])
+            self.guardar(tiquetera, horarios_por_fecha)
+            consulta.resultado = list(horarios_por_fecha[fecha])
+            with self._lock:
+                self.consultas += 1
+            # Quien consultó recibe sus propios horarios, sin copiar
+            return list(consulta.resultado)
+        except BaseException as e:
+            consulta.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._en_curso[clave]
+            consulta.lista.set()
+
+    def cacheados(self, tiquetera: Tiquetera, fecha: str) -> Optional[List[Horario]]:
+        """Horarios frescos de la clave sin consultar ni contar el acceso (tal como se guardaron)"""
+        horarios = self._cache.get(clave_disponibilidad(tiquetera, fecha), contar=False)
+        return None if horarios is None else list(horarios)
+
+    def invalidar(self, tiquetera: Tiquetera, fecha: str):
+        """Descarta la disponibilidad de una fecha del centro para todos los usuarios"""
+        self._cache.invalidate(clave_disponibilidad(tiquetera, fecha))
+
+    def stats(self) -> Dict[str, Any]:
+        """Aciertos del cache, consultas hechas y consultas concurrentes coalescidas"""
+        stats = self._cache.stats()
+        with self._lock:
+            stats['consultas_upstream'] = self.consultas
+            stats['coalescidas'] = self.coalescidas
+        stats['historial'] = self.historial.stats()
+        return stats
@@ -0,0 +1,267 @@
+"""
+Búsqueda de franjas en todas las tiqueteras y fechas de un usuario
+
+Responde consultas como "la franja más temprana con al menos 3 cupos
+después de las 18:00 en los próximos 7 días en todas mis tiqueteras de
+natación" sin recorrer tiquetera por tiquetera y fecha por fecha.
+
+Los horarios se cargan una vez por tiquetera (con los caches de
+CompensarAPI, así que una respuesta cubre varias fechas) y se indexan en
+memoria por (deporte, sede): cada índice es una lista ordenada por hora de
+inicio y las consultas toman el rango de fechas con bisect. Mientras la
+carga esté fresca (SEARCH_INDEX_TTL) las consultas no tocan la red.
+"""
+
+import bisect
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from config.config import Config
+from src.api.compensar_api import CompensarAPI
+from src.models.booking import Tiquetera, Horario
+from src.models.franjas import epoch_franja, normalizar, validar_hora
+
+logger = logging.getLogger(__name__)
+
+MAX_DIAS = 31
+
+
+def _clave_tiquetera(tiquetera: Tiquetera) -> int:
+    return tiquetera.id_tiquetera or tiquetera.id
+
+
+def _grupo(tiquetera: Tiquetera) -> Tuple[str, str]:
+    return normalizar(tiquetera.nombre_deporte), normalizar(tiquetera.nombre_sede)
+
+
+@dataclass
+class ConsultaHorarios:
+    """Criterios de búsqueda; los textos vacíos no filtran"""
+    deporte: str = ''
+    sede: str = ''
+    cupos_min: int = 1
+    hora_desde: str = ''  # 'HH:MM', sobre la hora de inicio (inclusive)
+    hora_hasta: str = ''  # 'HH:MM', sobre la hora de inicio (inclusive)
+    desde: str = ''  # Primera fecha 'YYYY-MM-DD' (hoy por defecto)
+    dias: int = 7
+    limite: int = 20
+
+    @classmethod
+    def desde_dict(cls, datos: Dict[str, Any]) -> 'ConsultaHorarios':
+        """
+        Arma y valida una consulta a partir del JSON de la petición
+
+        Raises:
+            ValueError: si algún criterio tiene un formato inválido
+        """
+        try:
+            consulta = cls(
+                deporte=str(datos.get('deporte') or ''),
+                sede=str(datos.get('sede') or ''),
+                cupos_min=int(datos.get('cupos_min') or 1),
+                hora_desde=str(datos.get('hora_desde') or ''),
+                hora_hasta=str(datos.get('hora_hasta') or ''),
+                desde=str(datos.get('desde') or ''),
+                dias=int(datos.get('dias') or 7),
+                limite=int(datos.get('limite') or 20)
+            )
+        except (TypeError, ValueError):
+            raise ValueError("cupos_min, dias y limite deben ser números")
+        consulta.validar()
+        return consulta
+
+    def validar(self):
+        for hora in (self.hora_desde, self.hora_hasta):
+            if hora:
+                validar_hora(hora)
+        if self.desde:
+            try:
+                date.fromisoformat(self.desde)
+            except ValueError:
+                raise ValueError(f"Fecha inválida: {self.desde} (formato YYYY-MM-DD)")
+        if not 1 <= self.dias <= MAX_DIAS:
+            raise ValueError(f"dias debe estar entre 1 y {MAX_DIAS}")
+        if self.limite < 1:
+            raise ValueError("limite debe ser al menos 1")
+
+    def fechas(self) -> List[str]:
+        inicio = date.fromisoformat(self.desde) if self.desde else date.today()
+        return [(inicio + timedelta(days=i)).isoformat() for i in range(self.dias)]
+
+    def coincide_tiquetera(self, tiquetera: Tiquetera) -> bool:
+        deporte, sede = _grupo(tiquetera)
+        return normalizar(self.deporte) in deporte and normalizar(self.sede) in sede
+
+    def coincide_horario(self, horario: Horario) -> bool:
+        return (
+            (horario.cupos_disponibles or 0) >= self.cupos_min
+            and (not self.hora_desde or horario.hora_inicio >= self.hora_desde)
+            and (not self.hora_hasta or horario.hora_inicio <= self.hora_hasta)
+        )
+
+
+@dataclass
+class ResultadoBusqueda:
+    """Una franja encontrada, con la tiquetera con la que se reservaría"""
+    inicio: float  # Epoch de la hora de inicio
+    tiquetera: Tiquetera
+    horario: Horario
+
+
+class _Carga:
+    """Horarios de una tiquetera para un conjunto de fechas, ordenados por inicio"""
+
+    __slots__ = ('tiquetera', 'fechas', 'cargada_en', 'generacion', 'filas')
+
+    def __init__(self, tiquetera: Tiquetera, fechas: List[str], generacion: int,
+                 horarios_por_fecha: Dict[str, List[Horario]]):
+        self.tiquetera = tiquetera
+        self.fechas = frozenset(fechas)
+        self.cargada_en = time.monotonic()
+        self.generacion = generacion
+        self.filas = sorted(
+            ((epoch_franja(h)[0], h) for horarios in horarios_por_fecha.values() for h in horarios),
+            key=lambda fila: fila[0]
+        )
+
+
+class _Indice:
+    """Franjas de un (deporte, sede) en listas paralelas ordenadas por inicio"""
+
+    __slots__ = ('inicios', 'resultados')
+
+    def __init__(self, cargas: List[_Carga]):
+        filas = heapq.merge(
+            *[[ResultadoBusqueda(inicio, carga.tiquetera, h) for inicio, h in carga.filas] for carga in cargas],
+            key=lambda r: r.inicio
+        )
+        self.resultados: List[ResultadoBusqueda] = list(filas)
+        self.inicios: List[float] = [r.inicio for r in self.resultados]
+
+    def rango(self, desde: float, hasta: float) -> Iterator[ResultadoBusqueda]:
+        """Franjas con desde <= inicio < hasta, en orden"""
+        inicio = bisect.bisect_left(self.inicios, desde)
+        fin = bisect.bisect_left(self.inicios, hasta, lo=inicio)
+        return islice(self.resultados, inicio, fin)
+
+
+class BuscadorHorarios:
+    """
+    Índice de disponibilidad de las tiqueteras de un usuario
+
+    Una instancia por sesión de usuario (va en crear_sesion_usuario). Cada
+    búsqueda recarga solo las tiqueteras que coinciden con la consulta y
+    cuya carga venció, no cubre las fechas pedidas o es anterior a una
+    invalidación de horarios de la API (por ejemplo, una reserva exitosa).
+    """
+
+    def __init__(self, api: CompensarAPI, ttl: Optional[float] = None, max_workers: Optional[int] = None):
+        self.api = api
+        self.ttl = Config.SEARCH_INDEX_TTL if ttl is None else ttl
+        self.max_workers = max_workers or Config.HORARIOS_MAX_WORKERS
+        self._cargas: Dict[int, _Carga] = {}
+        self._indices: Dict[Tuple[str, str], _Indice] = {}
+        self._lock = threading.Lock()
+        self.busquedas = 0
+        self.recargas = 0
+
+    def _vigente(self, clave: int, fechas: List[str], ahora: float) -> bool:
+        carga = self._cargas.get(clave)
+        return (
+            carga is not None
+            and ahora - carga.cargada_en <= self.ttl
+            and carga.generacion == self.api.invalidaciones_horarios  # Nadie reservó desde la carga
+            and carga.fechas.issuperset(fechas)
+        )
+
+    def _cargar(self, tiquetera: Tiquetera, fechas: List[str]) -> _Carga:
+        generacion = self.api.invalidaciones_horarios
+        # En orden: la primera respuesta trae varias fechas y las siguientes salen del cache
+        return _Carga(tiquetera, fechas, generacion,
+                      {fecha: self.api.get_horarios(tiquetera, fecha) for fecha in fechas})
+
+    def actualizar(self, tiqueteras: List[Tiquetera], fechas: List[str], forzar: bool = False) -> int:
+        """
+        Recarga las tiqueteras vencidas (o todas con forzar) y reconstruye sus índices
+
+        Returns:
+            Número de tiqueteras recargadas
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            vencidas = [t for t in tiqueteras if forzar or not self._vigente(_clave_tiquetera(t), fechas, ahora)]
+        if not vencidas:
+            return 0
+
+        self.api.obtener_participantes()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(vencidas))) as executor:
+            cargas = list(executor.map(lambda t: self._cargar(t, fechas), vencidas))
+
+        with self._lock:
+            for carga in cargas:
+                self._cargas[_clave_tiquetera(carga.tiquetera)] = carga
+                self._indices.pop(_grupo(carga.tiquetera), None)
+            self.recargas += len(cargas)
+        logger.debug("Índice de búsqueda: %d tiqueteras recargadas para %d fechas", len(cargas), len(fechas))
+        return len(cargas)
+
+    def _indice(self, grupo: Tuple[str, str]) -> _Indice:
+        """Índice del grupo, reconstruido si alguna de sus cargas cambió (con el lock tomado)"""
+        indice = self._indices.get(grupo)
+        if indice is None:
+            indice = self._indices[grupo] = _Indice(
+                [c for c in self._cargas.values() if _grupo(c.tiquetera) == grupo]
+            )
+        return indice
+
+    def buscar(self, tiqueteras: List[Tiquetera], consulta: ConsultaHorarios,
+               ahora: Optional[float] = None) -> List[ResultadoBusqueda]:
+        """
+        Franjas que cumplen la consulta, de la más temprana a la más tardía
+
+        Args:
+            tiqueteras: Todas las tiqueteras del usuario; se usan las que coinciden
+            consulta: Criterios de búsqueda
+            ahora: Epoch actual; las franjas que ya empezaron se descartan
+        """
+        consulta.validar()
+        ahora = time.time() if ahora is None else ahora
+        fechas = consulta.fechas()
+        relevantes = [t for t in tiqueteras if consulta.coincide_tiquetera(t)]
+        claves = {_clave_tiquetera(t) for t in tiqueteras}
+        with self._lock:
+            # Tiqueteras que el usuario ya no tiene
+            for clave in [c for c in self._cargas if c not in claves]:
+                self._indices.pop(_grupo(self._cargas.pop(clave).tiquetera), None)
+        self.actualizar(relevantes, fechas)
+
+        desde = max(ahora, datetime.fromisoformat(fechas[0]).timestamp())
+        hasta = (datetime.fromisoformat(fechas[-1]) + timedelta(days=1)).timestamp()
+        with self._lock:
+            self.busquedas += 1
+            rangos = [self._indice(grupo).rango(desde, hasta) for grupo in {_grupo(t) for t in relevantes}]
+            coincidencias = (r for r in heapq.merge(*rangos, key=lambda r: r.inicio)
+                             if consulta.coincide_horario(r.horario))
+            return list(islice(coincidencias, consulta.limite))
+
+    def invalidar(self):
+        """Descarta todas las cargas (por ejemplo después de reservar)"""
+        with self._lock:
+            self._cargas.clear()
+            self._indices.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'tiqueteras': len(self._cargas),
+                'franjas': sum(len(c.filas) for c in self._cargas.values()),
+                'indices': len(self._indices),
+                'busquedas': self.busquedas,
+                'recargas': self.recargas
+            }
@@ -0,0 +1,123 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from config.config import Config
+from src.models.booking import Tiquetera
+
+
+class TiqueterasCache:
+    """
+    Cache de tiqueteras por usuario con estrategia stale-while-revalidate.
+
+    Si los datos están vencidos se retornan de inmediato y se refrescan en
+    un hilo de fondo. Mantiene índices por id para búsquedas O(1) sin red.
+    """
+
+    def __init__(self, api, ttl: Optional[float] = None):
+        self.api = api
+        self.ttl = Config.TIQUETERAS_CACHE_TTL if ttl is None else ttl
+        self._tiqueteras: List[Tiquetera] = []
+        self._por_id_tiquetera: Dict[str, Tiquetera] = {}
+        self._por_id: Dict[str, Tiquetera] = {}
+        self._actualizado = None
+        self._lock = threading.Lock()
+        self._refrescando = False
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refrescos = 0
+
+    def cargar(self, tiqueteras: List[Tiquetera]):
+        """Reemplaza el contenido del cache y reconstruye los índices"""
+        por_id_tiquetera = {str(t.id_tiquetera): t for t in tiqueteras}
+        por_id = {str(t.id): t for t in tiqueteras}
+        with self._lock:
+            self._tiqueteras = list(tiqueteras)
+            self._por_id_tiquetera = por_id_tiquetera
+            self._por_id = por_id
+            self._actualizado = time.monotonic()
+
+    def get_all(self) -> List[Tiquetera]:
+        """
+        Retorna las tiqueteras del usuario
+
+        Solo bloquea en la primera carga; los datos vencidos se sirven
+        mientras se refrescan en segundo plano.
+        """
+        with self._lock:
+            actualizado = self._actualizado
+            tiqueteras = self._tiqueteras
+
+        if actualizado is None:
+            with self._lock:
+                self.misses += 1
+            return self._refrescar()
+
+        if time.monotonic() - actualizado >= self.ttl:
+            with self._lock:
+                self.stale_hits += 1
+            self._refrescar_en_fondo()
+        else:
+            with self._lock:
+                self.hits += 1
+        return tiqueteras
+
+    def buscar(self, tiquetera_id: Any, campo: str = 'id_tiquetera') -> Optional[Tiquetera]:
+        """
+        Busca una tiquetera por id sin consultar la API (salvo la primera carga)
+
+        Args:
+            tiquetera_id: Id a buscar (se compara como string)
+            campo: 'id_tiquetera' o 'id'
+
+        Returns:
+            La Tiquetera encontrada o None
+        """
+        self.get_all()
+        indice = self._por_id if campo == 'id' else self._por_id_tiquetera
+        return indice.get(str(tiquetera_id))
+
+    def invalidar(self):
+        """Marca el cache como vacío para forzar una carga síncrona"""
+        with self._lock:
+            self._tiqueteras = []
+            self._por_id_tiquetera = {}
+            self._por_id = {}
+            self._actualizado = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna contadores de uso del cache"""
+        with self._lock:
+            edad = None if self._actualizado is None else time.monotonic() - self._actualizado
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refrescos': self.refrescos,
+                'tiqueteras': len(self._tiqueteras),
+                'edad_segundos': edad
+            }
+
+    def _refrescar(self) -> List[Tiquetera]:
+        tiqueteras = self.api.get_tiqueteras()
+        with self._lock:
+            self.refrescos += 1
+        # get_tiqueteras retorna [] ante errores: no pisar datos buenos con eso
+        if tiqueteras:
+            self.cargar(tiqueteras)
+        return tiqueteras or self._tiqueteras
+
+    def _refrescar_en_fondo(self):
+        with self._lock:
+            if self._refrescando:
+                return
+            self._refrescando = True
+
+        def tarea():
+            try:
+                self._refrescar()
+            finally:
+                with self._lock:
+                    self._refrescando = False
+
+        threading.Thread(target=tarea, daemon=True).start()
@@ -0,0 +1,196 @@
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from config.config import Config
+from src.api.debug_buffer import BufferIntercambios
+
+# Respuestas que vale la pena reintentar en lecturas idempotentes
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+# El proxy se cansó de esperar: una escritura pudo aplicarse en el servidor
+ESTADOS_INCIERTOS = {504}
+
+_transportes = weakref.WeakKeyDictionary()
+_transportes_lock = threading.Lock()
+
+
+def configurar_transporte(session) -> 'TransporteHTTP':
+    """
+    Retorna el transporte de una sesión, creándolo y montándolo una sola vez
+
+    CompensarAuth y CompensarAPI comparten la misma sesión, así que ambos
+    obtienen el mismo transporte (y las mismas estadísticas).
+    """
+    with _transportes_lock:
+        transporte = _transportes.get(session)
+        if transporte is None:
+            transporte = TransporteHTTP(session)
+            _transportes[session] = transporte
+        return transporte
+
+
+class TransporteHTTP:
+    """
+    Capa de transporte sobre requests.Session: pool dimensionado con
+    keep-alive, timeouts por endpoint, reintentos con backoff y jitter
+    para lecturas idempotentes y precalentamiento de conexiones.
+
+    Cada intercambio queda en un ring buffer (`intercambios`) para depuración.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.intercambios = BufferIntercambios()
+        self._lock = threading.Lock()
+        self.peticiones = 0
+        self.reintentos = 0
+        self.timeouts = 0
+        self.errores_conexion = 0
+        self._montar()
+
+    def _montar(self):
+        # Las sesiones falsas de las pruebas no tienen adapters
+        if not isinstance(self.session, requests.Session):
+            return
+        adapter = HTTPAdapter(
+            pool_connections=Config.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+            max_retries=0  # Los reintentos se controlan aquí, solo para lecturas
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.setdefault('Connection', 'keep-alive')
+
+    @staticmethod
+    def timeout(endpoint: str) -> Tuple[float, float]:
+        """Timeout (connect, read) configurado para un endpoint"""
+        return Config.HTTP_TIMEOUTS.get(endpoint, Config.HTTP_TIMEOUTS['default'])
+
+    def get(self, endpoint: str, url: str, reintentar: bool = False, **kwargs) -> requests.Response:
+        return self.request('get', endpoint, url, reintentar, **kwargs)
+
+    def post(self, endpoint: str, url: str, reintentar: bool = False, **kwargs) -> requests.Response:
+        return self.request('post', endpoint, url, reintentar, **kwargs)
+
+    def head(self, endpoint: str, url: str, reintentar: bool = False, **kwargs) -> requests.Response:
+        return self.request('head', endpoint, url, reintentar, **kwargs)
+
+    def request(self, metodo: str, endpoint: str, url: str, reintentar: bool = False,
+                **kwargs) -> requests.Response:
+        """
+        Ejecuta una petición con el timeout del endpoint
+
+        Args:
+            metodo: 'get', 'post' o 'head'
+            endpoint: Nombre del endpoint en HTTP_TIMEOUTS
+            url: URL completa
+            reintentar: Reintentar errores de red y 5xx (solo para lecturas idempotentes)
+            **kwargs: Argumentos para requests
+
+        Returns:
+            La respuesta de requests
+        """
+        kwargs.setdefault('timeout', self.timeout(endpoint))
+        intentos = 1 + (Config.HTTP_RETRIES if reintentar else 0)
+        enviar = getattr(self.session, metodo)
+
+        for intento in range(intentos):
+            ultimo = intento == intentos - 1
+            with self._lock:
+                self.peticiones += 1
+            inicio = time.perf_counter()
+            try:
+                response = enviar(url, **kwargs)
+            except requests.Timeout as e:
+                self._registrar(metodo, endpoint, url, kwargs, inicio, error=str(e))
+                with self._lock:
+                    self.timeouts += 1
+                if ultimo:
+                    raise
+            except requests.ConnectionError as e:
+                self._registrar(metodo, endpoint, url, kwargs, inicio, error=str(e))
+                with self._lock:
+                    self.errores_conexion += 1
+                if ultimo:
+                    raise
+            else:
+                self._registrar(metodo, endpoint, url, kwargs, inicio, response=response)
+                if ultimo or response.status_code not in ESTADOS_REINTENTABLES:
+                    return response
+
+            with self._lock:
+                self.reintentos += 1
+            time.sleep(self._backoff(intento))
+
+    def _registrar(self, metodo: str, endpoint: str, url: str, kwargs: Dict[str, Any],
+                   inicio: float, response=None, error: Optional[str] = None):
+        self.intercambios.registrar(
+            metodo=metodo,
+            endpoint=endpoint,
+            url=url,
+            status=getattr(response, 'status_code', None),
+            latencia_ms=(time.perf_counter() - inicio) * 1000,
+            request_body=kwargs.get('json', kwargs.get('data')),
+            response_body=getattr(response, 'content', None),
+            error=error
+        )
+
+    @staticmethod
+    def _backoff(intento: int) -> float:
+        # Backoff exponencial con "full jitter" para no sincronizar reintentos entre usuarios
+        tope = min(Config.HTTP_BACKOFF_MAX, Config.HTTP_BACKOFF_BASE * (2 ** intento))
+        return random.uniform(0, tope)
+
+    def calentar(self, cantidad: int = 1) -> int:
+        """
+        Abre conexiones TLS hacia API_BASE_URL para que queden en el pool
+
+        Las peticiones se hacen en paralelo para que el pool conserve
+        `cantidad` conexiones vivas (keep-alive) listas para reutilizar.
+
+        Returns:
+            Número de conexiones que respondieron
+        """
+        def abrir(_):
+            try:
+                self.head('warmup', Config.API_BASE_URL, allow_redirects=False)
+                return True
+            except requests.RequestException:
+                return False
+
+        cantidad = max(1, min(cantidad, Config.HTTP_POOL_MAXSIZE))
+        with ThreadPoolExecutor(max_workers=cantidad) as executor:
+            return sum(executor.map(abrir, range(cantidad)))
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Peticiones, conexiones abiertas y tasa de reutilización de conexiones"""
+        conexiones = 0
+        peticiones_pool = 0
+        adapters = getattr(self.session, 'adapters', {})
+        vistos = set()
+        for adapter in adapters.values():
+            if id(adapter) in vistos or not hasattr(adapter, 'poolmanager'):
+                continue
+            vistos.add(id(adapter))
+            pools = adapter.poolmanager.pools
+            for clave in list(pools.keys()):
+                pool = pools.get(clave)
+                if pool is None:
+                    continue
+                conexiones += pool.num_connections
+                peticiones_pool += pool.num_requests
+
+        with self._lock:
+            return {
+                'peticiones': self.peticiones,
+                'reintentos': self.reintentos,
+                'timeouts': self.timeouts,
+                'errores_conexion': self.errores_conexion,
+                'conexiones_abiertas': conexiones,
+                'peticiones_pool': peticiones_pool,
+                'reutilizacion': (1 - conexiones / peticiones_pool) if peticiones_pool else 0.0
+            }
@@ -1,12 +1,17 @@
+import logging
 import requests
 from bs4 import BeautifulSoup
 from config.config import Config
+from src.api.transport import configurar_transporte
+
+logger = logging.getLogger(__name__)
 
 class CompensarAuth:
     """Maneja la autenticación con el sistema de Compensar"""
     
     def __init__(self):
         self.session = requests.Session()
+        self.transporte = configurar_transporte(self.session)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
@@ -26,8 +31,8 @@ class CompensarAuth:
             True si el login fue exitoso, False en caso contrario
         """
         try:
-            print("🔐 Iniciando sesión en Compensar...")
-            print(f"   Tipo: {document_type}, Documento: {document_number}")
+            logger.info("Iniciando sesión en Compensar")
+            logger.debug("Tipo: %s, Documento: %s", document_type, document_number)
             
             # Actualizar headers para simular un navegador real
             self.session.headers.update({
@@ -40,7 +45,7 @@ class CompensarAuth:
             })
             
             # Intentar con plataformabienestar.com (endpoint encontrado)
-            print("   Paso 1: Intentando login con plataformabienestar.com...")
+            logger.debug("Paso 1: Intentando login con plataformabienestar.com")
             
             login_payload = {
                 "username": document_number,
@@ -48,40 +53,42 @@ class CompensarAuth:
                 "documentType": document_type
             }
             
-            login_response = self.session.post(
+            login_response = self.transporte.post(
+                'login',
                 "https://www.plataformabienestar.com/auth/login",
                 json=login_payload
             )
             
-            print(f"   Status: {login_response.status_code}")
+            logger.debug("Status: %s", login_response.status_code)
             
             if login_response.status_code == 200:
-                print("   ✅ Login exitoso en plataformabienestar.com")
+                logger.debug("Login exitoso en plataformabienestar.com")
                 
                 # Verificar con tiqueteras
-                print("   Paso 2: Verificando acceso a tiqueteras...")
-                test_response = self.session.get(
+                logger.debug("Paso 2: Verificando acceso a tiqueteras")
+                test_response = self.transporte.get(
+                    'tiqueteras',
                     f"{Config.API_BASE_URL}{Config.TIQUETERAS_ENDPOINT}",
                     params={'autenticador': 'compensar'}
                 )
                 
-                print(f"   Status tiqueteras: {test_response.status_code}")
+                logger.debug("Status tiqueteras: %s", test_response.status_code)
                 
                 if test_response.status_code == 200:
                     try:
                         data = test_response.json()
                         if data.get('tiqueteras'):
                             self.authenticated = True
-                            print("✅ Login exitoso - Tiqueteras encontradas")
+                            logger.info("Login exitoso - Tiqueteras encontradas")
                             return True
                     except:
                         pass
             
             # Si falla, intentar con el método original pero con el formulario correcto
-            print("   Paso 3: Intentando método alternativo...")
+            logger.debug("Paso 3: Intentando método alternativo")
             
             # Primero obtener la página para cookies y CSRF
-            initial_response = self.session.get(Config.LOGIN_URL)
+            initial_response = self.transporte.get('login', Config.LOGIN_URL)
             
             # Intentar POST al mismo URL (action vacío significa mismo URL)
             form_data = {
@@ -91,16 +98,18 @@ class CompensarAuth:
                 'serviceProviderName': 'HER-SP'
             }
             
-            login_response2 = self.session.post(
+            login_response2 = self.transporte.post(
+                'login',
                 Config.LOGIN_URL,
                 data=form_data,
                 allow_redirects=True
             )
             
-            print(f"   Status método alternativo: {login_response2.status_code}")
+            logger.debug("Status método alternativo: %s", login_response2.status_code)
             
             # Verificar con tiqueteras
-            test_response2 = self.session.get(
+            test_response2 = self.transporte.get(
+                'tiqueteras',
                 f"{Config.API_BASE_URL}{Config.TIQUETERAS_ENDPOINT}",
                 params={'autenticador': 'compensar'}
             )
@@ -110,23 +119,20 @@ class CompensarAuth:
                     data = test_response2.json()
                     if data.get('tiqueteras'):
                         self.authenticated = True
-                        print("✅ Login exitoso - Método alternativo")
+                        logger.info("Login exitoso - Método alternativo")
                         return True
                 except:
                     pass
             
-            print("❌ Login fallido - Verifica tus credenciales")
-            if Config.DEBUG:
-                print(f"   Respuesta plataformabienestar: {login_response.text[:500]}")
-                print(f"   Respuesta alternativa: {login_response2.text[:500]}")
+            logger.error("Login fallido - Verifica tus credenciales")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Respuesta plataformabienestar: %s", login_response.text[:500])
+                logger.debug("Respuesta alternativa: %s", login_response2.text[:500])
             
             return False
             
         except Exception as e:
-            print(f"❌ Error durante el login: {str(e)}")
-            if Config.DEBUG:
-                import traceback
-                traceback.print_exc()
+            logger.error("Error durante el login: %s", e, exc_info=Config.DEBUG)
             return False
     
     def get_user_id(self) -> str:
@@ -141,8 +147,10 @@ class CompensarAuth:
         
         try:
             # Hacer request al endpoint de tiqueteras
-            response = self.session.get(
+            response = self.transporte.get(
+                'tiqueteras',
                 f"{Config.API_BASE_URL}{Config.TIQUETERAS_ENDPOINT}",
+                reintentar=True,
                 params={'autenticador': 'compensar'}
             )
             
@@ -155,7 +163,7 @@ class CompensarAuth:
             raise Exception("No se pudo obtener el ID de usuario")
             
         except Exception as e:
-            print(f"❌ Error obteniendo ID de usuario: {str(e)}")
+            logger.error("Error obteniendo ID de usuario: %s", e)
             raise
     
     def is_authenticated(self) -> bool:
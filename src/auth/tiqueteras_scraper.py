@@ -0,0 +1,70 @@
+import logging
+from typing import Any, Dict, List
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# Textos de las labels que no son centro, sede ni deporte
+_LABELS_IGNORADAS = ('nov.', 'dic.', 'días restantes', 'ilimitada', 'prioridad')
+
+
+def _es_tiquetera(ng_repeat) -> bool:
+    return bool(ng_repeat) and 'tiquetera in controller.tiqueteras.tiqueteras' in ng_repeat
+
+
+def extraer_tiqueteras_html(page_source: str) -> List[Dict[str, Any]]:
+    """
+    Extrae las tiqueteras del HTML renderizado de la página de reservas
+
+    Función pura (sin navegador ni disco) para poder probarla y medirla
+    contra los HTML guardados.
+
+    Args:
+        page_source: HTML después de que Angular renderizó las tiqueteras
+
+    Returns:
+        Dicts con el formato de tiqueteras_cache.json (vacío si no hay tiqueteras)
+    """
+    soup = BeautifulSoup(page_source, 'html.parser')
+    # Están en divs con ng-repeat="tiquetera in controller.tiqueteras.tiqueteras"
+    tiquetera_divs = soup.find_all('div', {'ng-repeat': _es_tiquetera})
+
+    tiqueteras = []
+    for idx, div in enumerate(tiquetera_divs):
+        try:
+            # Extraer nombre (en h5 > strong)
+            nombre_elem = div.find('h5')
+            nombre = nombre_elem.find('strong').get_text(strip=True) if nombre_elem else f"Tiquetera {idx+1}"
+
+            # Extraer todas las labels
+            labels = div.find_all('label', class_='progress-label')
+
+            # Determinar si es ilimitada
+            ilimitado = any('ilimitada' in label.get_text().lower() for label in labels)
+
+            # Extraer sede, centro, deporte (están en labels sin clase especial)
+            label_texts = [label.get_text(strip=True) for label in labels if 'nombre-plan' not in label.get('class', [])]
+
+            # Filtrar textos vacíos y fechas
+            info_labels = [
+                text for text in label_texts
+                if text and not any(ignorada in text.lower() for ignorada in _LABELS_IGNORADAS)
+            ]
+
+            tiqueteras.append({
+                'id': idx + 1,
+                'nombre': nombre,
+                'nombre_centro_entrenamiento': info_labels[0] if len(info_labels) > 0 else nombre,
+                'nombre_sede': info_labels[1] if len(info_labels) > 1 else info_labels[0] if len(info_labels) > 0 else 'Desconocida',
+                'nombre_deporte': info_labels[2] if len(info_labels) > 2 else 'Acondicionamiento',
+                'ilimitado': ilimitado,
+                'entradas': 0 if ilimitado else 10,  # Valor por defecto
+                'id_centro_entrenamiento': idx + 1,
+                'id_participacion_deportista': 4626802  # Del debug_deportistas.json
+            })
+
+        except Exception as e:
+            logger.warning("Error procesando tiquetera %s: %s", idx+1, e)
+            continue
+
+    return tiqueteras
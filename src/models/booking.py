@@ -11,14 +11,14 @@ class Tiquetera:
     nombre_deporte: str
     id_centro_entrenamiento: int
     id_participacion_deportista: int
-    entradas: int
+    entradas: Optional[int]  # None si la API no envió el dato
     ilimitado: bool
     id_tiquetera: int = 0  # ID real de la tiquetera en el sistema
     id_escenario: int = 0  # ID del escenario/sede
     id_centro: int = 0  # ID del centro
     
     def __str__(self):
-        entradas_str = "Ilimitadas" if self.ilimitado else str(self.entradas)
+        entradas_str = "Ilimitadas" if self.ilimitado else ("?" if self.entradas is None else str(self.entradas))
         return f"{self.nombre_centro_entrenamiento} - {self.nombre_sede} ({self.nombre_deporte}) - Entradas: {entradas_str}"
 
 
@@ -56,3 +56,44 @@ class Reserva:
             "hora_fin": self.horario.hora_fin,
             "id_turno": self.horario.id_turno
         }
+
+
+@dataclass
+class ResultadoReserva:
+    """Resultado de intentar una reserva contra la API"""
+    reserva: Reserva
+    exitosa: bool
+    mensaje: str = ""
+    latencia_ms: float = 0.0
+    omitida: bool = False  # True si no se envió al servidor (ej: sin entradas)
+    motivo: str = ""  # Por qué se omitió: 'sin_datos', 'sin_cupos' o 'sin_entradas'
+    incierta: bool = False  # Se envió pero no hubo respuesta (timeout): el servidor pudo guardarla
+    
+    @property
+    def estado(self) -> str:
+        """'exitosa', 'fallida', 'omitida' o 'incierta'"""
+        if self.exitosa:
+            return "exitosa"
+        if self.omitida:
+            return "omitida"
+        return "incierta" if self.incierta else "fallida"
+
+    def __str__(self):
+        return f"{self.reserva} - {self.estado}: {self.mensaje} ({self.latencia_ms:.0f} ms)"
+    
+    def to_dict(self):
+        """Convierte el resultado a un diccionario serializable"""
+        return {
+            "tiquetera": self.reserva.tiquetera.nombre_centro_entrenamiento,
+            "sede": self.reserva.tiquetera.nombre_sede,
+            "fecha": self.reserva.horario.fecha,
+            "hora_inicio": self.reserva.horario.hora_inicio,
+            "hora_fin": self.reserva.horario.hora_fin,
+            "exitosa": self.exitosa,
+            "omitida": self.omitida,
+            "motivo": self.motivo,
+            "incierta": self.incierta,
+            "estado": self.estado,
+            "mensaje": self.mensaje,
+            "latencia_ms": round(self.latencia_ms, 1)
+        }
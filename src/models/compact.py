@@ -0,0 +1,252 @@
+"""
+Variantes compactas de los modelos para escanear muchas franjas
+
+Mismos campos que Tiquetera, Horario y Reserva, pero sin __dict__ (__slots__
+o tupla), inmutables y hashables (sirven como claves de dict o en sets). Los
+horarios parseados con un Internador comparten las subestructuras que se
+repiten en cada franja (caracteristicas, centroEntrenamiento) y las
+cadenas de fecha y hora, en lugar de guardar una copia por franja.
+
+El internado ahorra memoria retenida, no tiempo: parsear con Internador es
+más lento que parsear_horarios (ver `python -m benchmarks.microbench`).
+"""
+
+import sys
+from dataclasses import FrozenInstanceError
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+from src.models.booking import Tiquetera, Horario, Reserva
+
+_nueva_tupla = tuple.__new__
+
+# Claves de raw_data que se repiten idénticas en todas las franjas de un centro
+SUBESTRUCTURAS_COMPARTIDAS = ('caracteristicas', 'centroEntrenamiento')
+MAX_RECIENTES = 16  # Más que las zonas de una franja en los centros conocidos
+
+
+def _congelar(valor: Any) -> Any:
+    """Versión hashable de un valor JSON, para usarlo como clave de internado"""
+    if isinstance(valor, dict):
+        clave = tuple(valor.items())
+        try:
+            hash(clave)  # Lo común: un dict plano de escalares
+            return clave
+        except TypeError:
+            return tuple((k, _congelar(v)) for k, v in clave)
+    if isinstance(valor, list):
+        return ('__lista__',) + tuple(map(_congelar, valor))
+    return valor
+
+
+class Internador:
+    """
+    Tabla de valores compartidos entre franjas
+
+    Una instancia por lote de respuestas (por ejemplo, un escaneo de la
+    semana). Los dicts internados son compartidos: no deben modificarse.
+    """
+
+    def __init__(self):
+        self._estructuras: Dict[Any, Any] = {}
+        # Últimas subestructuras usadas por clave: las franjas seguidas suelen
+        # repetirlas y comparar con == es más barato que congelar
+        self._recientes: Dict[str, List[Any]] = {clave: [] for clave in SUBESTRUCTURAS_COMPARTIDAS}
+
+    def cadena(self, texto: str) -> str:
+        return sys.intern(texto)
+
+    def estructura(self, valor: Any) -> Any:
+        """La primera copia igual a `valor` que se vio, o `valor` si es nuevo"""
+        if not isinstance(valor, (dict, list)):
+            return valor
+        return self._estructuras.setdefault(_congelar(valor), valor)
+
+    def raw_data(self, info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        `info` con las subestructuras repetidas cambiadas por las compartidas
+
+        No modifica `info`: si hay algo que cambiar retorna una copia
+        superficial; si ya usa las compartidas retorna el mismo dict.
+        """
+        copia = None
+        for clave in SUBESTRUCTURAS_COMPARTIDAS:
+            valor = info.get(clave)
+            if valor is None:
+                continue
+            recientes = self._recientes[clave]
+            for compartida in recientes:
+                if compartida is valor or compartida == valor:
+                    break
+            else:
+                compartida = self.estructura(valor)
+                recientes.insert(0, compartida)
+                del recientes[MAX_RECIENTES:]
+            if compartida is not valor:
+                if copia is None:
+                    copia = dict(info)
+                copia[clave] = compartida
+        return info if copia is None else copia
+
+    def __len__(self) -> int:
+        return len(self._estructuras)
+
+
+class _Inmutable:
+    """
+    Base de las clases con __slots__ de este módulo
+
+    Los campos son los __slots__ de la subclase: se asignan una vez en
+    __init__ y definen la igualdad, el hash y el repr. No es un dataclass
+    con slots=True porque eso requiere Python 3.10.
+    """
+    __slots__ = ()
+
+    def __init__(self, *valores: Any):
+        for campo, valor in zip(self.__slots__, valores):
+            object.__setattr__(self, campo, valor)
+
+    def _valores(self) -> tuple:
+        return tuple(getattr(self, campo) for campo in self.__slots__)
+
+    def __setattr__(self, campo: str, valor: Any):
+        raise FrozenInstanceError(f"cannot assign to field '{campo}'")
+
+    def __delattr__(self, campo: str):
+        raise FrozenInstanceError(f"cannot delete field '{campo}'")
+
+    def __eq__(self, otro: Any) -> bool:
+        if otro.__class__ is not self.__class__:
+            return NotImplemented
+        return self._valores() == otro._valores()
+
+    def __hash__(self) -> int:
+        return hash(self._valores())
+
+    def __repr__(self) -> str:
+        campos = ', '.join(f'{campo}={getattr(self, campo)!r}' for campo in self.__slots__)
+        return f'{self.__class__.__name__}({campos})'
+
+    def __reduce__(self):
+        return self.__class__, self._valores()
+
+
+class TiqueteraCompacta(_Inmutable):
+    """Tiquetera inmutable y hashable"""
+    __slots__ = ('id', 'nombre_centro_entrenamiento', 'nombre_sede', 'nombre_deporte', 'id_centro_entrenamiento',
+                 'id_participacion_deportista', 'entradas', 'ilimitado', 'id_tiquetera', 'id_escenario', 'id_centro')
+
+    def __init__(self, id: int, nombre_centro_entrenamiento: str, nombre_sede: str, nombre_deporte: str,
+                 id_centro_entrenamiento: int, id_participacion_deportista: int, entradas: Optional[int],
+                 ilimitado: bool, id_tiquetera: int = 0, id_escenario: int = 0, id_centro: int = 0):
+        super().__init__(id, nombre_centro_entrenamiento, nombre_sede, nombre_deporte, id_centro_entrenamiento,
+                         id_participacion_deportista, entradas, ilimitado, id_tiquetera, id_escenario, id_centro)
+
+    __str__ = Tiquetera.__str__
+
+    @classmethod
+    def desde_dict(cls, t: Dict[str, Any]) -> 'TiqueteraCompacta':
+        """Desde un item de la respuesta de tiqueteras, con los mismos valores por defecto que parsear_tiqueteras"""
+        return cls(
+            t.get('id'),
+            sys.intern(t.get('nombre_centro_entrenamiento', 'Desconocido')),
+            sys.intern(t.get('nombre_sede', 'Desconocida')),
+            sys.intern(t.get('nombre_deporte', 'Desconocido')),
+            t.get('id_centro_entrenamiento'),
+            t.get('id_participacion_deportista'),
+            t.get('entradas'),
+            t.get('ilimitado', False),
+            t.get('id_tiquetera', t.get('id', 0)),
+            t.get('id_escenario', t.get('id_centro_entrenamiento', 0)),
+            t.get('id_centro', t.get('id_centro_entrenamiento', 0))
+        )
+
+    @classmethod
+    def desde_tiquetera(cls, t: Union[Tiquetera, 'TiqueteraCompacta']) -> 'TiqueteraCompacta':
+        if isinstance(t, cls):
+            return t
+        return cls(t.id, t.nombre_centro_entrenamiento, t.nombre_sede, t.nombre_deporte,
+                   t.id_centro_entrenamiento, t.id_participacion_deportista, t.entradas, t.ilimitado,
+                   t.id_tiquetera, t.id_escenario, t.id_centro)
+
+    def a_tiquetera(self) -> Tiquetera:
+        return Tiquetera(self.id, self.nombre_centro_entrenamiento, self.nombre_sede, self.nombre_deporte,
+                         self.id_centro_entrenamiento, self.id_participacion_deportista, self.entradas,
+                         self.ilimitado, self.id_tiquetera, self.id_escenario, self.id_centro)
+
+
+class HorarioCompacto(NamedTuple):
+    """
+    Horario inmutable y hashable
+
+    Es una tupla con nombre y no un dataclass con slots porque se crea una
+    por franja y la construcción de un dataclass frozen cuesta casi cuatro
+    veces más. raw_data no participa en la igualdad ni en el hash: dos
+    franjas son la misma si coinciden fecha, horas, cupos, turno y clase.
+    """
+    fecha: str
+    hora_inicio: str
+    hora_fin: str
+    cupos_disponibles: int
+    id_turno: Optional[int] = None
+    nombre_clase: str = ""
+    raw_data: Optional[Dict[str, Any]] = None
+
+    __str__ = Horario.__str__
+
+    def __eq__(self, otro: Any) -> bool:
+        if not isinstance(otro, HorarioCompacto):
+            return NotImplemented
+        return self[:6] == otro[:6]
+
+    def __ne__(self, otro: Any) -> bool:
+        igual = self.__eq__(otro)
+        return igual if igual is NotImplemented else not igual
+
+    def __hash__(self) -> int:
+        return hash(self[:6])
+
+    def __repr__(self) -> str:
+        return (f"HorarioCompacto(fecha={self.fecha!r}, hora_inicio={self.hora_inicio!r}, "
+                f"hora_fin={self.hora_fin!r}, cupos_disponibles={self.cupos_disponibles!r}, "
+                f"id_turno={self.id_turno!r}, nombre_clase={self.nombre_clase!r})")
+
+    @classmethod
+    def desde_api(cls, fecha: str, hora_inicio: str, hora_fin: str, cupos: int, id_turno: Any,
+                  nombre_clase: str, info: Dict[str, Any],
+                  internador: Optional[Internador] = None) -> 'HorarioCompacto':
+        """Desde una zona de la respuesta de horarios; con internador comparte cadenas y subestructuras"""
+        if internador is not None:
+            fecha = internador.cadena(fecha)
+            hora_inicio = internador.cadena(hora_inicio)
+            hora_fin = internador.cadena(hora_fin)
+            nombre_clase = internador.cadena(nombre_clase)
+            info = internador.raw_data(info)
+        return _nueva_tupla(cls, (fecha, hora_inicio, hora_fin, cupos, id_turno, nombre_clase, info))
+
+    @classmethod
+    def desde_horario(cls, h: Union[Horario, 'HorarioCompacto']) -> 'HorarioCompacto':
+        if isinstance(h, cls):
+            return h
+        return cls(h.fecha, h.hora_inicio, h.hora_fin, h.cupos_disponibles, h.id_turno, h.nombre_clase, h.raw_data)
+
+    def a_horario(self) -> Horario:
+        return Horario(*self)
+
+
+class ReservaCompacta(_Inmutable):
+    """Reserva inmutable y hashable; sirve donde se espera una Reserva (payload_reserva, to_api_payload)"""
+    __slots__ = ('tiquetera', 'horario')
+
+    def __init__(self, tiquetera: TiqueteraCompacta, horario: HorarioCompacto):
+        super().__init__(tiquetera, horario)
+
+    __str__ = Reserva.__str__
+    to_api_payload = Reserva.to_api_payload
+
+    @classmethod
+    def desde_reserva(cls, r: Union[Reserva, 'ReservaCompacta']) -> 'ReservaCompacta':
+        if isinstance(r, cls):
+            return r
+        return cls(TiqueteraCompacta.desde_tiquetera(r.tiquetera), HorarioCompacto.desde_horario(r.horario))
+
+    def a_reserva(self) -> Reserva:
+        return Reserva(self.tiquetera.a_tiquetera(), self.horario.a_horario())
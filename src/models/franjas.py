@@ -0,0 +1,85 @@
+"""
+Utilidades de franjas compartidas por la búsqueda, el carrito y el vigilante
+
+Comparar textos sin tildes, validar horas 'HH:MM' y llevar una franja a
+epoch. Dependen solo de los modelos, así que src.api y src.scheduler las
+usan sin importarse entre sí.
+"""
+
+import re
+import unicodedata
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
+from src.models.booking import Horario
+
+if TYPE_CHECKING:
+    from src.models.compact import HorarioCompacto
+
+HorarioLike = Union[Horario, 'HorarioCompacto']
+
+HORA = re.compile(r'^\d{2}:\d{2}$')
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """Minúsculas y sin tildes, para comparar 'natacion' con 'Natación'"""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower().strip()
+
+
+def validar_hora(hora: str):
+    """
+    Verifica que hora sea 'HH:MM' y exista (rechaza 25:00 o 06:75)
+
+    Raises:
+        ValueError: si el formato o la hora son inválidos
+    """
+    if not isinstance(hora, str) or not HORA.match(hora):
+        raise ValueError(f"Hora inválida: {hora} (formato HH:MM)")
+    try:
+        datetime.strptime(hora, '%H:%M')
+    except ValueError:
+        raise ValueError(f"Hora inválida: {hora} (formato HH:MM)")
+
+
+# (fecha, hora) -> epoch local, para franjas sin timestamp
+_epochs: Dict[Tuple[str, str], float] = {}
+
+
+def epoch_franja(horario: HorarioLike) -> Tuple[float, float]:
+    """
+    (inicio, fin) de la franja en segundos epoch
+
+    Usa timestamp/timestamp_fin de raw_data cuando vienen; si no, la fecha y
+    las horas en hora local (con cache, porque se repiten en cada zona).
+    """
+    raw = horario.raw_data if isinstance(horario.raw_data, dict) else {}
+    inicio = raw.get('timestamp')
+    fin = raw.get('timestamp_fin')
+    if inicio is None:
+        clave = (horario.fecha, horario.hora_inicio)
+        inicio = _epochs.get(clave)
+        if inicio is None:
+            inicio = _epochs[clave] = datetime.fromisoformat(f'{horario.fecha}T{horario.hora_inicio}').timestamp()
+    if fin is None:
+        clave = (horario.fecha, horario.hora_fin)
+        fin = _epochs.get(clave)
+        if fin is None:
+            fin = _epochs[clave] = datetime.fromisoformat(f'{horario.fecha}T{horario.hora_fin}').timestamp()
+    return float(inicio), float(fin)
+
+
+def utilizacion_franja(horario: HorarioLike) -> Optional[float]:
+    """
+    Ocupación de la franja en porcentaje (0-100)
+
+    Usa totalUtilizado de raw_data; si no viene, la calcula con conteo y
+    totalTurnos. None si la respuesta no trae ninguno de los dos.
+    """
+    raw = horario.raw_data if isinstance(horario.raw_data, dict) else {}
+    utilizado = raw.get('totalUtilizado')
+    if utilizado is not None:
+        return float(utilizado)
+    total = raw.get('totalTurnos')
+    if total:
+        return 100.0 * (1 - (horario.cupos_disponibles or 0) / total)
+    return None
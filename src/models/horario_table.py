@@ -0,0 +1,159 @@
+"""
+Tabla columnar de horarios para filtrar y ordenar miles de franjas
+
+Cada columna es un array de la biblioteca estándar (inicio y fin en epoch,
+cupos, totalUtilizado, id de turno), así que una tabla de una semana de
+todas las tiqueteras ocupa unos pocos bytes por franja y columna. Los
+filtros y el orden recorren las columnas con map/compress/sorted, que
+iteran en C sin crear objetos por franja; los horarios originales solo se
+tocan al materializar el resultado.
+"""
+
+import operator
+from array import array
+from itertools import compress, repeat
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from src.models.franjas import HorarioLike, epoch_franja
+
+# Columnas numéricas y su typecode
+COLUMNAS = {'inicio': 'd', 'fin': 'd', 'cupos': 'q', 'utilizacion': 'd', 'ids': 'q'}
+
+# id de turno no numérico (el respaldo 'turnos' trae cadenas como "t35301149")
+SIN_ID = -1
+
+
+def _tomar(secuencia: Sequence, indices: List[int]) -> Tuple:
+    """secuencia[i] para cada índice, con itemgetter (un solo recorrido en C)"""
+    if len(indices) > 1:
+        return operator.itemgetter(*indices)(secuencia)
+    return tuple(secuencia[i] for i in indices)
+
+
+def _fila(horario: HorarioLike) -> Tuple[float, float, int, float, int]:
+    inicio, fin = epoch_franja(horario)
+    raw = horario.raw_data if isinstance(horario.raw_data, dict) else {}
+    id_turno = horario.id_turno if isinstance(horario.id_turno, int) else SIN_ID
+    return inicio, fin, horario.cupos_disponibles or 0, float(raw.get('totalUtilizado') or 0), id_turno
+
+
+class HorarioTable:
+    """
+    Horarios en columnas (array) con la lista de objetos al lado
+
+    Las operaciones retornan tablas nuevas; la tabla original no cambia.
+
+    Ejemplo:
+        tabla = HorarioTable.desde_respuesta(parsear_horarios_compacto(data, internador))
+        tabla.filtrar(cupos_min=1, desde=ahora).ordenar('utilizacion', 'inicio')
+        tabla.consultar(orden=('utilizacion', 'inicio'), limite=10, cupos_min=1, desde=ahora)
+    """
+
+    __slots__ = ('horarios',) + tuple(COLUMNAS)
+
+    def __init__(self, horarios: Iterable[HorarioLike] = ()):
+        self.horarios: List[HorarioLike] = list(horarios)
+        filas = [_fila(h) for h in self.horarios]
+        for nombre, columna in zip(COLUMNAS, zip(*filas) if filas else repeat((), len(COLUMNAS))):
+            setattr(self, nombre, array(COLUMNAS[nombre], columna))
+
+    @classmethod
+    def desde_respuesta(cls, horarios_por_fecha: Dict[str, Sequence[HorarioLike]]) -> 'HorarioTable':
+        """Desde {fecha: [Horario]} (salida de parsear_horarios o parsear_horarios_compacto)"""
+        return cls(h for horarios in horarios_por_fecha.values() for h in horarios)
+
+    @classmethod
+    def _desde_columnas(cls, horarios: List[HorarioLike], columnas: Dict[str, array]) -> 'HorarioTable':
+        tabla = cls.__new__(cls)
+        tabla.horarios = horarios
+        for nombre, columna in columnas.items():
+            setattr(tabla, nombre, columna)
+        return tabla
+
+    def __len__(self) -> int:
+        return len(self.horarios)
+
+    def __iter__(self) -> Iterator[HorarioLike]:
+        return iter(self.horarios)
+
+    def __getitem__(self, indice: Union[int, slice]) -> Union[HorarioLike, List[HorarioLike]]:
+        return self.horarios[indice]
+
+    def columna(self, nombre: str) -> array:
+        if nombre not in COLUMNAS:
+            raise KeyError(f"Columna desconocida: {nombre}")
+        return getattr(self, nombre)
+
+    def mascara(self, cupos_min: Optional[int] = None, desde: Optional[float] = None,
+                hasta: Optional[float] = None, utilizacion_max: Optional[float] = None) -> List[bool]:
+        """
+        True por cada franja que cumple todos los criterios dados
+
+        Args:
+            cupos_min: Cupos disponibles mínimos
+            desde: Epoch mínimo de inicio
+            hasta: Epoch máximo de fin
+            utilizacion_max: totalUtilizado máximo (0-100)
+        """
+        condiciones = []
+        if cupos_min is not None:
+            condiciones.append(map(operator.ge, self.cupos, repeat(cupos_min)))
+        if desde is not None:
+            condiciones.append(map(operator.ge, self.inicio, repeat(desde)))
+        if hasta is not None:
+            condiciones.append(map(operator.le, self.fin, repeat(hasta)))
+        if utilizacion_max is not None:
+            condiciones.append(map(operator.le, self.utilizacion, repeat(utilizacion_max)))
+        if not condiciones:
+            return [True] * len(self)
+        mascara = condiciones[0]
+        for condicion in condiciones[1:]:
+            mascara = map(operator.and_, mascara, condicion)
+        return list(mascara)
+
+    def seleccionar(self, indices: Iterable[int]) -> 'HorarioTable':
+        """Tabla con las filas de `indices`, en ese orden"""
+        indices = list(indices)
+        return self._desde_columnas(list(_tomar(self.horarios, indices)), {
+            nombre: array(tipo, _tomar(getattr(self, nombre), indices))
+            for nombre, tipo in COLUMNAS.items()
+        })
+
+    def filtrar(self, **criterios) -> 'HorarioTable':
+        """Filas que cumplen la máscara (mismos criterios que mascara)"""
+        return self.seleccionar(compress(range(len(self)), self.mascara(**criterios)))
+
+    def ordenar(self, *columnas: str, descendente: bool = False) -> 'HorarioTable':
+        """
+        Orden estable por una o más columnas (la primera es la principal)
+
+        Por defecto ordena por inicio. Con varias columnas la clave de cada
+        fila es la tupla de sus valores, armada con zip sobre las columnas.
+        """
+        valores = [self.columna(nombre) for nombre in columnas or ('inicio',)]
+        claves = valores[0] if len(valores) == 1 else list(zip(*valores))
+        return self.seleccionar(sorted(range(len(self)), key=claves.__getitem__, reverse=descendente))
+
+    def consultar(self, orden: Sequence[str] = ('inicio',), limite: Optional[int] = None,
+                  descendente: bool = False, **criterios) -> List[HorarioLike]:
+        """
+        Horarios que cumplen los criterios, ordenados, sin armar tablas intermedias
+
+        Es el camino corto de filtrar(...).ordenar(...)[:limite]: trabaja con
+        índices y solo materializa los horarios del resultado.
+        """
+        indices = list(compress(range(len(self)), self.mascara(**criterios))) if criterios else range(len(self))
+        valores = [self.columna(nombre) for nombre in orden]
+        claves = valores[0] if len(valores) == 1 else list(zip(*valores))
+        indices = sorted(indices, key=claves.__getitem__, reverse=descendente)[:limite]
+        return list(_tomar(self.horarios, indices))
+
+    def indice_turno(self, id_turno: int) -> int:
+        """Posición de la franja con ese id de turno, o -1"""
+        try:
+            return self.ids.index(id_turno)
+        except ValueError:
+            return -1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Columnas como listas, para serializar"""
+        return {nombre: getattr(self, nombre).tolist() for nombre in COLUMNAS}
@@ -0,0 +1,402 @@
+import logging
+import math
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from config.config import Config
+from src.models.booking import Tiquetera, Horario, Reserva, ResultadoReserva
+from src.models.franjas import validar_hora
+
+logger = logging.getLogger(__name__)
+
+
+class LimiteVigilancias(Exception):
+    """El usuario alcanzó WATCH_MAX_PER_USER vigilancias activas"""
+
+
+def calcular_intervalo(segundos_para_inicio: float, utilizacion: float = 0.0, sin_cambios: int = 0) -> float:
+    """
+    Segundos hasta la próxima consulta de un grupo de vigilancias
+
+    Parte de WATCH_INTERVAL_MIN y se duplica por cada consulta sin cambios;
+    la alta demanda (totalUtilizado) lo reduce a la mitad y, dentro de
+    WATCH_NEAR_START, se acorta en proporción a lo que falta para la clase.
+    """
+    minimo, maximo = Config.WATCH_INTERVAL_MIN, Config.WATCH_INTERVAL_MAX
+    intervalo = min(maximo, minimo * (2 ** min(sin_cambios, 16)))
+    if utilizacion >= Config.WATCH_HIGH_UTILIZATION:
+        intervalo /= 2
+    if segundos_para_inicio < Config.WATCH_NEAR_START:
+        intervalo *= max(segundos_para_inicio, 0) / Config.WATCH_NEAR_START
+    return min(maximo, max(minimo, intervalo))
+
+
+def _timestamp(fecha: str, hora: str) -> float:
+    return datetime.strptime(f"{fecha} {hora}", "%Y-%m-%d %H:%M").timestamp()
+
+
+def validar_rango(fecha: str, hora_desde: str, hora_hasta: str):
+    """
+    Verifica el formato de una vigilancia antes de registrarla
+
+    Raises:
+        ValueError: si la fecha no es YYYY-MM-DD, alguna hora no es HH:MM
+            o el rango está invertido
+    """
+    for hora in (hora_desde, hora_hasta):
+        validar_hora(hora)
+    try:
+        datetime.strptime(str(fecha), "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Fecha inválida: {fecha} (formato YYYY-MM-DD)")
+    if hora_desde > hora_hasta:
+        raise ValueError("hora_desde debe ser anterior o igual a hora_hasta")
+
+
+class LimiteConsultas:
+    """Token bucket de consultas por minuto"""
+
+    def __init__(self, por_minuto: int):
+        self.capacidad = max(1, por_minuto)
+        self.tasa = self.capacidad / 60.0
+        self._fichas = float(self.capacidad)
+        self._ultimo: Optional[float] = None
+
+    def _recargar(self, ahora: float):
+        if self._ultimo is not None:
+            self._fichas = min(self.capacidad, self._fichas + (ahora - self._ultimo) * self.tasa)
+        self._ultimo = ahora
+
+    def espera(self, ahora: float) -> float:
+        """Segundos hasta que haya una ficha disponible (0 si ya la hay)"""
+        self._recargar(ahora)
+        return 0.0 if self._fichas >= 1 else (1 - self._fichas) / self.tasa
+
+    def consumir(self, ahora: float):
+        self._recargar(ahora)
+        self._fichas -= 1
+
+
+class Vigilancia:
+    """
+    Un objetivo registrado por un usuario: tiquetera, fecha y rango de horas.
+
+    Estados: activa, disponible (se abrió un cupo y no se reserva sola),
+    reservada, fallida (se agotaron los intentos), incierta (la reserva no
+    tuvo respuesta y no se reintenta), cancelada, vencida, error (la consulta de su grupo falló WATCH_MAX_ERRORES veces seguidas).
+    """
+
+    def __init__(self, api, tiquetera: Tiquetera, fecha: str, hora_desde: str, hora_hasta: str,
+                 reservar: bool = False, user_id: Optional[str] = None):
+        self.id = f"{Config.WORKER_ID}-{uuid.uuid4().hex[:12]}"
+        self.api = api
+        self.tiquetera = tiquetera
+        self.fecha = fecha
+        self.hora_desde = hora_desde
+        self.hora_hasta = hora_hasta
+        self.reservar = reservar
+        self.user_id = user_id
+        self.estado = 'activa'
+        self.mensaje = ''
+        self.horario: Optional[Horario] = None
+        self.resultado: Optional[ResultadoReserva] = None
+        self.consultas = 0
+        self.intentos = 0
+        self.creado = time.time()
+        self.ultima_consulta: Optional[float] = None
+        self.terminado: Optional[float] = None
+
+    @property
+    def activa(self) -> bool:
+        return self.estado == 'activa'
+
+    def coincide(self, horario: Horario) -> bool:
+        """True si el horario empieza dentro del rango vigilado"""
+        return self.hora_desde <= horario.hora_inicio <= self.hora_hasta
+
+    def terminar(self, estado: str, mensaje: str = ''):
+        self.estado = estado
+        self.mensaje = mensaje or self.mensaje
+        self.terminado = time.time()
+        self.api = None  # Las vigilancias retenidas no mantienen viva la sesión
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Estado de la vigilancia, listo para JSON"""
+        return {
+            'id': self.id,
+            'estado': self.estado,
+            'tiquetera': self.tiquetera.nombre_centro_entrenamiento,
+            'sede': self.tiquetera.nombre_sede,
+            'fecha': self.fecha,
+            'hora_desde': self.hora_desde,
+            'hora_hasta': self.hora_hasta,
+            'reservar': self.reservar,
+            'mensaje': self.mensaje,
+            'consultas': self.consultas,
+            'intentos': self.intentos,
+            'ultima_consulta': self.ultima_consulta,
+            'horario': {
+                'fecha': self.horario.fecha,
+                'hora_inicio': self.horario.hora_inicio,
+                'hora_fin': self.horario.hora_fin,
+                'cupos_disponibles': self.horario.cupos_disponibles,
+                'nombre_clase': self.horario.nombre_clase
+            } if self.horario else None,
+            'resultado': self.resultado.to_dict() if self.resultado else None
+        }
+
+
+class _Grupo:
+    """Vigilancias de un mismo usuario, tiquetera y fecha: una sola consulta para todas"""
+
+    def __init__(self, clave: Tuple, ahora: float):
+        self.clave = clave
+        self.vigilancias: List[Vigilancia] = []
+        self.proxima = ahora
+        self.sin_cambios = 0
+        self.huella: Optional[Tuple] = None
+        self.intervalo = 0.0
+        self.errores = 0  # Consultas fallidas seguidas
+
+
+class VigilanteDisponibilidad:
+    """
+    Vigila horarios llenos y avisa (o reserva) cuando se abre un cupo.
+
+    Las vigilancias de la misma tiquetera y fecha se agrupan en una sola
+    consulta a get_horarios_frescos, que no lee del cache pero deja la
+    respuesta en él para los demás usuarios. El intervalo de cada grupo se adapta con
+    calcular_intervalo y cada consulta pasa por dos token buckets, uno por
+    usuario y otro global, así que el servidor nunca recibe más de
+    WATCH_GLOBAL_POLLS_PER_MIN consultas por minuto de este proceso.
+
+    Un solo hilo de fondo hace las consultas, una a la vez; vive en el
+    proceso, igual que ColaTrabajos.
+    """
+
+    def __init__(self, por_usuario: Optional[int] = None, global_: Optional[int] = None,
+                 retencion: Optional[float] = None):
+        self.por_usuario = por_usuario or Config.WATCH_USER_POLLS_PER_MIN
+        self.retencion = Config.WATCH_RETENTION if retencion is None else retencion
+        self._limite_global = LimiteConsultas(global_ or Config.WATCH_GLOBAL_POLLS_PER_MIN)
+        self._limites_usuario: Dict[Optional[str], LimiteConsultas] = {}
+        self._vigilancias: Dict[str, Vigilancia] = {}
+        self._grupos: Dict[Tuple, _Grupo] = {}
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self.consultas = 0
+        self.diferidas = 0
+        self.reservas_automaticas = 0
+
+    @staticmethod
+    def _clave(user_id: Optional[str], tiquetera: Tiquetera, fecha: str) -> Tuple:
+        return (user_id, tiquetera.id_tiquetera or tiquetera.id, fecha)
+
+    def _asegurar_hilo(self):
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name='availability-watcher', daemon=True)
+                self._hilo.start()
+
+    def registrar(self, api, tiquetera: Tiquetera, fecha: str, hora_desde: str, hora_hasta: str,
+                  reservar: bool = False, user_id: Optional[str] = None,
+                  iniciar: bool = True) -> Vigilancia:
+        """
+        Registra una vigilancia; su grupo se consulta en la próxima vuelta
+
+        Args:
+            iniciar: Arrancar el hilo de fondo (las pruebas llaman a procesar)
+
+        Raises:
+            ValueError: si la fecha o las horas tienen un formato inválido
+            LimiteVigilancias: si el usuario ya tiene WATCH_MAX_PER_USER activas
+        """
+        validar_rango(fecha, hora_desde, hora_hasta)
+        self._purgar()
+        vigilancia = Vigilancia(api, tiquetera, fecha, hora_desde, hora_hasta, reservar, user_id)
+        clave = self._clave(user_id, tiquetera, fecha)
+        with self._lock:
+            activas = sum(1 for v in self._vigilancias.values() if v.user_id == user_id and v.activa)
+            if activas >= Config.WATCH_MAX_PER_USER:
+                raise LimiteVigilancias(f"Máximo {Config.WATCH_MAX_PER_USER} vigilancias activas por usuario")
+            self._vigilancias[vigilancia.id] = vigilancia
+            ahora = time.time()
+            grupo = self._grupos.get(clave)
+            if grupo is None:
+                grupo = self._grupos[clave] = _Grupo(clave, ahora)
+            grupo.vigilancias.append(vigilancia)
+            grupo.proxima = min(grupo.proxima, ahora)
+        if iniciar:
+            self._asegurar_hilo()
+            self._despertar.set()
+        return vigilancia
+
+    def cancelar(self, vigilancia_id: str, user_id: Optional[str] = None) -> bool:
+        with self._lock:
+            vigilancia = self._vigilancias.get(vigilancia_id)
+            if vigilancia is None or vigilancia.user_id != user_id:
+                return False
+            if vigilancia.activa:
+                vigilancia.terminar('cancelada')
+            return True
+
+    def obtener(self, vigilancia_id: str) -> Optional[Vigilancia]:
+        with self._lock:
+            return self._vigilancias.get(vigilancia_id)
+
+    def listar(self, user_id: Optional[str] = None) -> List[Vigilancia]:
+        with self._lock:
+            return [v for v in self._vigilancias.values() if v.user_id == user_id]
+
+    def _bucle(self):
+        while True:
+            try:
+                espera = self.procesar()
+            except Exception as e:
+                logger.error("Error en el vigilante de cupos: %s", e, exc_info=Config.DEBUG)
+                espera = Config.WATCH_INTERVAL_MIN
+            self._despertar.wait(espera)
+            self._despertar.clear()
+
+    def procesar(self, ahora: Optional[float] = None) -> Optional[float]:
+        """
+        Consulta los grupos que ya tocan, respetando los límites de consultas
+
+        Returns:
+            Segundos hasta la próxima consulta (None si no hay vigilancias)
+        """
+        ahora = time.time() if ahora is None else ahora
+        self._purgar()
+        with self._lock:
+            for clave in [c for c, g in self._grupos.items() if not any(v.activa for v in g.vigilancias)]:
+                del self._grupos[clave]
+            pendientes = sorted((g for g in self._grupos.values() if g.proxima <= ahora), key=lambda g: g.proxima)
+
+        for grupo in pendientes:
+            user_id = grupo.clave[0]
+            with self._lock:
+                limite_usuario = self._limites_usuario.setdefault(user_id, LimiteConsultas(self.por_usuario))
+            espera = max(limite_usuario.espera(ahora), self._limite_global.espera(ahora))
+            if espera > 0:
+                grupo.proxima = ahora + espera
+                self.diferidas += 1
+                continue
+            limite_usuario.consumir(ahora)
+            self._limite_global.consumir(ahora)
+            try:
+                self._consultar(grupo, ahora)
+                grupo.errores = 0
+            except Exception as e:
+                # Un grupo que falla no debe frenar a los de otros usuarios: espera más y,
+                # si sigue fallando, termina
+                grupo.errores += 1
+                logger.error("Error consultando el grupo %s (%d seguidos): %s", grupo.clave, grupo.errores, e,
+                             exc_info=Config.DEBUG)
+                grupo.proxima = ahora + calcular_intervalo(math.inf, sin_cambios=grupo.errores)
+                with self._lock:
+                    for vigilancia in grupo.vigilancias:
+                        if not vigilancia.activa:
+                            continue
+                        if grupo.errores >= Config.WATCH_MAX_ERRORES:
+                            vigilancia.terminar('error', str(e))
+                        else:
+                            vigilancia.mensaje = f'Error consultando horarios: {e}'
+
+        with self._lock:
+            if not self._grupos:
+                return None
+            return max(0.0, min(g.proxima for g in self._grupos.values()) - ahora)
+
+    def _consultar(self, grupo: _Grupo, ahora: float):
+        # terminar() suelta la api: se toma bajo el lock, igual que cancelar
+        with self._lock:
+            vigilancias = [v for v in grupo.vigilancias if v.activa]
+            if not vigilancias:
+                return
+            api, tiquetera, fecha = vigilancias[0].api, vigilancias[0].tiquetera, vigilancias[0].fecha
+
+        # El cache serviría datos viejos: la consulta va al servidor y los errores llegan aquí
+        horarios = sorted(api.get_horarios_frescos(tiquetera, fecha), key=lambda h: h.hora_inicio)
+        self.consultas += 1
+
+        for vigilancia in vigilancias:
+            vigilancia.consultas += 1
+            vigilancia.ultima_consulta = ahora
+            if ahora >= _timestamp(fecha, vigilancia.hora_hasta):
+                with self._lock:
+                    if vigilancia.activa:
+                        vigilancia.terminar('vencida', 'La clase ya empezó')
+                continue
+            libre = next((h for h in horarios if vigilancia.coincide(h) and (h.cupos_disponibles or 0) > 0), None)
+            if libre is not None:
+                self._cupo_abierto(vigilancia, libre, api)
+
+        en_rango = [h for h in horarios if any(v.coincide(h) for v in vigilancias)]
+        huella = tuple((h.hora_inicio, h.hora_fin, h.cupos_disponibles) for h in en_rango)
+        grupo.sin_cambios = grupo.sin_cambios + 1 if huella == grupo.huella else 0
+        grupo.huella = huella
+        inicio = min(
+            [_timestamp(fecha, h.hora_inicio) for h in en_rango] or
+            [_timestamp(fecha, v.hora_desde) for v in vigilancias]
+        )
+        utilizacion = max(
+            [float((h.raw_data or {}).get('totalUtilizado') or 0) for h in en_rango] or [0.0]
+        )
+        grupo.intervalo = calcular_intervalo(inicio - ahora, utilizacion, grupo.sin_cambios)
+        grupo.proxima = ahora + grupo.intervalo
+
+    def _cupo_abierto(self, vigilancia: Vigilancia, horario: Horario, api):
+        """Avisa o reserva; api es la tomada bajo el lock en _consultar"""
+        with self._lock:
+            # Pudo cancelarse mientras se consultaba
+            if not vigilancia.activa:
+                return
+            vigilancia.horario = horario
+            if not vigilancia.reservar:
+                vigilancia.terminar('disponible', f'{horario.cupos_disponibles} cupos disponibles')
+                return
+        resultado = api.realizar_reserva_detallada(Reserva(vigilancia.tiquetera, horario))
+        with self._lock:
+            vigilancia.resultado = resultado
+            vigilancia.intentos += 1
+            if resultado.exitosa:
+                self.reservas_automaticas += 1
+                logger.info("Vigilancia %s reservó %s", vigilancia.id, resultado.reserva)
+                vigilancia.terminar('reservada', resultado.mensaje)
+            elif resultado.incierta:
+                # Reintentar podría reservar dos veces
+                vigilancia.terminar('incierta', resultado.mensaje)
+            elif vigilancia.intentos >= Config.WATCH_MAX_INTENTOS:
+                vigilancia.terminar('fallida', resultado.mensaje)
+            elif vigilancia.activa:
+                vigilancia.mensaje = resultado.mensaje
+
+    def _purgar(self):
+        limite = time.time() - self.retencion
+        with self._lock:
+            vencidas = [
+                vigilancia_id for vigilancia_id, v in self._vigilancias.items()
+                if v.terminado is not None and v.terminado < limite
+            ]
+            for vigilancia_id in vencidas:
+                del self._vigilancias[vigilancia_id]
+            # El bucket de un usuario sin vigilancias activas ya no limita nada
+            con_activas = {v.user_id for v in self._vigilancias.values() if v.activa}
+            for user_id in [u for u in self._limites_usuario if u not in con_activas]:
+                del self._limites_usuario[user_id]
+
+    def metricas(self) -> Dict[str, Any]:
+        """Vigilancias activas, grupos coalescidos y consultas hechas o diferidas"""
+        with self._lock:
+            grupos = [g for g in self._grupos.values() if any(v.activa for v in g.vigilancias)]
+            return {
+                'vigilancias_activas': sum(1 for v in self._vigilancias.values() if v.activa),
+                'grupos': len(grupos),
+                'consultas': self.consultas,
+                'consultas_diferidas': self.diferidas,
+                'reservas_automaticas': self.reservas_automaticas,
+                'proxima_consulta_s': max(0.0, min(g.proxima for g in grupos) - time.time()) if grupos else None
+            }
@@ -0,0 +1,150 @@
+"""
+Conflictos entre reservas pendientes
+
+Antes de agregar una reserva al carrito se busca si ya hay una del mismo
+turno (duplicado), otra clase a la misma hora (solapamiento) o una clase
+en otra sede sin tiempo para trasladarse (CART_TRAVEL_BUFFER minutos).
+Cualquiera de ellas gasta una llamada de reserva que va a fallar o una
+entrada que no se va a usar.
+"""
+
+import bisect
+import itertools
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from config.config import Config
+from src.models.booking import Reserva
+from src.models.franjas import epoch_franja, normalizar
+
+DUPLICADO = 'duplicado'
+SOLAPAMIENTO = 'solapamiento'
+TRASLADO = 'traslado'
+
+_MENSAJES = {
+    DUPLICADO: 'Ya está en el carrito',
+    SOLAPAMIENTO: 'Se cruza con otra reserva del carrito',
+    TRASLADO: 'No alcanza el tiempo de traslado desde otra reserva del carrito'
+}
+
+
+@dataclass
+class Conflicto:
+    """Choque de una reserva nueva con una que ya estaba"""
+    tipo: str  # DUPLICADO, SOLAPAMIENTO o TRASLADO
+    reserva: Reserva  # La reserva existente
+
+    @property
+    def mensaje(self) -> str:
+        return _MENSAJES[self.tipo]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'tipo': self.tipo,
+            'mensaje': self.mensaje,
+            'tiquetera': self.reserva.tiquetera.nombre_centro_entrenamiento,
+            'sede': self.reserva.tiquetera.nombre_sede,
+            'fecha': self.reserva.horario.fecha,
+            'hora_inicio': self.reserva.horario.hora_inicio,
+            'hora_fin': self.reserva.horario.hora_fin
+        }
+
+
+class ConflictoReserva(Exception):
+    """La reserva no se agregó porque choca con reservas del carrito"""
+
+    def __init__(self, conflictos: List[Conflicto]):
+        super().__init__(conflictos[0].mensaje if conflictos else 'Conflicto de reserva')
+        self.conflictos = conflictos
+
+
+def _sede(reserva: Reserva) -> str:
+    """Lugar físico de la clase: el centro de entrenamiento es el programa, la sede el sitio"""
+    return normalizar(reserva.tiquetera.nombre_sede)
+
+
+class _Intervalo:
+    __slots__ = ('inicio', 'fin', 'sede', 'turno', 'reserva', 'orden')
+
+    def __init__(self, reserva: Reserva, orden: int):
+        self.inicio, self.fin = epoch_franja(reserva.horario)
+        self.sede = _sede(reserva)
+        self.turno = reserva.horario.id_turno
+        self.reserva = reserva
+        self.orden = orden  # Desempata intervalos con el mismo inicio
+
+
+class IndiceIntervalos:
+    """
+    Intervalos de las reservas pendientes ordenados por inicio
+
+    Las clases duran a lo sumo unas horas, así que todo intervalo que pueda
+    chocar con [inicio, fin) empieza después de inicio - duración máxima -
+    buffer: la búsqueda es un bisect hasta ahí y un recorrido de los pocos
+    vecinos, O(log n + k), aunque se hayan aceptado solapamientos marcados.
+
+    No es thread-safe: el dueño (CarritoReservas) lo protege con su lock.
+    """
+
+    def __init__(self, buffer_traslado: Optional[float] = None):
+        """
+        Args:
+            buffer_traslado: Segundos mínimos entre reservas de sedes distintas
+                (por defecto CART_TRAVEL_BUFFER minutos)
+        """
+        self.buffer = Config.CART_TRAVEL_BUFFER * 60 if buffer_traslado is None else buffer_traslado
+        self._claves: List[tuple] = []  # (inicio, orden), paralela a _intervalos
+        self._intervalos: List[_Intervalo] = []
+        self._duracion_max = 0.0
+        self._orden = itertools.count()
+
+    def conflictos(self, reserva: Reserva) -> List[Conflicto]:
+        """Conflictos que tendría `reserva` con las reservas indexadas"""
+        nuevo = _Intervalo(reserva, -1)
+        encontrados = []
+        for intervalo in self._vecinos(nuevo.inicio, nuevo.fin):
+            if intervalo.inicio < nuevo.fin and nuevo.inicio < intervalo.fin:
+                misma_franja = (
+                    (nuevo.turno is not None and intervalo.turno == nuevo.turno)
+                    or (intervalo.reserva.tiquetera == reserva.tiquetera
+                        and (intervalo.inicio, intervalo.fin) == (nuevo.inicio, nuevo.fin))
+                )
+                encontrados.append(Conflicto(DUPLICADO if misma_franja else SOLAPAMIENTO, intervalo.reserva))
+            elif (intervalo.sede != nuevo.sede
+                  and nuevo.inicio - self.buffer < intervalo.fin and intervalo.inicio < nuevo.fin + self.buffer):
+                encontrados.append(Conflicto(TRASLADO, intervalo.reserva))
+        return encontrados
+
+    def _vecinos(self, inicio: float, fin: float):
+        """Intervalos que empiezan en [inicio - duración máxima - buffer, fin + buffer)"""
+        desde = bisect.bisect_left(self._claves, (inicio - self._duracion_max - self.buffer,))
+        hasta = bisect.bisect_left(self._claves, (fin + self.buffer,), lo=desde)
+        return itertools.islice(self._intervalos, desde, hasta)
+
+    def agregar(self, reserva: Reserva):
+        intervalo = _Intervalo(reserva, next(self._orden))
+        clave = (intervalo.inicio, intervalo.orden)
+        posicion = bisect.bisect_left(self._claves, clave)
+        self._claves.insert(posicion, clave)
+        self._intervalos.insert(posicion, intervalo)
+        self._duracion_max = max(self._duracion_max, intervalo.fin - intervalo.inicio)
+
+    def eliminar(self, reserva: Reserva) -> bool:
+        """Quita la reserva (por identidad); False si no estaba"""
+        inicio = epoch_franja(reserva.horario)[0]
+        posicion = bisect.bisect_left(self._claves, (inicio,))
+        while posicion < len(self._claves) and self._claves[posicion][0] == inicio:
+            intervalo = self._intervalos[posicion]
+            if intervalo.reserva is reserva:
+                del self._claves[posicion]
+                del self._intervalos[posicion]
+                return True
+            posicion += 1
+        return False
+
+    def limpiar(self):
+        self._claves.clear()
+        self._intervalos.clear()
+        self._duracion_max = 0.0
+
+    def __len__(self) -> int:
+        return len(self._intervalos)
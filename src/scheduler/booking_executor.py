@@ -0,0 +1,279 @@
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+from config.config import Config
+from src.models.booking import Tiquetera, Horario, Reserva, ResultadoReserva
+from src.scheduler.booking_priority import PriorizadorReservas
+
+logger = logging.getLogger(__name__)
+
+# Motivos para no enviar una reserva (ResultadoReserva.motivo)
+SIN_DATOS = 'sin_datos'
+SIN_CUPOS = 'sin_cupos'
+SIN_ENTRADAS = 'sin_entradas'
+
+_MENSAJES = {
+    SIN_DATOS: 'No hay datos crudos del horario',
+    SIN_CUPOS: 'Sin cupos disponibles en el horario',
+    SIN_ENTRADAS: 'Sin entradas disponibles en la tiquetera'
+}
+
+
+def omitir(reserva: Reserva, motivo: str) -> ResultadoReserva:
+    """Resultado de una reserva que no se envió al servidor"""
+    return ResultadoReserva(reserva=reserva, exitosa=False, mensaje=_MENSAJES[motivo], omitida=True, motivo=motivo)
+
+
+class ControlEntradas:
+    """
+    Lleva la cuenta de entradas disponibles por tiquetera durante un lote.
+
+    Se limitan las tiqueteras no ilimitadas que traen el número de
+    entradas; con 0 no se envía ninguna. None (la API no envió el dato) no
+    limita.
+    """
+
+    def __init__(self):
+        self._restantes: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _clave(tiquetera: Tiquetera):
+        return tiquetera.id_tiquetera if tiquetera.id_tiquetera else tiquetera.id
+
+    @staticmethod
+    def limitada(tiquetera: Tiquetera) -> bool:
+        return not tiquetera.ilimitado and tiquetera.entradas is not None
+
+    def tomar(self, tiquetera: Tiquetera) -> bool:
+        """Reserva una entrada localmente; False si ya se agotaron"""
+        if not self.limitada(tiquetera):
+            return True
+        clave = self._clave(tiquetera)
+        with self._lock:
+            restantes = self._restantes.setdefault(clave, tiquetera.entradas)
+            if restantes <= 0:
+                return False
+            self._restantes[clave] = restantes - 1
+            return True
+
+    def devolver(self, tiquetera: Tiquetera):
+        """
+        Libera una entrada tomada por una reserva que no se concretó
+
+        No se llama con resultados inciertos (timeout): el servidor pudo
+        haber gastado la entrada.
+        """
+        if not self.limitada(tiquetera):
+            return
+        clave = self._clave(tiquetera)
+        with self._lock:
+            if clave in self._restantes:
+                self._restantes[clave] += 1
+
+
+def _clave_franja(horario: Horario) -> Hashable:
+    if horario.id_turno is not None:
+        return horario.id_turno
+    return horario.hora_inicio, horario.hora_fin, horario.nombre_clase
+
+
+@dataclass
+class PlanReservas:
+    """
+    Lote ya validado: qué se envía, en qué orden y qué se descartó
+
+    Las principales tienen su entrada tomada en `entradas`. Las suplentes
+    no alcanzaron entrada: se intentan después de las principales, y solo
+    llegan al servidor si alguna principal de su tiquetera falló y la devolvió.
+    """
+    entradas: ControlEntradas
+    principales: List[int] = field(default_factory=list)  # Índices del lote, en orden de envío
+    suplentes: List[int] = field(default_factory=list)
+    omitidas: Dict[int, ResultadoReserva] = field(default_factory=dict)  # Descartadas sin llamar al servidor
+    cupos_actualizados: int = 0  # Reservas con cupos distintos en la disponibilidad fresca
+
+    def resumen(self) -> Dict[str, Any]:
+        return {
+            'principales': len(self.principales),
+            'suplentes': len(self.suplentes),
+            'llamadas_evitadas': len(self.omitidas),
+            'motivos': dict(Counter(r.motivo for r in self.omitidas.values())),
+            'cupos_actualizados': self.cupos_actualizados
+        }
+
+
+class ValidacionPrevia:
+    """
+    Descarta antes de enviar las reservas que el servidor va a rechazar
+
+    - Sin raw_data: no hay con qué armar el payload.
+    - Sin cupos: solo según disponibilidad cacheada que sigue fresca
+      (api.horarios_cacheados, sin consultar al servidor). Los cupos con
+      los que se agregó la reserva pueden ser de hace minutos: sin datos
+      frescos la reserva se envía.
+    - Sin entradas: una tiquetera con 0 entradas no envía nada; las de una
+      tiquetera con entradas se reparten en el orden de prioridad y las
+      reservas que no alcanzan quedan de suplentes.
+
+    No hace llamadas de red.
+    """
+
+    def __init__(self, api):
+        self.api = api
+
+    def preparar(self, reservas: List[Reserva], orden: Optional[List[int]] = None) -> PlanReservas:
+        """
+        Args:
+            reservas: Lote a validar
+            orden: Índices en el orden de prioridad (por defecto el del lote);
+                las entradas se reparten en ese orden
+        """
+        plan = PlanReservas(ControlEntradas())
+        vistas: Dict[Tuple[Any, str], Optional[Dict[Hashable, Horario]]] = {}
+        for indice in range(len(reservas)) if orden is None else orden:
+            reserva = reservas[indice]
+            motivo = self._motivo(reserva, vistas, plan)
+            if motivo:
+                plan.omitidas[indice] = omitir(reserva, motivo)
+            elif plan.entradas.tomar(reserva.tiquetera):
+                plan.principales.append(indice)
+            else:
+                plan.suplentes.append(indice)
+        if plan.omitidas:
+            logger.info("Validación previa: %d de %d reservas descartadas sin llamar al servidor %s",
+                        len(plan.omitidas), len(reservas), plan.resumen()['motivos'])
+        return plan
+
+    def _motivo(self, reserva: Reserva, vistas: Dict, plan: PlanReservas) -> Optional[str]:
+        """Motivo por el que la reserva va a fallar, o None"""
+        if not reserva.horario.raw_data:
+            return SIN_DATOS
+        if ControlEntradas.limitada(reserva.tiquetera) and reserva.tiquetera.entradas <= 0:
+            return SIN_ENTRADAS
+        fresco = self._disponibilidad(reserva, vistas)
+        if fresco is None:
+            return None
+        if fresco.cupos_disponibles != reserva.horario.cupos_disponibles:
+            plan.cupos_actualizados += 1
+        if isinstance(fresco.cupos_disponibles, int) and fresco.cupos_disponibles <= 0:
+            return SIN_CUPOS
+        return None
+
+    def _disponibilidad(self, reserva: Reserva, vistas: Dict) -> Optional[Horario]:
+        """El horario de la reserva en la disponibilidad fresca (una consulta al cache por tiquetera y fecha)"""
+        clave = (ControlEntradas._clave(reserva.tiquetera), reserva.horario.fecha)
+        if clave not in vistas:
+            cacheados = getattr(self.api, 'horarios_cacheados', None)
+            horarios = cacheados(reserva.tiquetera, reserva.horario.fecha) if cacheados else None
+            vistas[clave] = None if horarios is None else {_clave_franja(h): h for h in horarios}
+        vista = vistas[clave]
+        return None if vista is None else vista.get(_clave_franja(reserva.horario))
+
+
+class BookingExecutor:
+    """Ejecuta lotes de reservas con concurrencia limitada"""
+
+    def __init__(self, api, max_concurrency: Optional[int] = None, validacion_previa: Optional[bool] = None,
+                 priorizador: Optional[PriorizadorReservas] = None):
+        """
+        Args:
+            api: CompensarAPI (o cualquier objeto con realizar_reserva_detallada)
+            max_concurrency: Reservas simultáneas (por defecto BOOKING_MAX_CONCURRENCY)
+            validacion_previa: Descartar las reservas que van a fallar (por defecto BOOKING_PREFLIGHT)
+            priorizador: Orden de envío; por defecto, con BOOKING_ORDER=contencion, uno
+                con el historial de la disponibilidad compartida de la API si lo tiene
+        """
+        self.api = api
+        self.max_concurrency = max(1, max_concurrency or Config.BOOKING_MAX_CONCURRENCY)
+        self.validacion_previa = Config.BOOKING_PREFLIGHT if validacion_previa is None else validacion_previa
+        if priorizador is None and Config.BOOKING_ORDER == 'contencion':
+            disponibilidad = getattr(api, 'disponibilidad', None)
+            priorizador = PriorizadorReservas(getattr(disponibilidad, 'historial', None))
+        self.priorizador = priorizador
+
+    def ordenar(self, reservas: List[Reserva]) -> List[int]:
+        """Índices en el orden de envío: los más disputados primero, o el del lote sin priorizador"""
+        if self.priorizador is None:
+            return list(range(len(reservas)))
+        return self.priorizador.ordenar(reservas)
+
+    def preparar(self, reservas: List[Reserva]) -> PlanReservas:
+        """Plan del lote; sin validación previa todas se envían y toman su entrada al ejecutarse"""
+        orden = self.ordenar(reservas)
+        if not self.validacion_previa:
+            return PlanReservas(ControlEntradas(), suplentes=orden)
+        return ValidacionPrevia(self.api).preparar(reservas, orden)
+
+    def ejecutar(self, reservas: List[Reserva],
+                 al_terminar: Optional[Callable[[int, ResultadoReserva], None]] = None) -> List[ResultadoReserva]:
+        """
+        Ejecuta todas las reservas y retorna sus resultados
+
+        Args:
+            reservas: Lista de objetos Reserva
+            al_terminar: Se llama con (índice, resultado) apenas termina cada reserva
+
+        Returns:
+            Lista de ResultadoReserva en el mismo orden de las reservas
+        """
+        resultados: List[Optional[ResultadoReserva]] = [None] * len(reservas)
+        for indice, resultado in self.iterar(reservas):
+            resultados[indice] = resultado
+            if al_terminar:
+                al_terminar(indice, resultado)
+        return resultados
+
+    def iterar(self, reservas: List[Reserva]) -> Iterator[Tuple[int, ResultadoReserva]]:
+        """
+        Ejecuta las reservas y produce (índice, resultado) a medida que terminan
+
+        Primero salen las descartadas por la validación previa, después las
+        principales y al final las suplentes. Dentro de cada grupo el orden
+        es el de finalización, no el de la lista. Si quien consume deja de
+        iterar, las reservas ya encoladas igual se envían: cerrar el
+        generador espera a que terminen.
+        """
+        if not reservas:
+            return
+
+        plan = self.preparar(reservas)
+        yield from plan.omitidas.items()
+        workers = min(self.max_concurrency, len(plan.principales) + len(plan.suplentes))
+        if not workers:
+            return
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Las suplentes esperan a que las principales devuelvan (o no) sus entradas
+            for indices, tomada in ((plan.principales, True), (plan.suplentes, False)):
+                futuros = {
+                    executor.submit(self._ejecutar_una, reservas[indice], plan.entradas, tomada): indice
+                    for indice in indices
+                }
+                for futuro in as_completed(futuros):
+                    yield futuros[futuro], futuro.result()
+
+    def _ejecutar_una(self, reserva: Reserva, entradas: ControlEntradas,
+                      entrada_tomada: bool = False) -> ResultadoReserva:
+        if not entrada_tomada and not entradas.tomar(reserva.tiquetera):
+            return omitir(reserva, SIN_ENTRADAS)
+        resultado = self.api.realizar_reserva_detallada(reserva)
+        if not resultado.exitosa and not resultado.incierta:
+            entradas.devolver(reserva.tiquetera)
+        return resultado
+
+    @staticmethod
+    def resumir(resultados: List[ResultadoReserva]) -> Dict[str, Any]:
+        """Calcula los totales de un lote (las omitidas cuentan como fallidas)"""
+        exitosas = sum(1 for r in resultados if r.exitosa)
+        omitidas = [r for r in resultados if r.omitida]
+        return {
+            'exitosas': exitosas,
+            'fallidas': len(resultados) - exitosas,
+            'omitidas': len(omitidas),
+            'total': len(resultados),
+            'llamadas_evitadas': len(omitidas),  # Las omitidas no llegaron al servidor
+            'motivos_omision': dict(Counter(r.motivo or SIN_ENTRADAS for r in omitidas))
+        }
@@ -0,0 +1,84 @@
+"""
+Orden de un lote de reservas según qué tan rápido se van a llenar
+
+Las franjas más disputadas se envían primero: con un hilo son las primeras
+en salir, con varios ocupan los primeros lugares del pool, y en la
+validación previa son las que se quedan con las entradas de la tiquetera.
+
+El puntaje (0 a 1) combina la ocupación actual (totalUtilizado), los
+cupos que quedan y lo que falta para la clase; con historial mezcla
+además la probabilidad de que la franja se llene antes de empezar, según
+el ritmo al que se llenó el mismo patrón (HistorialLlenado).
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from src.api.shared_availability import HistorialLlenado
+from src.models.booking import Reserva
+from src.models.franjas import epoch_franja, utilizacion_franja
+
+PESO_UTILIZACION = 0.45
+PESO_ESCASEZ = 0.35
+PESO_CERCANIA = 0.20
+PESO_HISTORIAL = 0.30  # Parte del puntaje que sale del historial, cuando lo hay
+HORAS_CERCANIA = 24.0  # A esta distancia del inicio la cercanía vale 0.5
+
+
+@dataclass
+class Prioridad:
+    """Puntaje de disputa de una reserva y los datos con que se calculó"""
+    puntaje: float  # 0 a 1; más alto = se llena antes
+    utilizacion: float  # 0-100
+    cupos: Optional[int]
+    horas: float  # Hasta el inicio de la clase
+    tasa_historica: Optional[float] = None  # Puntos de totalUtilizado por hora
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'puntaje': round(self.puntaje, 4),
+            'utilizacion': self.utilizacion,
+            'cupos': self.cupos,
+            'horas': round(self.horas, 2) if math.isfinite(self.horas) else None,
+            'tasa_historica': self.tasa_historica
+        }
+
+
+class PriorizadorReservas:
+    """
+    Ordena reservas de la más disputada a la menos disputada
+
+    Solo lee los datos de cada horario (y el historial, si se da): no
+    consulta al servidor. Con puntajes iguales se respeta el orden del lote.
+    """
+
+    def __init__(self, historial: Optional[HistorialLlenado] = None):
+        self.historial = historial
+
+    def prioridad(self, reserva: Reserva, ahora: Optional[float] = None) -> Prioridad:
+        ahora = time.time() if ahora is None else ahora
+        horario = reserva.horario
+        utilizacion = min(max(utilizacion_franja(horario) or 0.0, 0.0), 100.0)
+        cupos = horario.cupos_disponibles if isinstance(horario.cupos_disponibles, int) else None
+        try:
+            horas = max(0.0, (epoch_franja(horario)[0] - ahora) / 3600)
+        except (TypeError, ValueError):
+            horas = math.inf  # Sin fecha u hora legibles no suma por cercanía
+
+        escasez = 0.0 if cupos is None else 1 / (1 + max(cupos, 0))
+        cercania = HORAS_CERCANIA / (HORAS_CERCANIA + horas)
+        puntaje = PESO_UTILIZACION * utilizacion / 100 + PESO_ESCASEZ * escasez + PESO_CERCANIA * cercania
+
+        tasa = self.historial.tasa(reserva.tiquetera, horario) if self.historial is not None else None
+        if tasa is not None:
+            restante = 100.0 - utilizacion
+            llenado = 1.0 if restante <= 0 else min(1.0, tasa * min(horas, 24 * 31) / restante)
+            puntaje = (1 - PESO_HISTORIAL) * puntaje + PESO_HISTORIAL * llenado
+        return Prioridad(puntaje, utilizacion, cupos, horas, tasa)
+
+    def ordenar(self, reservas: List[Reserva], ahora: Optional[float] = None) -> List[int]:
+        """Índices de `reservas` de la más a la menos disputada"""
+        ahora = time.time() if ahora is None else ahora
+        puntajes = [self.prioridad(reserva, ahora).puntaje for reserva in reservas]
+        return sorted(range(len(reservas)), key=lambda i: -puntajes[i])
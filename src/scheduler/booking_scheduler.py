@@ -1,14 +1,24 @@
+import time
 from typing import List
 from datetime import datetime, timedelta
+from config.config import Config
 from src.models.booking import Tiquetera, Horario, Reserva
 from src.api.compensar_api import CompensarAPI
+from src.api.slot_search import BuscadorHorarios, ConsultaHorarios, ResultadoBusqueda
+from src.scheduler.booking_conflicts import IndiceIntervalos, DUPLICADO
+from src.scheduler.booking_window import VentanaReserva, VentanaCancelada
+from src.scheduler.clock_sync import SincronizadorReloj
 
 class BookingScheduler:
     """Maneja la lógica de selección y agendamiento de reservas"""
     
-    def __init__(self, api: CompensarAPI):
+    def __init__(self, api: CompensarAPI, reloj: SincronizadorReloj = None):
         self.api = api
         self.reservas_pendientes: List[Reserva] = []
+        self.indice_pendientes = IndiceIntervalos()
+        # Las horas de la ventana se planean en el reloj del servidor
+        self.reloj = reloj or SincronizadorReloj(api.session)
+        self.ventana = VentanaReserva(api, reloj=self.reloj)
     
     def mostrar_tiqueteras(self, tiqueteras: List[Tiquetera]):
         """Muestra las tiqueteras disponibles de forma organizada"""
@@ -27,7 +37,7 @@ class BookingScheduler:
             print(f"\n🏃 {deporte.upper()}")
             print("-" * 80)
             for i, t in enumerate(lista, 1):
-                entradas = "♾️  Ilimitadas" if t.ilimitado else f"🎫 {t.entradas} entradas"
+                entradas = "♾️  Ilimitadas" if t.ilimitado else f"🎫 {'?' if t.entradas is None else t.entradas} entradas"
                 print(f"  [{i}] {t.nombre_centro_entrenamiento}")
                 print(f"      📍 {t.nombre_sede}")
                 print(f"      {entradas}")
@@ -123,11 +133,62 @@ class BookingScheduler:
         
         return horarios_seleccionados
     
-    def agregar_reserva(self, tiquetera: Tiquetera, horario: Horario):
-        """Agrega una reserva a la lista de pendientes"""
+    def buscar_horarios(self, buscador: BuscadorHorarios, tiqueteras: List[Tiquetera]) -> List[ResultadoBusqueda]:
+        """Busca franjas en todas las tiqueteras y permite seleccionar varias"""
+        print("\n🔎 Buscar horarios en todas las tiqueteras (Enter para omitir un criterio)")
+        try:
+            consulta = ConsultaHorarios.desde_dict({
+                'deporte': input("Deporte (ej: natación): ").strip(),
+                'sede': input("Sede: ").strip(),
+                'cupos_min': input("Cupos mínimos [1]: ").strip(),
+                'hora_desde': input("Desde la hora (HH:MM): ").strip(),
+                'hora_hasta': input("Hasta la hora (HH:MM): ").strip(),
+                'dias': input("Días hacia adelante [7]: ").strip()
+            })
+        except ValueError as e:
+            print(f"❌ {e}")
+            return []
+        
+        inicio = time.perf_counter()
+        resultados = buscador.buscar(tiqueteras, consulta)
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        if not resultados:
+            print(f"❌ No se encontraron horarios ({duracion_ms:.0f} ms)")
+            return []
+        
+        print(f"\n📅 {len(resultados)} horarios encontrados ({duracion_ms:.0f} ms)")
+        print("-" * 80)
+        for i, r in enumerate(resultados, 1):
+            h = r.horario
+            print(f"  [{i}] {h.fecha} {h.hora_inicio} - {h.hora_fin} | {r.tiquetera.nombre_deporte} - "
+                  f"{r.tiquetera.nombre_sede} ({h.cupos_disponibles} cupos)")
+        
+        print("\nIngresa los números de los horarios separados por comas (ej: 1,3,5)")
+        seleccion = input("Horarios: ").strip()
+        if not seleccion:
+            return []
+        try:
+            indices = [int(x.strip()) for x in seleccion.split(',')]
+        except ValueError:
+            print("❌ Formato inválido.")
+            return []
+        return [resultados[idx - 1] for idx in indices if 1 <= idx <= len(resultados)]
+    
+    def agregar_reserva(self, tiquetera: Tiquetera, horario: Horario) -> bool:
+        """Agrega una reserva a la lista de pendientes si no choca con otra (ver CART_CONFLICT_POLICY)"""
         reserva = Reserva(tiquetera=tiquetera, horario=horario)
+        conflictos = self.indice_pendientes.conflictos(reserva)
+        for conflicto in conflictos:
+            print(f"⚠️  {reserva.horario.fecha} {reserva.horario.hora_inicio}: {conflicto.mensaje} "
+                  f"({conflicto.reserva})")
+        if conflictos and (Config.CART_CONFLICT_POLICY != 'marcar'
+                           or any(c.tipo == DUPLICADO for c in conflictos)):
+            print(f"❌ No agregada: {reserva}")
+            return False
         self.reservas_pendientes.append(reserva)
+        self.indice_pendientes.agregar(reserva)
         print(f"✅ Agregada: {reserva}")
+        return True
     
     def mostrar_reservas_pendientes(self):
         """Muestra las reservas pendientes"""
@@ -157,13 +218,93 @@ class BookingScheduler:
         
         if confirmacion == 's':
             self.api.realizar_reservas_multiples(self.reservas_pendientes)
-            self.reservas_pendientes.clear()
+            self._vaciar_pendientes()
             return True
         else:
             print("❌ Reservas canceladas")
             return False
     
+    def _vaciar_pendientes(self):
+        self.reservas_pendientes.clear()
+        self.indice_pendientes.limpiar()
+    
+    def programar_reserva(self, reserva: Reserva, hora_objetivo: datetime):
+        """Programa una reserva para enviarse exactamente a hora_objetivo (hora del servidor)"""
+        self.ventana.programar(reserva, hora_objetivo)
+    
+    def ejecutar_ventana(self):
+        """Espera a la(s) hora(s) programada(s), envía las reservas y muestra el reporte"""
+        if not self.ventana.disparos:
+            print("\n📭 No hay reservas programadas")
+            return []
+        
+        primera = min(d.hora_objetivo for d in self.ventana.disparos)
+        print(f"\n⏱️  {len(self.ventana.disparos)} reservas programadas para {datetime.fromtimestamp(primera).strftime('%H:%M:%S.%f')[:-3]}")
+        print("   Esperando la ventana (Ctrl+C para cancelar)...")
+        
+        resultados = self.ventana.ejecutar()
+        
+        if self.reloj.estimacion:
+            e = self.reloj.estimacion
+            print(f"\n🕰️  Offset servidor: {e.offset * 1000:+.0f} ms (±{e.error * 1000:.0f} ms, RTT {e.rtt * 1000:.0f} ms)")
+        
+        print("\n" + "="*80)
+        print("⏱️  RESULTADOS DE LA VENTANA")
+        print("="*80)
+        for r in resultados:
+            estado = "✅" if r.resultado.exitosa else "❌"
+            print(f"{estado} {r.resultado.reserva}")
+            print(f"    jitter envío: {r.jitter_ms:+.2f} ms | latencia servidor: {r.resultado.latencia_ms:.0f} ms | {r.resultado.mensaje}")
+        
+        resumen = VentanaReserva.resumir(resultados)
+        print(f"\n📊 Exitosas: {resumen['exitosas']}/{resumen['total']} | "
+              f"jitter máx: {resumen['jitter_max_ms']:.2f} ms | "
+              f"latencia promedio: {resumen['latencia_promedio_ms']:.0f} ms")
+        return resultados
+    
+    def programar_y_ejecutar(self) -> bool:
+        """Pide una hora exacta y envía todas las reservas pendientes en ese instante"""
+        self.mostrar_reservas_pendientes()
+        
+        if not self.reservas_pendientes:
+            return False
+        
+        print("\n" + "="*80)
+        hora = input("Hora de apertura de la ventana (HH:MM:SS): ").strip()
+        try:
+            hora_dt = datetime.strptime(hora, "%H:%M:%S").time()
+        except ValueError:
+            print("❌ Formato inválido. Usa HH:MM:SS")
+            return False
+        
+        # La hora ingresada es la del servidor de Compensar
+        try:
+            self.reloj.vigente()
+        except Exception as e:
+            print(f"⚠️ No se pudo sincronizar con el servidor, usando reloj local: {e}")
+        ahora_servidor = datetime.fromtimestamp(self.reloj.server_now())
+        objetivo = datetime.combine(ahora_servidor.date(), hora_dt)
+        if objetivo < ahora_servidor:
+            objetivo += timedelta(days=1)
+        
+        for reserva in self.reservas_pendientes:
+            self.programar_reserva(reserva, objetivo)
+        self._vaciar_pendientes()
+        
+        try:
+            self.ejecutar_ventana()
+        except KeyboardInterrupt as e:
+            self.ventana.limpiar()
+            # Las que no alcanzaron a enviarse vuelven a pendientes para reprogramarlas
+            sin_enviar = e.sin_enviar if isinstance(e, VentanaCancelada) else []
+            for reserva in sin_enviar:
+                self.reservas_pendientes.append(reserva)
+                self.indice_pendientes.agregar(reserva)
+            print(f"\n❌ Ventana cancelada: {len(sin_enviar)} reservas vuelven a pendientes")
+            return False
+        return True
+    
     def limpiar_reservas(self):
         """Limpia la lista de reservas pendientes"""
-        self.reservas_pendientes.clear()
+        self._vaciar_pendientes()
         print("🗑️  Reservas pendientes eliminadas")
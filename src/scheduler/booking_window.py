@@ -0,0 +1,225 @@
+import json
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+from config.config import Config
+from src.models.booking import Reserva, ResultadoReserva
+
+
+@dataclass
+class DisparoProgramado:
+    """Una reserva programada para enviarse en un instante exacto"""
+    reserva: Reserva
+    hora_objetivo: float  # Epoch (segundos); reloj del servidor si la ventana tiene reloj
+    cuerpo: Optional[bytes] = None  # Payload serializado en preparar()
+    envio_local: Optional[float] = None  # Instante de envío en el reloj local, calculado en preparar()
+
+
+@dataclass
+class ResultadoDisparo:
+    """Resultado de un disparo: cuándo salió la petición y qué respondió el servidor"""
+    resultado: ResultadoReserva
+    hora_objetivo: float
+    enviado_en: float
+    jitter_ms: float  # enviado_en - envío planeado (positivo = tarde)
+
+    def to_dict(self) -> Dict[str, Any]:
+        datos = self.resultado.to_dict()
+        datos.update({
+            'hora_objetivo': self.hora_objetivo,
+            'enviado_en': self.enviado_en,
+            'jitter_ms': round(self.jitter_ms, 3)
+        })
+        return datos
+
+
+class VentanaCancelada(KeyboardInterrupt):
+    """Ctrl+C durante la ventana; sin_enviar son las reservas que no alcanzaron a salir"""
+
+    def __init__(self, sin_enviar: List[Reserva]):
+        super().__init__(f"{len(sin_enviar)} reservas sin enviar")
+        self.sin_enviar = sin_enviar
+
+
+def esperar_hasta(hora_objetivo: float, margen_spin: float = 0.002):
+    """
+    Bloquea hasta hora_objetivo (epoch local) con precisión de sub-milisegundo
+
+    Duerme la mayor parte del tiempo y hace espera activa solo durante
+    los últimos `margen_spin` segundos, usando perf_counter como base.
+    """
+    limite = time.perf_counter() + (hora_objetivo - time.time())
+    while True:
+        restante = limite - time.perf_counter()
+        if restante <= 0:
+            return
+        if restante > margen_spin:
+            time.sleep(restante - margen_spin)
+
+
+class VentanaReserva:
+    """
+    Envía reservas pre-construidas en el instante en que abre la ventana.
+
+    Antes de la hora objetivo verifica la sesión, construye y serializa cada
+    payload y precalienta las conexiones TLS; en T-0 solo queda el envío.
+
+    Con un SincronizadorReloj las horas objetivo se interpretan en el reloj
+    del servidor y se traducen al reloj local al preparar la ventana.
+    """
+
+    def __init__(self, api, preparacion: Optional[float] = None, reloj=None,
+                 compensar_latencia: bool = False):
+        self.api = api
+        self.preparacion = Config.BOOKING_WINDOW_PREPARE_SECONDS if preparacion is None else preparacion
+        self.reloj = reloj
+        # Adelantar el envío medio RTT para que la petición llegue en T-0 (riesgo de llegar antes)
+        self.compensar_latencia = compensar_latencia
+        self.disparos: List[DisparoProgramado] = []
+        self._preparada = False
+
+    def programar(self, reserva: Reserva, hora_objetivo: Union[datetime, float]):
+        """
+        Agrega una reserva a la ventana
+
+        Args:
+            reserva: Reserva a enviar
+            hora_objetivo: datetime o epoch en segundos (hora del servidor si hay reloj)
+        """
+        if isinstance(hora_objetivo, datetime):
+            hora_objetivo = hora_objetivo.timestamp()
+        self.disparos.append(DisparoProgramado(reserva, float(hora_objetivo)))
+        self._preparada = False
+
+    def limpiar(self):
+        """Elimina todos los disparos programados"""
+        self.disparos.clear()
+        self._preparada = False
+
+    def preparar(self):
+        """
+        Deja todo listo para el envío: sesión, payloads y conexiones
+
+        Raises:
+            Exception: si la sesión no está autenticada o falta raw_data
+        """
+        # Pre-autenticar: sin participantes la sesión no sirve para reservar
+        if not self.api.obtener_participantes():
+            raise Exception("No se pudo verificar la sesión (sin participantes)")
+
+        for disparo in self.disparos:
+            if not disparo.reserva.horario.raw_data:
+                raise Exception(f"No hay datos crudos del horario para {disparo.reserva}")
+            payload = self.api.construir_payload_reserva(disparo.reserva)
+            disparo.cuerpo = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+        self._planear_envios()
+        self.api.calentar_conexiones(len(self.disparos))
+        self._preparada = True
+
+    def _planear_envios(self):
+        adelanto = 0.0
+        margen = Config.CLOCK_SYNC_SAFETY_MS / 1000
+        if self.reloj:
+            try:
+                estimacion = self.reloj.sincronizar()
+            except Exception:
+                # Sin header Date: seguir con la última estimación (o el reloj local)
+                estimacion = self.reloj.estimacion
+            if self.compensar_latencia and estimacion:
+                adelanto = estimacion.rtt / 2
+        for disparo in self.disparos:
+            if self.reloj:
+                disparo.envio_local = self.reloj.a_hora_local(disparo.hora_objetivo) - adelanto + margen
+            else:
+                disparo.envio_local = disparo.hora_objetivo
+
+    def ejecutar(self) -> List[ResultadoDisparo]:
+        """
+        Espera a cada hora objetivo y envía las reservas programadas
+
+        La preparación se hace `preparacion` segundos antes del primer
+        disparo para que las conexiones sigan vivas en T-0.
+
+        Returns:
+            Lista de ResultadoDisparo en el orden en que se programaron
+
+        Raises:
+            VentanaCancelada: con Ctrl+C; los disparos que no habían salido se
+                descartan y sus reservas vienen en la excepción
+        """
+        if not self.disparos:
+            return []
+
+        # Un evento por instante de envío; cada reserva espera en su propio hilo
+        eventos: Dict[float, threading.Event] = {}
+        cancelados = set()
+        try:
+            primera = min(d.hora_objetivo for d in self.disparos)
+            if not self._preparada:
+                desfase = self.reloj.offset if self.reloj else 0.0
+                esperar_hasta(primera - desfase - self.preparacion)
+                self.preparar()
+
+            for disparo in self.disparos:
+                eventos.setdefault(disparo.envio_local, threading.Event())
+
+            resultados: List[Optional[ResultadoDisparo]] = [None] * len(self.disparos)
+
+            def enviar(indice: int, disparo: DisparoProgramado):
+                eventos[disparo.envio_local].wait()
+                if disparo.envio_local in cancelados:
+                    return
+                enviado_en = time.time()
+                resultado = self.api.enviar_reserva_serializada(disparo.reserva, disparo.cuerpo)
+                resultados[indice] = ResultadoDisparo(
+                    resultado=resultado,
+                    hora_objetivo=disparo.hora_objetivo,
+                    enviado_en=enviado_en,
+                    jitter_ms=(enviado_en - disparo.envio_local) * 1000
+                )
+
+            hilos = [
+                threading.Thread(target=enviar, args=(i, d), daemon=True)
+                for i, d in enumerate(self.disparos)
+            ]
+            for hilo in hilos:
+                hilo.start()
+
+            for envio_local in sorted(eventos):
+                esperar_hasta(envio_local)
+                eventos[envio_local].set()
+
+            for hilo in hilos:
+                hilo.join()
+        except KeyboardInterrupt:
+            # Lo que ya salió no se puede retirar; el resto se suelta sin enviar
+            pendientes = [d for d in self.disparos
+                          if d.envio_local not in eventos or not eventos[d.envio_local].is_set()]
+            cancelados.update(d.envio_local for d in pendientes)
+            for envio_local in cancelados:
+                if envio_local in eventos:
+                    eventos[envio_local].set()
+            self.limpiar()
+            raise VentanaCancelada([d.reserva for d in pendientes])
+
+        self.limpiar()
+        return resultados
+
+    @staticmethod
+    def resumir(resultados: List[ResultadoDisparo]) -> Dict[str, Any]:
+        """Estadísticas de jitter de envío y latencia del servidor"""
+        if not resultados:
+            return {'total': 0, 'exitosas': 0}
+        jitters = [abs(r.jitter_ms) for r in resultados]
+        latencias = [r.resultado.latencia_ms for r in resultados]
+        return {
+            'total': len(resultados),
+            'exitosas': sum(1 for r in resultados if r.resultado.exitosa),
+            'jitter_max_ms': max(jitters),
+            'jitter_promedio_ms': sum(jitters) / len(jitters),
+            'latencia_max_ms': max(latencias),
+            'latencia_promedio_ms': sum(latencias) / len(latencias)
+        }
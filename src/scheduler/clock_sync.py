@@ -0,0 +1,127 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import List, Optional
+import requests
+from config.config import Config
+
+
+@dataclass
+class MuestraReloj:
+    """Una medición tipo NTP: envío local, hora del servidor y recepción local"""
+    t_envio: float
+    t_servidor: float  # Epoch del header Date (resolución de 1 segundo)
+    t_recepcion: float
+
+    @property
+    def rtt(self) -> float:
+        return self.t_recepcion - self.t_envio
+
+    @property
+    def offset(self) -> float:
+        # El header Date trunca al segundo: en promedio el servidor está 0.5 s más adelante
+        return self.t_servidor + 0.5 - (self.t_envio + self.t_recepcion) / 2
+
+
+@dataclass
+class EstimacionReloj:
+    """Offset estimado (servidor - local) con su incertidumbre"""
+    offset: float
+    rtt: float
+    error: float  # Semiamplitud del intervalo de confianza, en segundos
+    muestras: int
+    obtenida_en: float = field(default_factory=time.monotonic)
+
+
+class SincronizadorReloj:
+    """
+    Estima el desfase entre el reloj local y el de Compensar.
+
+    Toma varias muestras del header Date a través de la sesión existente.
+    Cada muestra acota el offset a [D - t_recepcion, D + 1 - t_envio]; la
+    intersección de esas cotas, espaciando las muestras dentro de un segundo,
+    reduce la incertidumbre muy por debajo de la resolución del header.
+    """
+
+    def __init__(self, session: requests.Session, url: Optional[str] = None,
+                 muestras: Optional[int] = None):
+        self.session = session
+        self.url = url or Config.API_BASE_URL
+        self.num_muestras = muestras or Config.CLOCK_SYNC_SAMPLES
+        self.estimacion: Optional[EstimacionReloj] = None
+        self._lock = threading.Lock()
+
+    def muestrear(self) -> Optional[MuestraReloj]:
+        """Toma una muestra; None si la respuesta no trae header Date"""
+        t_envio = time.time()
+        response = self.session.head(self.url, allow_redirects=False, timeout=5)
+        t_recepcion = time.time()
+        fecha = response.headers.get('Date')
+        if not fecha:
+            return None
+        return MuestraReloj(t_envio, parsedate_to_datetime(fecha).timestamp(), t_recepcion)
+
+    def sincronizar(self) -> EstimacionReloj:
+        """
+        Mide el offset del servidor y actualiza la estimación
+
+        Raises:
+            Exception: si ninguna muestra trae el header Date
+        """
+        muestras: List[MuestraReloj] = []
+        espaciado = 1.0 / self.num_muestras
+        for i in range(self.num_muestras):
+            try:
+                muestra = self.muestrear()
+                if muestra:
+                    muestras.append(muestra)
+            except requests.RequestException:
+                pass
+            if i < self.num_muestras - 1:
+                time.sleep(espaciado)
+
+        if not muestras:
+            raise Exception("No se pudo obtener la hora del servidor (sin header Date)")
+
+        estimacion = self.estimar(muestras)
+        with self._lock:
+            self.estimacion = estimacion
+        return estimacion
+
+    @staticmethod
+    def estimar(muestras: List[MuestraReloj]) -> EstimacionReloj:
+        """Combina muestras intersectando sus cotas; si no se cruzan usa la de menor RTT"""
+        inferior = max(m.t_servidor - m.t_recepcion for m in muestras)
+        superior = min(m.t_servidor + 1 - m.t_envio for m in muestras)
+        mejor = min(muestras, key=lambda m: m.rtt)
+        if inferior <= superior:
+            offset = (inferior + superior) / 2
+            error = (superior - inferior) / 2
+        else:
+            # Cotas inconsistentes (deriva o respuesta cacheada): quedarse con la más precisa
+            offset = mejor.offset
+            error = 0.5 + mejor.rtt / 2
+        return EstimacionReloj(offset=offset, rtt=mejor.rtt, error=error, muestras=len(muestras))
+
+    def vigente(self) -> EstimacionReloj:
+        """Retorna la estimación actual, resincronizando si venció CLOCK_SYNC_TTL"""
+        with self._lock:
+            estimacion = self.estimacion
+        if estimacion is None or time.monotonic() - estimacion.obtenida_en > Config.CLOCK_SYNC_TTL:
+            estimacion = self.sincronizar()
+        return estimacion
+
+    @property
+    def offset(self) -> float:
+        """Segundos que el servidor va adelante del reloj local (0 si no hay estimación)"""
+        with self._lock:
+            return self.estimacion.offset if self.estimacion else 0.0
+
+    def server_now(self) -> float:
+        """Hora actual del servidor (epoch) corregida con el offset estimado"""
+        return time.time() + self.offset
+
+    def a_hora_local(self, hora_servidor: float) -> float:
+        """Convierte un epoch del reloj del servidor al reloj local"""
+        return hora_servidor - self.offset
@@ -0,0 +1,226 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from config.config import Config
+from src.models.booking import Reserva, ResultadoReserva
+from src.scheduler.booking_executor import BookingExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ColaLlena(Exception):
+    """La cola de trabajos alcanzó JOBS_QUEUE_SIZE"""
+
+
+class TrabajoReservas:
+    """
+    Un lote de reservas enviado a la cola, con el estado de cada reserva.
+
+    Estados del trabajo: en_cola, en_progreso, completado, fallido.
+    Estados de cada reserva: pendiente, exitosa, fallida, omitida.
+    """
+
+    def __init__(self, api, reservas: List[Reserva], user_id: Optional[str] = None):
+        self.id = f"{Config.WORKER_ID}-{uuid.uuid4().hex[:12]}"
+        self.api = api
+        self.reservas = list(reservas)
+        self.user_id = user_id
+        self.estado = 'en_cola'
+        self.error: Optional[str] = None
+        self.resultados: List[Optional[ResultadoReserva]] = [None] * len(self.reservas)
+        self.creado = time.time()
+        self.iniciado: Optional[float] = None
+        self.terminado: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def registrar_resultado(self, indice: int, resultado: ResultadoReserva):
+        with self._lock:
+            self.resultados[indice] = resultado
+
+    @property
+    def finalizado(self) -> bool:
+        return self.estado in ('completado', 'fallido')
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Estado del trabajo y de cada reserva, listo para JSON"""
+        with self._lock:
+            resultados = list(self.resultados)
+        items = []
+        for reserva, resultado in zip(self.reservas, resultados):
+            item = resultado.to_dict() if resultado else {
+                'tiquetera': reserva.tiquetera.nombre_centro_entrenamiento,
+                'sede': reserva.tiquetera.nombre_sede,
+                'fecha': reserva.horario.fecha,
+                'hora_inicio': reserva.horario.hora_inicio,
+                'hora_fin': reserva.horario.hora_fin,
+                'estado': 'pendiente'
+            }
+            items.append(item)
+        terminados = [r for r in resultados if r is not None]
+        return {
+            'job_id': self.id,
+            'estado': self.estado,
+            'error': self.error,
+            'total': len(self.reservas),
+            'procesadas': len(terminados),
+            'exitosas': sum(1 for r in terminados if r.exitosa),
+            'creado': self.creado,
+            'iniciado': self.iniciado,
+            'terminado': self.terminado,
+            'items': items
+        }
+
+
+class ColaTrabajos:
+    """
+    Cola local de trabajos de reserva con un pool fijo de workers.
+
+    Enviar un trabajo retorna de inmediato; cada worker toma un trabajo y lo
+    ejecuta con BookingExecutor. Los trabajos terminados se conservan
+    JOBS_RETENTION segundos para consultarlos. La cola vive en el proceso:
+    con varios workers de Flask cada uno atiende sus propios trabajos.
+    """
+
+    def __init__(self, workers: Optional[int] = None, capacidad: Optional[int] = None,
+                 retencion: Optional[float] = None):
+        self.num_workers = max(1, workers or Config.JOBS_MAX_WORKERS)
+        self.capacidad = Config.JOBS_QUEUE_SIZE if capacidad is None else capacidad
+        self.retencion = Config.JOBS_RETENTION if retencion is None else retencion
+        self._cola: 'queue.Queue[TrabajoReservas]' = queue.Queue(maxsize=self.capacidad)
+        self._trabajos: Dict[str, TrabajoReservas] = {}
+        self._lock = threading.Lock()
+        self._hilos: List[threading.Thread] = []
+        self._nombres = itertools.count(1)
+        self._inicio = time.monotonic()
+        self._ocupados = 0
+        self._tiempo_ocupado = 0.0
+        self.enviados = 0
+        self.completados = 0
+        self.fallidos = 0
+        self.rechazados = 0
+        self._espera_total = 0.0
+        self._ejecucion_total = 0.0
+
+    def _asegurar_workers(self):
+        with self._lock:
+            self._hilos = [h for h in self._hilos if h.is_alive()]
+            while len(self._hilos) < self.num_workers:
+                hilo = threading.Thread(
+                    target=self._worker, name=f'booking-job-{next(self._nombres)}', daemon=True
+                )
+                hilo.start()
+                self._hilos.append(hilo)
+
+    def enviar(self, api, reservas: List[Reserva], user_id: Optional[str] = None) -> TrabajoReservas:
+        """
+        Encola un lote de reservas y retorna el trabajo sin esperar a que corra
+
+        Raises:
+            ColaLlena: si la cola alcanzó su capacidad
+        """
+        self._purgar()
+        self._asegurar_workers()
+        trabajo = TrabajoReservas(api, reservas, user_id)
+        with self._lock:
+            self._trabajos[trabajo.id] = trabajo
+        try:
+            self._cola.put_nowait(trabajo)
+        except queue.Full:
+            with self._lock:
+                del self._trabajos[trabajo.id]
+                self.rechazados += 1
+            raise ColaLlena("La cola de reservas está llena, intenta más tarde")
+        with self._lock:
+            self.enviados += 1
+        return trabajo
+
+    def obtener(self, job_id: str) -> Optional[TrabajoReservas]:
+        with self._lock:
+            return self._trabajos.get(job_id)
+
+    def esperar(self, job_id: str, timeout: Optional[float] = None) -> bool:
+        """Bloquea hasta que el trabajo termine; False si se agotó el timeout"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            trabajo = self.obtener(job_id)
+            if trabajo is None or trabajo.finalizado:
+                return True
+            if limite is not None and time.monotonic() >= limite:
+                return False
+            time.sleep(0.01)
+
+    def _worker(self):
+        while True:
+            trabajo = self._cola.get()
+            inicio = time.monotonic()
+            with self._lock:
+                self._ocupados += 1
+                self._espera_total += time.time() - trabajo.creado
+            try:
+                self._ejecutar(trabajo)
+            finally:
+                duracion = time.monotonic() - inicio
+                with self._lock:
+                    self._ocupados -= 1
+                    self._tiempo_ocupado += duracion
+                    self._ejecucion_total += duracion
+                    if trabajo.estado == 'completado':
+                        self.completados += 1
+                    else:
+                        self.fallidos += 1
+                self._cola.task_done()
+
+    @staticmethod
+    def _ejecutar(trabajo: TrabajoReservas):
+        trabajo.iniciado = time.time()
+        trabajo.estado = 'en_progreso'
+        try:
+            BookingExecutor(trabajo.api).ejecutar(trabajo.reservas, al_terminar=trabajo.registrar_resultado)
+            trabajo.estado = 'completado'
+        except Exception as e:
+            logger.error("Error ejecutando trabajo %s: %s", trabajo.id, e, exc_info=Config.DEBUG)
+            trabajo.error = str(e)
+            trabajo.estado = 'fallido'
+        finally:
+            trabajo.terminado = time.time()
+            trabajo.api = None  # Los trabajos retenidos no mantienen viva la sesión
+
+    def _purgar(self):
+        limite = time.time() - self.retencion
+        with self._lock:
+            vencidos = [
+                job_id for job_id, t in self._trabajos.items()
+                if t.terminado is not None and t.terminado < limite
+            ]
+            for job_id in vencidos:
+                del self._trabajos[job_id]
+
+    def metricas(self) -> Dict[str, Any]:
+        """
+        Profundidad de la cola y utilización de workers desde el arranque
+
+        'utilizacion' es la fracción del tiempo total de workers que estuvo
+        ocupada; cerca de 1 con cola creciente indica que faltan workers.
+        """
+        with self._lock:
+            transcurrido = max(time.monotonic() - self._inicio, 1e-9)
+            iniciados = self.completados + self.fallidos + self._ocupados
+            terminados = self.completados + self.fallidos
+            return {
+                'profundidad_cola': self._cola.qsize(),
+                'capacidad_cola': self.capacidad,
+                'workers': self.num_workers,
+                'workers_ocupados': self._ocupados,
+                'utilizacion': min(1.0, self._tiempo_ocupado / (transcurrido * self.num_workers)),
+                'enviados': self.enviados,
+                'completados': self.completados,
+                'fallidos': self.fallidos,
+                'rechazados': self.rechazados,
+                'espera_promedio_s': (self._espera_total / iniciados) if iniciados else 0.0,
+                'ejecucion_promedio_s': (self._ejecucion_total / terminados) if terminados else 0.0,
+                'trabajos_retenidos': len(self._trabajos)
+            }
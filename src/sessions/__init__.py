@@ -0,0 +1 @@
+# sessions package
@@ -0,0 +1,101 @@
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from config.config import Config
+from src.models.booking import Reserva
+from src.scheduler.booking_conflicts import IndiceIntervalos, Conflicto, ConflictoReserva, DUPLICADO
+
+
+class CarritoReservas:
+    """
+    Reservas pendientes de un usuario, protegidas con un lock.
+
+    Flask atiende cada petición en su propio hilo, así que agregar, eliminar
+    y confirmar pueden ocurrir al mismo tiempo sobre el mismo carrito. La
+    iteración recorre una copia, nunca la lista que otro hilo está modificando.
+
+    Las reservas (item['reserva_obj']) se indexan por intervalo de tiempo
+    para rechazar o marcar al agregar duplicados, solapamientos y traslados
+    imposibles entre centros (ver booking_conflicts).
+    """
+
+    def __init__(self, items: Optional[Iterable[Dict[str, Any]]] = None):
+        self._items: List[Dict[str, Any]] = list(items or [])
+        self._lock = threading.Lock()
+        self._indice = IndiceIntervalos()
+        self._indexar()
+
+    def _indexar(self):
+        """Reconstruye el índice desde los items (con el lock tomado o en __init__)"""
+        self._indice.limpiar()
+        for item in self._items:
+            if item.get('reserva_obj') is not None:
+                self._indice.agregar(item['reserva_obj'])
+
+    def conflictos(self, reserva: Reserva) -> List[Conflicto]:
+        """Conflictos que tendría la reserva con el contenido actual"""
+        with self._lock:
+            return self._indice.conflictos(reserva)
+
+    def agregar(self, item: Dict[str, Any], permitir_conflictos: Optional[bool] = None) -> int:
+        """
+        Agrega una reserva y retorna el total de pendientes
+
+        Los duplicados siempre se rechazan. Los solapamientos y traslados se
+        rechazan o se agregan marcados en item['conflictos'] según
+        permitir_conflictos (por defecto, CART_CONFLICT_POLICY == 'marcar').
+
+        Raises:
+            ConflictoReserva: si la reserva no se agregó
+        """
+        if permitir_conflictos is None:
+            permitir_conflictos = Config.CART_CONFLICT_POLICY == 'marcar'
+        reserva = item.get('reserva_obj')
+        with self._lock:
+            if reserva is not None:
+                conflictos = self._indice.conflictos(reserva)
+                if conflictos:
+                    if not permitir_conflictos or any(c.tipo == DUPLICADO for c in conflictos):
+                        raise ConflictoReserva(conflictos)
+                    item['conflictos'] = [c.to_dict() for c in conflictos]
+                self._indice.agregar(reserva)
+            self._items.append(item)
+            return len(self._items)
+
+    def eliminar(self, indice: int) -> bool:
+        """Elimina la reserva en `indice`; False si el índice no existe"""
+        with self._lock:
+            if 0 <= indice < len(self._items):
+                item = self._items.pop(indice)
+                if item.get('reserva_obj') is not None:
+                    self._indice.eliminar(item['reserva_obj'])
+                return True
+            return False
+
+    def vaciar(self) -> List[Dict[str, Any]]:
+        """Vacía el carrito y retorna lo que contenía (de forma atómica)"""
+        with self._lock:
+            items, self._items = self._items, []
+            self._indice.limpiar()
+            return items
+
+    def reemplazar(self, items: Iterable[Dict[str, Any]]):
+        """Reemplaza todo el contenido (ej: al aplicar el estado de otro worker)"""
+        items = list(items)
+        with self._lock:
+            self._items = items
+            self._indexar()
+
+    def items(self) -> List[Dict[str, Any]]:
+        """Copia de las reservas pendientes"""
+        with self._lock:
+            return list(self._items)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.items())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
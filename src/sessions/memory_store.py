@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from config.config import Config
+from src.sessions.store import SessionStore
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Sesiones en memoria del proceso con desalojo LRU y por inactividad.
+
+    Acotar el número de entradas limita la memoria por nodo: cada entrada
+    mantiene su propio pool de conexiones y caches.
+    """
+
+    def __init__(self, max_entradas: Optional[int] = None, ttl_inactividad: Optional[float] = None,
+                 intervalo_purga: Optional[float] = None):
+        super().__init__(intervalo_purga)
+        self.max_entradas = max_entradas or Config.SESSION_MAX_ENTRIES
+        self.ttl_inactividad = Config.SESSION_IDLE_TTL if ttl_inactividad is None else ttl_inactividad
+        self._entradas: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.desalojadas = 0
+        self.expiradas = 0
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        self._purgar_si_toca()
+        ahora = time.monotonic()
+        with self._lock:
+            registro = self._entradas.get(user_id)
+            if registro is None:
+                return None
+            if ahora - registro[0] > self.ttl_inactividad:
+                del self._entradas[user_id]
+                self.expiradas += 1
+                return None
+            self._entradas[user_id] = (ahora, registro[1])
+            self._entradas.move_to_end(user_id)
+            return registro[1]
+
+    def set(self, user_id: str, entrada: Dict[str, Any]):
+        self._purgar_si_toca()
+        with self._lock:
+            self._entradas[user_id] = (time.monotonic(), entrada)
+            self._entradas.move_to_end(user_id)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.desalojadas += 1
+
+    def delete(self, user_id: str):
+        with self._lock:
+            self._entradas.pop(user_id, None)
+
+    def purgar(self) -> int:
+        limite = time.monotonic() - self.ttl_inactividad
+        with self._lock:
+            vencidas = [uid for uid, (acceso, _) in self._entradas.items() if acceso < limite]
+            for uid in vencidas:
+                del self._entradas[uid]
+            self.expiradas += len(vencidas)
+        return len(vencidas)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'entradas': len(self._entradas),
+                'max_entradas': self.max_entradas,
+                'desalojadas': self.desalojadas,
+                'expiradas': self.expiradas
+            }
@@ -0,0 +1,199 @@
+import json
+import math
+import sqlite3
+import threading
+import time
+from functools import partial
+from typing import Any, Dict, Optional
+from config.config import Config
+from src.api.horarios_registry import RegistroHorarios
+from src.sessions.memory_store import MemorySessionStore
+from src.sessions.store import (
+    SessionStore, ConflictoSesion, serializar_sesion, restaurar_sesion, restaurar_reservas_pendientes, aplicar_cookies
+)
+
+# Actualizar la marca de acceso como máximo cada tantos segundos (evita una escritura por petición)
+INTERVALO_TOQUE = 30.0
+# Clave de la entrada con la versión de la fila que se leyó
+VERSION = 'version_sesion'
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sesiones compartidas entre procesos en un archivo SQLite local.
+
+    La base guarda solo el estado serializable (cookies, headers y carrito)
+    con un número de versión. Cada proceso mantiene sus
+    objetos vivos en un MemorySessionStore acotado y los reutiliza mientras
+    la versión no cambie; si otro worker modificó la sesión, aplica el
+    estado nuevo antes de usarla.
+
+    Cada entrada recuerda la versión con que se leyó (VERSION); set() solo
+    escribe si la fila sigue en esa versión y si no lanza ConflictoSesion,
+    así dos workers que editan el mismo carrito no se pisan en silencio.
+    Una entrada sin versión (recién creada en el login) reemplaza la fila.
+
+    Los slots de horarios mostrados van en otra tabla y se agregan de a
+    poco (guardar_horarios): listar horarios no reescribe la sesión. Un
+    worker que no conoce un slot lo busca ahí al resolverlo.
+
+    Los trabajos (/api/jobs) y las vigilancias (/api/vigilancias) no se
+    comparten: siguen en el proceso que los creó y requieren sticky routing
+    por usuario (sus ids llevan Config.WORKER_ID; otro worker responde 421).
+    """
+
+    def __init__(self, ruta: Optional[str] = None, ttl_inactividad: Optional[float] = None,
+                 max_entradas: Optional[int] = None, intervalo_purga: Optional[float] = None):
+        super().__init__(intervalo_purga)
+        self.ruta = ruta or Config.SESSION_DB_PATH
+        self.ttl_inactividad = Config.SESSION_IDLE_TTL if ttl_inactividad is None else ttl_inactividad
+        # purgar() de este store también purga el local: el local no lo hace por su cuenta
+        self._local = MemorySessionStore(max_entradas=max_entradas, ttl_inactividad=self.ttl_inactividad,
+                                         intervalo_purga=math.inf)
+        self._hilos = threading.local()
+        self.restauradas = 0
+        with self._conexion() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sesiones ("
+                " user_id TEXT PRIMARY KEY,"
+                " estado TEXT NOT NULL,"
+                " version INTEGER NOT NULL DEFAULT 1,"
+                " accedido REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sesiones_accedido ON sesiones(accedido)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS horarios_sesion ("
+                " user_id TEXT NOT NULL,"
+                " slot TEXT NOT NULL,"
+                " datos TEXT NOT NULL,"
+                " PRIMARY KEY (user_id, slot))"
+            )
+
+    def _conexion(self) -> sqlite3.Connection:
+        # Una conexión por hilo; WAL permite lectores concurrentes de varios workers
+        conn = getattr(self._hilos, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.ruta, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._hilos.conn = conn
+        return conn
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        self._purgar_si_toca()
+        conn = self._conexion()
+        fila = conn.execute(
+            "SELECT version, accedido FROM sesiones WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        ahora = time.time()
+        if fila is None or ahora - fila[1] > self.ttl_inactividad:
+            if fila is not None:
+                self.delete(user_id)
+            else:
+                self._local.delete(user_id)
+            return None
+
+        version, accedido = fila
+        local = self._local.get(user_id)
+        if local is not None and local[0] == version:
+            entrada = local[1]
+        else:
+            estado = json.loads(conn.execute(
+                "SELECT estado FROM sesiones WHERE user_id = ?", (user_id,)
+            ).fetchone()[0])
+            if local is not None:
+                entrada = local[1]
+                aplicar_cookies(entrada['api'].session, estado)
+                entrada['reservas_pendientes'].reemplazar(
+                    restaurar_reservas_pendientes(estado.get('reservas_pendientes', []))
+                )
+            else:
+                entrada = restaurar_sesion(user_id, estado)
+                entrada['horarios'].respaldo = partial(self._buscar_horario, user_id)
+                self.restauradas += 1
+            entrada[VERSION] = version
+            self._local.set(user_id, (version, entrada))
+
+        if ahora - accedido > INTERVALO_TOQUE:
+            with conn:
+                conn.execute("UPDATE sesiones SET accedido = ? WHERE user_id = ?", (ahora, user_id))
+        return entrada
+
+    def set(self, user_id: str, entrada: Dict[str, Any]):
+        self._purgar_si_toca()
+        estado = json.dumps(serializar_sesion(entrada), ensure_ascii=False)
+        leida = entrada.get(VERSION)
+        conn = self._conexion()
+        with conn:
+            if leida is None:
+                conn.execute(
+                    "INSERT INTO sesiones (user_id, estado, version, accedido) VALUES (?, ?, 1, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET estado = excluded.estado, "
+                    "version = sesiones.version + 1, accedido = excluded.accedido",
+                    (user_id, estado, time.time())
+                )
+            elif conn.execute(
+                "UPDATE sesiones SET estado = ?, version = version + 1, accedido = ? "
+                "WHERE user_id = ? AND version = ?",
+                (estado, time.time(), user_id, leida)
+            ).rowcount == 0:
+                raise ConflictoSesion(user_id)
+            version = conn.execute(
+                "SELECT version FROM sesiones WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+        entrada[VERSION] = version
+        entrada['horarios'].respaldo = partial(self._buscar_horario, user_id)
+        self._local.set(user_id, (version, entrada))
+
+    def guardar_horarios(self, user_id: str, registro: RegistroHorarios):
+        nuevos = registro.tomar_nuevos()
+        if not nuevos:
+            return
+        conn = self._conexion()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO horarios_sesion (user_id, slot, datos) VALUES (?, ?, ?)",
+                [(user_id, d['slot'], json.dumps(d, ensure_ascii=False)) for d in nuevos]
+            )
+            # Mismo tope que el registro en memoria: se quedan los más recientes (rowid creciente)
+            conn.execute(
+                "DELETE FROM horarios_sesion WHERE user_id = ? AND slot NOT IN ("
+                " SELECT slot FROM horarios_sesion WHERE user_id = ? ORDER BY rowid DESC LIMIT ?)",
+                (user_id, user_id, registro.capacidad)
+            )
+
+    def _buscar_horario(self, user_id: str, slot: str) -> Optional[Dict[str, Any]]:
+        fila = self._conexion().execute(
+            "SELECT datos FROM horarios_sesion WHERE user_id = ? AND slot = ?", (user_id, slot)
+        ).fetchone()
+        return json.loads(fila[0]) if fila else None
+
+    def delete(self, user_id: str):
+        conn = self._conexion()
+        with conn:
+            conn.execute("DELETE FROM sesiones WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM horarios_sesion WHERE user_id = ?", (user_id,))
+        self._local.delete(user_id)
+
+    def purgar(self) -> int:
+        conn = self._conexion()
+        with conn:
+            eliminadas = conn.execute(
+                "DELETE FROM sesiones WHERE accedido < ?", (time.time() - self.ttl_inactividad,)
+            ).rowcount
+            conn.execute("DELETE FROM horarios_sesion WHERE user_id NOT IN (SELECT user_id FROM sesiones)")
+        self._local.purgar()
+        return eliminadas
+
+    def stats(self) -> Dict[str, Any]:
+        total = self._conexion().execute("SELECT COUNT(*) FROM sesiones").fetchone()[0]
+        local = self._local.stats()
+        return {
+            'backend': 'sqlite',
+            'entradas': total,
+            'entradas_locales': local['entradas'],
+            'max_entradas_locales': local['max_entradas'],
+            'restauradas': self.restauradas,
+            'desalojadas': local['desalojadas'],
+            'expiradas': local['expiradas']
+        }
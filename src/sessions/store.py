@@ -0,0 +1,197 @@
+import abc
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+import requests
+from config.config import Config
+from src.api.compensar_api import CompensarAPI
+from src.api.horarios_registry import RegistroHorarios
+from src.api.shared_availability import disponibilidad_compartida
+from src.api.slot_search import BuscadorHorarios
+from src.api.tiqueteras_cache import TiqueterasCache
+from src.auth.compensar_auth import CompensarAuth
+from src.models.booking import Tiquetera, Horario, Reserva
+from src.scheduler.booking_scheduler import BookingScheduler
+from src.sessions.cart import CarritoReservas
+
+
+def crear_sesion_usuario(auth, api: CompensarAPI, tiqueteras: Optional[List[Tiquetera]] = None,
+                         reservas_pendientes: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Arma la entrada de sesión de un usuario con sus objetos vivos
+
+    Args:
+        auth: Objeto de autenticación (CompensarAuth o CompensarAuthSelenium)
+        api: CompensarAPI sobre la sesión autenticada
+        tiqueteras: Tiqueteras ya consultadas para precargar el cache
+        reservas_pendientes: Carrito restaurado
+    """
+    tiqueteras_cache = TiqueterasCache(api)
+    if tiqueteras:
+        tiqueteras_cache.cargar(tiqueteras)
+    return {
+        'auth': auth,
+        'api': api,
+        'scheduler': BookingScheduler(api),
+        'tiqueteras': tiqueteras_cache,
+        'horarios': RegistroHorarios(),
+        'buscador': BuscadorHorarios(api),
+        'reservas_pendientes': CarritoReservas(reservas_pendientes)
+    }
+
+
+def serializar_sesion(entrada: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extrae el estado serializable de una entrada: cookies, headers y carrito
+
+    Los slots de horarios mostrados no van aquí: cambian en cada listado y
+    se guardan aparte con SessionStore.guardar_horarios.
+
+    Los objetos vivos (pool de conexiones, caches) no se guardan; se
+    reconstruyen en el worker que restaure la sesión. Los trabajos de
+    /api/jobs y las vigilancias viven en el proceso que los creó.
+    """
+    session = entrada['api'].session
+    cookies = [
+        {'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path,
+         'secure': c.secure, 'expires': c.expires}
+        for c in session.cookies
+    ]
+    pendientes = []
+    for item in entrada.get('reservas_pendientes', []):
+        datos = {k: v for k, v in item.items() if k != 'reserva_obj'}
+        reserva = item.get('reserva_obj')
+        if reserva is not None:
+            datos['reserva'] = {'tiquetera': asdict(reserva.tiquetera), 'horario': asdict(reserva.horario)}
+        pendientes.append(datos)
+    return {
+        'cookies': cookies,
+        'headers': dict(session.headers),
+        'reservas_pendientes': pendientes
+    }
+
+
+def restaurar_reservas_pendientes(pendientes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Reconstruye el carrito serializado con serializar_sesion"""
+    restauradas = []
+    for datos in pendientes:
+        item = {k: v for k, v in datos.items() if k != 'reserva'}
+        reserva = datos.get('reserva')
+        if reserva:
+            item['reserva_obj'] = Reserva(Tiquetera(**reserva['tiquetera']), Horario(**reserva['horario']))
+        restauradas.append(item)
+    return restauradas
+
+
+def restaurar_sesion(user_id: str, estado: Dict[str, Any]) -> Dict[str, Any]:
+    """Reconstruye una entrada de sesión completa a partir de su estado serializado"""
+    auth = CompensarAuth()
+    aplicar_cookies(auth.session, estado)
+    auth.authenticated = True
+    auth.user_id = user_id
+    return crear_sesion_usuario(
+        auth,
+        CompensarAPI(auth.session, disponibilidad=disponibilidad_compartida()),
+        reservas_pendientes=restaurar_reservas_pendientes(estado.get('reservas_pendientes', []))
+    )
+
+
+def aplicar_cookies(session: requests.Session, estado: Dict[str, Any]):
+    """Copia cookies y headers serializados a una requests.Session"""
+    session.headers.update(estado.get('headers', {}))
+    for c in estado.get('cookies', []):
+        session.cookies.set(c['name'], c['value'], domain=c.get('domain'), path=c.get('path', '/'),
+                            secure=c.get('secure', False), expires=c.get('expires'))
+
+
+class ConflictoSesion(Exception):
+    """Otro worker guardó la sesión después de que este la leyó; hay que releerla y reintentar"""
+
+    def __init__(self, user_id: str):
+        super().__init__('La sesión cambió en otra petición, vuelve a intentar')
+        self.user_id = user_id
+
+
+class SessionStore(abc.ABC):
+    """
+    Interfaz de almacenamiento de sesiones de usuario.
+
+    Las entradas son los dicts de crear_sesion_usuario. Después de modificar
+    una entrada (por ejemplo el carrito) hay que volver a llamar a set()
+    para que los backends compartidos la persistan.
+
+    Las sesiones de usuarios que no vuelven se purgan solas: get() y set()
+    llaman a purgar() como máximo cada `intervalo_purga` segundos.
+    """
+
+    def __init__(self, intervalo_purga: Optional[float] = None):
+        self.intervalo_purga = Config.SESSION_PURGE_INTERVAL if intervalo_purga is None else intervalo_purga
+        self._proxima_purga = time.monotonic() + self.intervalo_purga
+        self._lock_purga = threading.Lock()
+
+    def _purgar_si_toca(self):
+        """Purga si ya pasó el intervalo; solo un hilo a la vez y sin bloquear a los demás"""
+        ahora = time.monotonic()
+        if ahora < self._proxima_purga or not self._lock_purga.acquire(blocking=False):
+            return
+        try:
+            self._proxima_purga = ahora + self.intervalo_purga
+            self.purgar()
+        finally:
+            self._lock_purga.release()
+
+    @abc.abstractmethod
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Entrada del usuario, o None si no existe o expiró"""
+
+    @abc.abstractmethod
+    def set(self, user_id: str, entrada: Dict[str, Any]):
+        """
+        Guarda (o reemplaza) la entrada del usuario
+
+        Raises:
+            ConflictoSesion: en backends compartidos, si la entrada se leyó
+                con get() y otro worker la guardó entre tanto
+        """
+
+    @abc.abstractmethod
+    def delete(self, user_id: str):
+        """Elimina la sesión del usuario (logout)"""
+
+    @abc.abstractmethod
+    def purgar(self) -> int:
+        """Elimina las sesiones inactivas; retorna cuántas se eliminaron"""
+
+    @abc.abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Contadores del backend para /api/stats"""
+
+    def guardar_horarios(self, user_id: str, registro: RegistroHorarios):
+        """
+        Persiste los slots que `registro` agregó desde la última vez
+
+        Los listados de horarios llaman esto en lugar de set(): solo escriben
+        los slots nuevos. En memoria no hay nada que hacer, el registro vive
+        en la entrada.
+        """
+
+    def __contains__(self, user_id: str) -> bool:
+        return self.get(user_id) is not None
+
+
+def crear_session_store(tipo: Optional[str] = None) -> SessionStore:
+    """
+    Crea el backend configurado en SESSION_STORE
+
+    Args:
+        tipo: 'memory' o 'sqlite' (por defecto Config.SESSION_STORE)
+    """
+    tipo = (tipo or Config.SESSION_STORE).lower()
+    if tipo == 'memory':
+        from src.sessions.memory_store import MemorySessionStore
+        return MemorySessionStore()
+    if tipo == 'sqlite':
+        from src.sessions.sqlite_store import SQLiteSessionStore
+        return SQLiteSessionStore()
+    raise ValueError(f"SESSION_STORE desconocido: {tipo}")
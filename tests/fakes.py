@@ -0,0 +1,69 @@
+"""Datos y dobles compartidos por varias pruebas (no contiene pruebas)"""
+
+from src.models.booking import Tiquetera, Horario, Reserva
+
+PERSONAS = {'personas': [{'id': 1, 'id_participacion': 4626802}]}
+
+SLOT = {
+    'conteo': 10, 'totalTurnos': 14, 'ids': [113513310], 'idTiquetera': 7,
+    'caracteristicas': {'1427': {'nombre': 'Semiolímpica'}},
+    'centroEntrenamiento': {'id': 93, 'idEscenario': 602}
+}
+HORARIOS = {
+    '2025-11-30': {'06:00 - 07:00': {'1427': SLOT}},
+    '2025-12-01': {'06:00 - 07:00': {'1427': SLOT}, '07:00 - 08:00': {'1427': SLOT}}
+}
+
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self._data = data
+        self.status_code = status_code
+        self.text = str(data)
+        self.url = ''
+
+    def json(self):
+        return self._data
+
+
+class FakeSession:
+    """Sesión falsa que registra las llamadas y responde con datos fijos"""
+
+    def __init__(self, horarios=None):
+        self.headers = {}
+        self.calls = []
+        self.horarios = horarios or {}
+
+    def get(self, url, **kwargs):
+        self.calls.append(('GET', url))
+        return FakeResponse(PERSONAS)
+
+    def post(self, url, **kwargs):
+        self.calls.append(('POST', url))
+        if url.endswith('/tiqueteras'):
+            return FakeResponse({'tiqueteras': [{'id': 7, 'id_tiquetera': 7}]})
+        if url.endswith('/guardar'):
+            return FakeResponse({'success': True})
+        return FakeResponse(self.horarios)
+
+    def count(self, fragment):
+        return sum(1 for _, url in self.calls if fragment in url)
+
+
+def make_tiquetera():
+    return Tiquetera(
+        id=7, nombre_centro_entrenamiento='Calle 94', nombre_sede='Salones Calle 94',
+        nombre_deporte='Acondicionamiento', id_centro_entrenamiento=1,
+        id_participacion_deportista=4626802, entradas=10, ilimitado=False,
+        id_tiquetera=7, id_escenario=602, id_centro=93
+    )
+
+
+def make_reserva(id_turno, entradas=10, ilimitado=False, id_tiquetera=7):
+    tiquetera = Tiquetera(
+        id=id_tiquetera, nombre_centro_entrenamiento='Cajicá', nombre_sede='Piscina Cajicá',
+        nombre_deporte='Natación', id_centro_entrenamiento=1, id_participacion_deportista=1,
+        entradas=entradas, ilimitado=ilimitado, id_tiquetera=id_tiquetera
+    )
+    horario = Horario('2025-11-30', '06:00', '07:00', 10, id_turno=id_turno, raw_data={'ids': [id_turno]})
+    return Reserva(tiquetera, horario)
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import unittest
+import httpx
+from src.api.async_compensar_api import AsyncCompensarAPI
+from src.api.compensar_api import CompensarAPI
+from src.models.booking import Reserva
+from tests.fakes import FakeSession, HORARIOS, PERSONAS, make_tiquetera
+
+
+class FakeUpstream:
+    """Responde como el servidor de Compensar a través de httpx.MockTransport"""
+
+    def __init__(self, horarios=None):
+        self.horarios = horarios or {}
+        self.llamadas = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.llamadas.append(request.url.path)
+        if request.url.path.endswith('/grupofamiliar/lista/json'):
+            return httpx.Response(200, json=PERSONAS)
+        if request.url.path.endswith('/tiqueteras'):
+            return httpx.Response(200, json={'tiqueteras': [{'id': 7, 'id_tiquetera': 7}]})
+        if request.url.path.endswith('/guardar'):
+            payload = json.loads(request.content)
+            exitosa = payload['participantes'][0]['usos'] == 1
+            return httpx.Response(200, json={'success': exitosa})
+        return httpx.Response(200, json=self.horarios)
+
+    def count(self, fragmento):
+        return sum(1 for path in self.llamadas if fragmento in path)
+
+
+def make_api(upstream, **kwargs):
+    return AsyncCompensarAPI(client=httpx.AsyncClient(transport=httpx.MockTransport(upstream)), **kwargs)
+
+
+class TestAsyncCompensarAPI(unittest.TestCase):
+    def test_same_models_as_threaded_client(self):
+        tiquetera = make_tiquetera()
+        sincronos = CompensarAPI(FakeSession(HORARIOS)).get_horarios(tiquetera, '2025-12-01')
+
+        async def consultar():
+            async with make_api(FakeUpstream(HORARIOS)) as api:
+                return await api.get_tiqueteras(), await api.get_horarios(tiquetera, '2025-12-01')
+
+        tiqueteras, asincronos = asyncio.run(consultar())
+        self.assertEqual(tiqueteras, CompensarAPI(FakeSession()).get_tiqueteras())
+        self.assertEqual(asincronos, sincronos)
+
+    def test_range_and_batch_share_participants_and_cache(self):
+        upstream = FakeUpstream(HORARIOS)
+        tiquetera = make_tiquetera()
+
+        async def flujo():
+            async with make_api(upstream, max_reservas=2) as api:
+                por_fecha = await api.get_horarios_range(tiquetera, ['2025-11-30', '2025-12-01'])
+                reservas = [Reserva(tiquetera, h) for h in por_fecha['2025-12-01']]
+                return por_fecha, await api.realizar_reservas_multiples(reservas)
+
+        por_fecha, resumen = asyncio.run(flujo())
+        self.assertEqual([len(h) for h in por_fecha.values()], [1, 2])
+        self.assertEqual(resumen['exitosas'], 2)
+        self.assertEqual(upstream.count('grupofamiliar'), 1)
+        self.assertLessEqual(upstream.count('/horarios'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
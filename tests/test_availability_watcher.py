@@ -0,0 +1,188 @@
+import time
+import unittest
+from datetime import datetime, timedelta
+from config.config import Config
+from src.models.booking import Horario, ResultadoReserva
+from src.scheduler.availability_watcher import (
+    VigilanteDisponibilidad, LimiteVigilancias, calcular_intervalo
+)
+from tests.fakes import make_reserva
+
+MANANA = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+class FakeAPI:
+    """Devuelve los horarios configurados y cuenta consultas y reservas"""
+
+    def __init__(self, cupos=0, exitosa=True):
+        self.cupos = cupos
+        self.exitosa = exitosa
+        self.consultas = 0
+        self.reservas = []
+
+    def get_horarios_frescos(self, tiquetera, fecha):
+        self.consultas += 1
+        return [
+            Horario(fecha, '06:00', '07:00', self.cupos, id_turno=1, raw_data={'totalUtilizado': 100}),
+            Horario(fecha, '18:00', '19:00', 0, id_turno=2, raw_data={'totalUtilizado': 100})
+        ]
+
+    def realizar_reserva_detallada(self, reserva):
+        self.reservas.append(reserva)
+        return ResultadoReserva(reserva, self.exitosa, 'ok' if self.exitosa else 'sin cupo')
+
+
+class TestCalcularIntervalo(unittest.TestCase):
+    def test_backs_off_when_stable_and_speeds_up_near_start(self):
+        lejos = Config.WATCH_NEAR_START * 10
+        self.assertEqual(calcular_intervalo(lejos), Config.WATCH_INTERVAL_MIN)
+        self.assertGreater(calcular_intervalo(lejos, sin_cambios=3), calcular_intervalo(lejos, sin_cambios=1))
+        self.assertEqual(calcular_intervalo(lejos, sin_cambios=50), Config.WATCH_INTERVAL_MAX)
+        self.assertLess(
+            calcular_intervalo(lejos, utilizacion=100, sin_cambios=3),
+            calcular_intervalo(lejos, utilizacion=0, sin_cambios=3)
+        )
+        self.assertEqual(calcular_intervalo(60, sin_cambios=50), Config.WATCH_INTERVAL_MIN)
+
+
+class TestVigilanteDisponibilidad(unittest.TestCase):
+    def test_watches_on_same_tiquetera_and_date_share_one_poll(self):
+        api = FakeAPI()
+        vigilante = VigilanteDisponibilidad(por_usuario=60, global_=60)
+        tiquetera = make_reserva(1).tiquetera
+        a = vigilante.registrar(api, tiquetera, MANANA, '06:00', '07:00', user_id='u1', iniciar=False)
+        b = vigilante.registrar(api, tiquetera, MANANA, '18:00', '18:00', user_id='u1', iniciar=False)
+        vigilante.procesar()
+        self.assertEqual(api.consultas, 1)
+        self.assertEqual((a.consultas, b.consultas), (1, 1))
+        self.assertEqual(vigilante.metricas()['grupos'], 1)
+
+    def test_books_as_soon_as_a_cupo_opens(self):
+        api = FakeAPI(cupos=0)
+        vigilante = VigilanteDisponibilidad(por_usuario=60, global_=60)
+        vigilancia = vigilante.registrar(
+            api, make_reserva(1).tiquetera, MANANA, '05:00', '08:00', reservar=True, user_id='u1', iniciar=False
+        )
+        espera = vigilante.procesar()
+        self.assertEqual(vigilancia.estado, 'activa')
+        self.assertGreater(espera, 0)
+
+        api.cupos = 2
+        vigilante.procesar(time.time() + espera)
+        self.assertEqual(vigilancia.estado, 'reservada')
+        self.assertEqual(api.reservas[0].horario.hora_inicio, '06:00')
+        self.assertIsNone(vigilante.procesar())
+
+    def test_gives_up_after_max_failed_bookings(self):
+        api = FakeAPI(cupos=1, exitosa=False)
+        vigilante = VigilanteDisponibilidad(por_usuario=60, global_=60)
+        vigilancia = vigilante.registrar(
+            api, make_reserva(1).tiquetera, MANANA, '06:00', '06:00', reservar=True, user_id='u1', iniciar=False
+        )
+        ahora = time.time()
+        for _ in range(Config.WATCH_MAX_INTENTOS):
+            ahora += vigilante.procesar(ahora) or 0
+        self.assertEqual(vigilancia.estado, 'fallida')
+        self.assertEqual(len(api.reservas), Config.WATCH_MAX_INTENTOS)
+
+    def test_budgets_defer_polls_per_user_and_globally(self):
+        api = FakeAPI()
+        vigilante = VigilanteDisponibilidad(por_usuario=1, global_=2)
+        for i, user_id in enumerate(['u1', 'u1', 'u2', 'u3']):
+            vigilante.registrar(
+                api, make_reserva(i, id_tiquetera=i).tiquetera, MANANA, '06:00', '07:00',
+                user_id=user_id, iniciar=False
+            )
+        vigilante.procesar()
+        # u1 agota su ficha con el primer grupo; u2 usa la última ficha global; u3 espera
+        self.assertEqual(api.consultas, 2)
+        self.assertEqual(vigilante.metricas()['consultas_diferidas'], 2)
+
+    def test_user_bucket_is_dropped_when_their_last_watch_ends(self):
+        vigilante = VigilanteDisponibilidad(por_usuario=60, global_=60)
+        primera = vigilante.registrar(FakeAPI(), make_reserva(1).tiquetera, MANANA, '06:00', '07:00',
+                                      user_id='u1', iniciar=False)
+        segunda = vigilante.registrar(FakeAPI(), make_reserva(2).tiquetera, MANANA, '18:00', '19:00',
+                                      user_id='u1', iniciar=False)
+        vigilante.procesar()
+        self.assertIn('u1', vigilante._limites_usuario)
+
+        vigilante.cancelar(primera.id, 'u1')
+        vigilante.procesar()
+        self.assertIn('u1', vigilante._limites_usuario)
+        vigilante.cancelar(segunda.id, 'u1')
+        vigilante.procesar()
+        self.assertNotIn('u1', vigilante._limites_usuario)
+
+    def test_per_user_watch_limit(self):
+        vigilante = VigilanteDisponibilidad()
+        tiquetera = make_reserva(1).tiquetera
+        for _ in range(Config.WATCH_MAX_PER_USER):
+            vigilante.registrar(FakeAPI(), tiquetera, MANANA, '06:00', '07:00', user_id='u1', iniciar=False)
+        with self.assertRaises(LimiteVigilancias):
+            vigilante.registrar(FakeAPI(), tiquetera, MANANA, '06:00', '07:00', user_id='u1', iniciar=False)
+
+    def test_rejects_malformed_dates_and_hours(self):
+        vigilante = VigilanteDisponibilidad()
+        tiquetera = make_reserva(1).tiquetera
+        for fecha, desde, hasta in ((MANANA, '6pm', '19:00'), ('mañana', '06:00', '07:00'),
+                                    (MANANA, '25:00', '26:00'), (MANANA, '08:00', '07:00')):
+            with self.assertRaises(ValueError):
+                vigilante.registrar(FakeAPI(), tiquetera, fecha, desde, hasta, user_id='u1', iniciar=False)
+        self.assertEqual(vigilante.metricas()['vigilancias_activas'], 0)
+
+    def test_failing_group_backs_off_then_ends_and_others_still_poll(self):
+        class APIRota(FakeAPI):
+            def get_horarios_frescos(self, tiquetera, fecha):
+                self.consultas += 1
+                raise RuntimeError('Error al obtener horarios: 503')
+
+        rota, sana = APIRota(), FakeAPI()
+        vigilante = VigilanteDisponibilidad(por_usuario=60, global_=60)
+        mala = vigilante.registrar(rota, make_reserva(1).tiquetera, MANANA, '06:00', '07:00',
+                                   user_id='u1', iniciar=False)
+        buena = vigilante.registrar(sana, make_reserva(2, id_tiquetera=2).tiquetera, MANANA, '06:00', '07:00',
+                                    user_id='u2', iniciar=False)
+        ahora = time.time()
+        vigilante.procesar(ahora)
+        self.assertEqual((mala.estado, rota.consultas), ('activa', 1))
+        self.assertIn('503', mala.mensaje)
+        self.assertEqual((buena.estado, sana.consultas), ('activa', 1))
+        # Una caída no se consulta a ritmo completo: el grupo espera más con cada error
+        vigilante.procesar(ahora + Config.WATCH_INTERVAL_MIN)
+        self.assertEqual(rota.consultas, 1)
+
+        for _ in range(Config.WATCH_MAX_ERRORES - 1):
+            ahora += Config.WATCH_INTERVAL_MAX
+            vigilante.procesar(ahora)
+        self.assertEqual((mala.estado, rota.consultas), ('error', Config.WATCH_MAX_ERRORES))
+        vigilante.procesar(ahora + Config.WATCH_INTERVAL_MAX)
+        self.assertEqual(rota.consultas, Config.WATCH_MAX_ERRORES)
+        self.assertEqual(buena.estado, 'activa')
+
+    def test_franja_without_conteo_does_not_break_the_poll(self):
+        api = FakeAPI(cupos=None)
+        vigilante = VigilanteDisponibilidad(por_usuario=60, global_=60)
+        vigilancia = vigilante.registrar(api, make_reserva(1).tiquetera, MANANA, '06:00', '07:00',
+                                         user_id='u1', iniciar=False)
+        vigilante.procesar()
+        self.assertEqual((vigilancia.estado, vigilancia.consultas), ('activa', 1))
+
+    def test_watch_cancelled_during_poll_is_not_booked(self):
+        vigilante = VigilanteDisponibilidad(por_usuario=60, global_=60)
+
+        class APICancela(FakeAPI):
+            def get_horarios_frescos(self, tiquetera, fecha):
+                vigilante.cancelar(vigilancia.id, 'u1')
+                return super().get_horarios_frescos(tiquetera, fecha)
+
+        api = APICancela(cupos=2)
+        vigilancia = vigilante.registrar(api, make_reserva(1).tiquetera, MANANA, '06:00', '07:00',
+                                         reservar=True, user_id='u1', iniciar=False)
+        vigilante.procesar()
+        self.assertEqual(vigilancia.estado, 'cancelada')
+        self.assertEqual(api.reservas, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+from src.models.booking import Tiquetera, Horario, Reserva
+from src.scheduler.booking_conflicts import (
+    IndiceIntervalos, ConflictoReserva, DUPLICADO, SOLAPAMIENTO, TRASLADO
+)
+from src.sessions.cart import CarritoReservas
+
+
+def make_reserva(centro, fecha, inicio, fin, id_turno=None, id_tiquetera=1, sede=None):
+    tiquetera = Tiquetera(id_tiquetera, centro, sede or f'Salones {centro}', 'Acondicionamiento', id_tiquetera, 1,
+                          10, False, id_tiquetera)
+    return Reserva(tiquetera, Horario(fecha, inicio, fin, 5, id_turno=id_turno))
+
+
+def item(reserva):
+    return {'fecha': reserva.horario.fecha, 'hora_inicio': reserva.horario.hora_inicio, 'reserva_obj': reserva}
+
+
+class TestIndiceIntervalos(unittest.TestCase):
+    def setUp(self):
+        self.indice = IndiceIntervalos(buffer_traslado=30 * 60)
+        self.indice.agregar(make_reserva('Calle 94', '2025-12-01', '06:00', '07:00', id_turno=1))
+        self.indice.agregar(make_reserva('Calle 94', '2025-12-01', '18:00', '19:00', id_turno=2))
+
+    def tipos(self, reserva):
+        return [c.tipo for c in self.indice.conflictos(reserva)]
+
+    def test_same_turno_is_duplicate(self):
+        self.assertEqual(self.tipos(make_reserva('Calle 94', '2025-12-01', '06:00', '07:00', id_turno=1,
+                                                 id_tiquetera=2)), [DUPLICADO])
+        self.assertEqual(self.tipos(make_reserva('Calle 94', '2025-12-01', '06:00', '07:00')), [DUPLICADO])
+
+    def test_overlap_in_another_centro(self):
+        self.assertEqual(self.tipos(make_reserva('CBI - Carrera 60', '2025-12-01', '06:30', '07:30', 3, 2)),
+                         [SOLAPAMIENTO])
+
+    def test_travel_buffer_only_between_centros(self):
+        self.assertEqual(self.tipos(make_reserva('CBI - Carrera 60', '2025-12-01', '07:15', '08:00', 4, 2)),
+                         [TRASLADO])
+        self.assertEqual(self.tipos(make_reserva('Calle 94', '2025-12-01', '07:00', '08:00', 5, 3)), [])
+        self.assertEqual(self.tipos(make_reserva('CBI - Carrera 60', '2025-12-01', '07:30', '08:30', 6, 2)), [])
+        self.assertEqual(self.tipos(make_reserva('CBI - Carrera 60', '2025-12-02', '06:00', '07:00', 7, 2)), [])
+
+    def test_travel_buffer_follows_the_sede_not_the_program(self):
+        # Mismo centro (programa) en otra sede: hay que trasladarse
+        self.assertEqual(self.tipos(make_reserva('Calle 94', '2025-12-01', '07:15', '08:00', 9, 2,
+                                                 sede='Piscina Cajicá')), [TRASLADO])
+        # Otro programa en la misma sede: no hay traslado
+        self.assertEqual(self.tipos(make_reserva('Natación', '2025-12-01', '07:15', '08:00', 10, 2,
+                                                 sede='Salones Calle 94')), [])
+
+    def test_remove_by_identity(self):
+        reserva = make_reserva('CBI - Carrera 60', '2025-12-01', '12:00', '13:00', 8, 2)
+        self.indice.agregar(reserva)
+        self.assertTrue(self.indice.eliminar(reserva))
+        self.assertFalse(self.indice.eliminar(reserva))
+        self.assertEqual(len(self.indice), 2)
+
+
+class TestCarritoConflictos(unittest.TestCase):
+    def test_cart_rejects_or_flags_conflicts(self):
+        carrito = CarritoReservas()
+        carrito.agregar(item(make_reserva('Calle 94', '2025-12-01', '06:00', '07:00', 1)))
+        solapada = item(make_reserva('CBI - Carrera 60', '2025-12-01', '06:30', '07:30', 2, 2))
+
+        with self.assertRaises(ConflictoReserva) as error:
+            carrito.agregar(solapada, permitir_conflictos=False)
+        self.assertEqual(error.exception.conflictos[0].tipo, SOLAPAMIENTO)
+        self.assertEqual(len(carrito), 1)
+
+        self.assertEqual(carrito.agregar(solapada, permitir_conflictos=True), 2)
+        self.assertEqual(solapada['conflictos'][0]['tipo'], SOLAPAMIENTO)
+
+        # Los duplicados no se aceptan ni marcados
+        with self.assertRaises(ConflictoReserva):
+            carrito.agregar(item(make_reserva('Calle 94', '2025-12-01', '06:00', '07:00', 1)),
+                            permitir_conflictos=True)
+
+    def test_index_follows_removals_and_replacements(self):
+        reserva = make_reserva('Calle 94', '2025-12-01', '06:00', '07:00', 1)
+        carrito = CarritoReservas([item(reserva)])
+        self.assertTrue(carrito.conflictos(reserva))
+        carrito.eliminar(0)
+        self.assertEqual(carrito.conflictos(reserva), [])
+        carrito.reemplazar([item(reserva)])
+        self.assertTrue(carrito.conflictos(reserva))
+        carrito.vaciar()
+        self.assertEqual(carrito.agregar(item(reserva)), 1)
+
+
+class TestAgregarReservaRuta(unittest.TestCase):
+    def setUp(self):
+        import requests
+        from types import SimpleNamespace
+        from app import app, user_sessions
+        from src.sessions.store import crear_sesion_usuario
+        self.client = app.test_client()
+        self.sesion = crear_sesion_usuario(None, SimpleNamespace(session=requests.Session()),
+                                           tiqueteras=[make_reserva('Calle 94', '2025-12-01', '06:00', '07:00').tiquetera])
+        user_sessions.set('ruta-carrito', self.sesion)
+        self.addCleanup(user_sessions.delete, 'ruta-carrito')
+        with self.client.session_transaction() as sesion_flask:
+            sesion_flask['user_id'] = 'ruta-carrito'
+
+    def agregar(self, **horario):
+        return self.client.post('/api/agregar_reserva', json={'tiquetera_id': 1, 'horario': horario})
+
+    def test_malformed_horario_is_a_client_error(self):
+        for horario in ({'fecha': '01/12/2025', 'hora_inicio': '06:00', 'hora_fin': '07:00'},
+                        {'fecha': '2025-12-01', 'hora_inicio': '6am', 'hora_fin': '07:00'},
+                        {'fecha': '2025-12-01', 'hora_inicio': '06:00'}):
+            respuesta = self.agregar(cupos_disponibles=3, **horario)
+            self.assertEqual(respuesta.status_code, 400, horario)
+        self.assertEqual(len(self.sesion['reservas_pendientes']), 0)
+
+        respuesta = self.agregar(fecha='2025-12-01', hora_inicio='06:00', hora_fin='07:00', cupos_disponibles=3)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.get_json()['total_pendientes'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
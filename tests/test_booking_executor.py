@@ -0,0 +1,391 @@
+import contextlib
+import io
+import json
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+from src.models.booking import Horario, ResultadoReserva
+from src.api.shared_availability import HistorialLlenado
+from src.scheduler.booking_executor import BookingExecutor, SIN_CUPOS, SIN_DATOS, SIN_ENTRADAS
+from src.scheduler.booking_priority import PriorizadorReservas
+from src.scheduler.booking_scheduler import BookingScheduler
+from src.scheduler.booking_window import VentanaReserva, VentanaCancelada
+from src.scheduler.clock_sync import SincronizadorReloj
+from src.scheduler.job_queue import ColaTrabajos, ColaLlena
+from email.utils import formatdate
+from tests.fakes import make_reserva
+
+
+class FakeAPI:
+    """API falsa que simula latencia y registra la concurrencia máxima"""
+
+    def __init__(self, latencia=0.05, fallar=()):
+        self.latencia = latencia
+        self.fallar = set(fallar)
+        self.llamadas = 0
+        self.activas = 0
+        self.max_activas = 0
+        self.enviado_en = []
+        self._lock = threading.Lock()
+
+    def realizar_reserva_detallada(self, reserva):
+        with self._lock:
+            self.llamadas += 1
+            self.activas += 1
+            self.max_activas = max(self.max_activas, self.activas)
+        time.sleep(self.latencia)
+        with self._lock:
+            self.activas -= 1
+        exitosa = reserva.horario.id_turno not in self.fallar
+        return ResultadoReserva(reserva, exitosa, 'ok' if exitosa else 'sin cupo', self.latencia * 1000)
+
+    # Interfaz usada por VentanaReserva
+    def obtener_participantes(self):
+        return [{'id_participacion': 1}]
+
+    def construir_payload_reserva(self, reserva):
+        return {'horario': reserva.horario.raw_data}
+
+    def calentar_conexiones(self, cantidad=1):
+        return cantidad
+
+    def enviar_reserva_serializada(self, reserva, cuerpo, inicio=None):
+        self.enviado_en.append(time.time())
+        return self.realizar_reserva_detallada(reserva)
+
+
+class TestBookingExecutor(unittest.TestCase):
+    def test_runs_concurrently_and_keeps_order(self):
+        api = FakeAPI()
+        reservas = [make_reserva(i) for i in range(8)]
+        inicio = time.perf_counter()
+        resultados = BookingExecutor(api, max_concurrency=4).ejecutar(reservas)
+        duracion = time.perf_counter() - inicio
+        self.assertEqual([r.reserva for r in resultados], reservas)
+        self.assertEqual(api.max_activas, 4)
+        self.assertLess(duracion, 8 * api.latencia)
+
+    def test_short_circuits_when_entradas_run_out(self):
+        api = FakeAPI(latencia=0)
+        reservas = [make_reserva(i, entradas=2) for i in range(5)]
+        resultados = BookingExecutor(api, max_concurrency=1).ejecutar(reservas)
+        resumen = BookingExecutor.resumir(resultados)
+        self.assertEqual(api.llamadas, 2)
+        self.assertEqual(resumen['exitosas'], 2)
+        self.assertEqual(resumen['omitidas'], 3)
+
+    def test_exhausted_tiquetera_is_not_sent_and_unknown_is_not_limited(self):
+        api = FakeAPI(latencia=0)
+        agotada = make_reserva(0, entradas=0)
+        sin_dato = make_reserva(1, entradas=None, id_tiquetera=8)
+        resultados = BookingExecutor(api, validacion_previa=False).ejecutar([agotada, sin_dato])
+        self.assertEqual([r.estado for r in resultados], ['omitida', 'exitosa'])
+        self.assertEqual(api.llamadas, 1)
+
+    def test_failed_booking_returns_its_entrada(self):
+        api = FakeAPI(latencia=0, fallar={0})
+        reservas = [make_reserva(i, entradas=1) for i in range(2)]
+        resultados = BookingExecutor(api, max_concurrency=1).ejecutar(reservas)
+        self.assertEqual([r.exitosa for r in resultados], [False, True])
+        self.assertEqual(resultados[0].mensaje, 'sin cupo')
+
+    def test_uncertain_booking_keeps_its_entrada(self):
+        class APISinRespuesta(FakeAPI):
+            def realizar_reserva_detallada(self, reserva):
+                resultado = super().realizar_reserva_detallada(reserva)
+                resultado.incierta = not resultado.exitosa
+                return resultado
+
+        api = APISinRespuesta(latencia=0, fallar={0})
+        reservas = [make_reserva(i, entradas=1) for i in range(2)]
+        resultados = BookingExecutor(api, max_concurrency=1).ejecutar(reservas)
+        # El servidor pudo gastar la entrada: la segunda no se envía
+        self.assertEqual([r.estado for r in resultados], ['incierta', 'omitida'])
+        self.assertEqual(api.llamadas, 1)
+
+    def test_iterar_yields_each_result_as_it_completes(self):
+        api = FakeAPI(latencia=0.05)
+        reservas = [make_reserva(i) for i in range(6)]
+        inicio = time.perf_counter()
+        iterador = BookingExecutor(api, max_concurrency=2).iterar(reservas)
+        indice, primero = next(iterador)
+        # El primer resultado llega sin esperar al resto del lote
+        self.assertLess(time.perf_counter() - inicio, 3 * api.latencia)
+        self.assertIs(primero.reserva, reservas[indice])
+        indices = [indice] + [i for i, _ in iterador]
+        self.assertEqual(sorted(indices), list(range(6)))
+        self.assertEqual(api.llamadas, 6)
+
+
+class FakeAPICacheada(FakeAPI):
+    """FakeAPI con disponibilidad fresca en cache para algunas fechas"""
+
+    def __init__(self, cacheados, **kwargs):
+        super().__init__(**kwargs)
+        self.cacheados = cacheados
+
+    def horarios_cacheados(self, tiquetera, fecha):
+        return self.cacheados.get(fecha)
+
+
+class TestValidacionPrevia(unittest.TestCase):
+    def test_skips_doomed_reservas_without_calling_upstream(self):
+        agotada = make_reserva(1, entradas=0, id_tiquetera=8)
+        sin_datos = make_reserva(2)
+        sin_datos.horario.raw_data = None
+        lleno = make_reserva(3)
+        api = FakeAPICacheada({'2025-11-30': [Horario('2025-11-30', '06:00', '07:00', 0, id_turno=3)]}, latencia=0)
+        resultados = BookingExecutor(api, max_concurrency=2).ejecutar([make_reserva(0), agotada, sin_datos, lleno])
+        self.assertEqual(api.llamadas, 1)
+        self.assertEqual([r.motivo for r in resultados], ['', SIN_ENTRADAS, SIN_DATOS, SIN_CUPOS])
+        resumen = BookingExecutor.resumir(resultados)
+        self.assertEqual(resumen['llamadas_evitadas'], 3)
+        self.assertEqual(resumen['motivos_omision'], {SIN_ENTRADAS: 1, SIN_DATOS: 1, SIN_CUPOS: 1})
+
+    def test_stale_cart_cupos_do_not_skip_the_booking(self):
+        api = FakeAPI(latencia=0)
+        sin_cupos_al_agregar = make_reserva(1)
+        sin_cupos_al_agregar.horario.cupos_disponibles = 0
+        resultados = BookingExecutor(api).ejecutar([sin_cupos_al_agregar])
+        # Sin disponibilidad fresca no hay certeza de que falle: se envía
+        self.assertEqual((api.llamadas, resultados[0].estado), (1, 'exitosa'))
+
+    def test_fresh_cache_overrides_cupos_from_the_cart(self):
+        lleno, liberado = make_reserva(1), make_reserva(2)
+        liberado.horario.cupos_disponibles = 0
+        cache = [Horario('2025-11-30', '06:00', '07:00', 0, id_turno=1),
+                 Horario('2025-11-30', '06:00', '07:00', 3, id_turno=2)]
+        api = FakeAPICacheada({'2025-11-30': cache}, latencia=0)
+        executor = BookingExecutor(api)
+        plan = executor.preparar([lleno, liberado])
+        self.assertEqual((plan.principales, list(plan.omitidas)), ([1], [0]))
+        self.assertEqual(plan.resumen()['cupos_actualizados'], 2)
+        resultados = executor.ejecutar([lleno, liberado])
+        self.assertEqual([r.estado for r in resultados], ['omitida', 'exitosa'])
+
+    def test_reservas_beyond_entradas_wait_for_a_returned_entrada(self):
+        api = FakeAPI(latencia=0.02, fallar={0})
+        reservas = [make_reserva(i, entradas=2) for i in range(4)]
+        plan = BookingExecutor(api).preparar(reservas)
+        self.assertEqual((plan.principales, plan.suplentes), ([0, 1], [2, 3]))
+        resultados = BookingExecutor(api, max_concurrency=4).ejecutar(reservas)
+        # La 0 falla y devuelve su entrada: solo una suplente llega al servidor
+        self.assertEqual(api.llamadas, 3)
+        self.assertEqual(sum(r.exitosa for r in resultados), 2)
+        self.assertEqual([r.motivo for r in resultados if r.omitida], [SIN_ENTRADAS])
+
+    def test_disabled_validation_sends_everything(self):
+        api = FakeAPI(latencia=0)
+        sin_datos = make_reserva(1)
+        sin_datos.horario.raw_data = None
+        BookingExecutor(api, validacion_previa=False).ejecutar([sin_datos])
+        self.assertEqual(api.llamadas, 1)
+
+
+def make_disputada(id_turno, utilizacion, cupos, hora_inicio='06:00', fecha='2026-03-02'):
+    reserva = make_reserva(id_turno)
+    reserva.horario = Horario(fecha, hora_inicio, '07:00', cupos, id_turno=id_turno,
+                              raw_data={'ids': [id_turno], 'totalUtilizado': utilizacion})
+    return reserva
+
+
+class TestPriorizadorReservas(unittest.TestCase):
+    AHORA = time.mktime((2026, 3, 1, 6, 0, 0, 0, 0, -1))
+
+    def test_most_contested_slots_go_first(self):
+        reservas = [
+            make_disputada(0, utilizacion=20, cupos=16),
+            make_disputada(1, utilizacion=95, cupos=1),
+            make_disputada(2, utilizacion=60, cupos=8),
+            make_disputada(3, utilizacion=60, cupos=8, fecha='2026-03-20')  # Más lejos
+        ]
+        self.assertEqual(PriorizadorReservas().ordenar(reservas, self.AHORA), [1, 2, 3, 0])
+
+    def test_historical_fill_rate_breaks_ties(self):
+        reservas = [make_disputada(0, 50, 5, hora_inicio='06:00'), make_disputada(1, 50, 5, hora_inicio='07:00')]
+        historial = HistorialLlenado()
+        # La clase de las 7:00 de la semana anterior ganó 10 puntos en una hora
+        anterior = {'2026-02-23': [make_disputada(9, 40, 6, hora_inicio='07:00').horario]}
+        historial.observar(reservas[1].tiquetera, anterior, ahora=self.AHORA - 3600)
+        anterior['2026-02-23'][0].raw_data['totalUtilizado'] = 50
+        historial.observar(reservas[1].tiquetera, anterior, ahora=self.AHORA)
+        self.assertEqual(historial.tasa(reservas[1].tiquetera, reservas[1].horario), 10)
+        self.assertEqual(PriorizadorReservas().ordenar(reservas, self.AHORA), [0, 1])
+        self.assertEqual(PriorizadorReservas(historial).ordenar(reservas, self.AHORA), [1, 0])
+
+    def test_executor_sends_contested_first_and_gives_them_the_entradas(self):
+        api = FakeAPI(latencia=0)
+        reservas = [make_disputada(0, 10, 20), make_disputada(1, 90, 2)]
+        for reserva in reservas:
+            reserva.tiquetera.entradas = 1
+        executor = BookingExecutor(api, max_concurrency=1, priorizador=PriorizadorReservas())
+        orden = [indice for indice, _ in executor.iterar(reservas)]
+        self.assertEqual(orden, [1, 0])
+        self.assertEqual(api.llamadas, 1)
+
+
+class TestColaTrabajos(unittest.TestCase):
+    def test_submit_returns_immediately_and_reports_each_item(self):
+        api = FakeAPI(latencia=0.05, fallar={1})
+        cola = ColaTrabajos(workers=1, capacidad=5, retencion=60)
+        inicio = time.perf_counter()
+        trabajo = cola.enviar(api, [make_reserva(i) for i in range(3)], user_id='u1')
+        self.assertLess(time.perf_counter() - inicio, api.latencia)
+        self.assertIn(trabajo.to_dict()['estado'], ('en_cola', 'en_progreso'))
+
+        self.assertTrue(cola.esperar(trabajo.id, timeout=5))
+        estado = cola.obtener(trabajo.id).to_dict()
+        self.assertEqual(estado['estado'], 'completado')
+        self.assertEqual([i['estado'] for i in estado['items']], ['exitosa', 'fallida', 'exitosa'])
+        self.assertEqual(estado['procesadas'], 3)
+
+        metricas = cola.metricas()
+        self.assertEqual((metricas['completados'], metricas['profundidad_cola']), (1, 0))
+        self.assertGreater(metricas['utilizacion'], 0)
+
+    def test_full_queue_rejects_new_jobs(self):
+        api = FakeAPI(latencia=0.2)
+        cola = ColaTrabajos(workers=1, capacidad=1, retencion=60)
+        primero = cola.enviar(api, [make_reserva(1)])
+        while primero.estado == 'en_cola':
+            time.sleep(0.005)
+        cola.enviar(api, [make_reserva(2)])
+        with self.assertRaises(ColaLlena):
+            cola.enviar(api, [make_reserva(3)])
+        self.assertEqual(cola.metricas()['rechazados'], 1)
+
+
+class TestVentanaReserva(unittest.TestCase):
+    def test_fires_all_reservas_at_target_instant(self):
+        api = FakeAPI(latencia=0.01)
+        ventana = VentanaReserva(api, preparacion=0)
+        objetivo = time.time() + 0.2
+        for i in range(5):
+            ventana.programar(make_reserva(i), objetivo)
+        resultados = ventana.ejecutar()
+        self.assertEqual(len(resultados), 5)
+        self.assertTrue(all(r.resultado.exitosa for r in resultados))
+        self.assertEqual(len(api.enviado_en), 5)
+        self.assertTrue(all(envio >= objetivo for envio in api.enviado_en))
+        self.assertLess(VentanaReserva.resumir(resultados)['jitter_max_ms'], 50)
+        self.assertEqual(ventana.disparos, [])
+
+    def test_ctrl_c_returns_the_reservas_that_were_not_sent(self):
+        api = FakeAPI(latencia=0)
+        ventana = VentanaReserva(api, preparacion=0)
+        objetivo = time.time() + 3600
+        ventana.programar(make_reserva(1), objetivo)
+        ventana.programar(make_reserva(2), objetivo + 1)
+        # Preparación, primer envío y Ctrl+C esperando el segundo
+        esperas = iter([None, None, KeyboardInterrupt()])
+
+        def esperar(_):
+            siguiente = next(esperas)
+            if siguiente is not None:
+                raise siguiente
+
+        with mock.patch('src.scheduler.booking_window.esperar_hasta', esperar):
+            with self.assertRaises(VentanaCancelada) as ctx:
+                ventana.ejecutar()
+        self.assertEqual([r.horario.id_turno for r in ctx.exception.sin_enviar], [2])
+        self.assertEqual(ventana.disparos, [])
+        time.sleep(0.05)
+        self.assertEqual(api.llamadas, 1)
+
+    def test_scheduler_keeps_the_cart_when_the_wait_is_cancelled(self):
+        api = FakeAPI(latencia=0)
+        scheduler = BookingScheduler(api, reloj=SincronizadorReloj(FakeClockSession(offset=0), muestras=2))
+        reservas = [make_reserva(1), make_reserva(2, id_tiquetera=8)]
+        scheduler.reservas_pendientes.extend(reservas)
+        hora = (datetime.now() + timedelta(hours=1)).strftime('%H:%M:%S')
+
+        def esperar(_):
+            raise KeyboardInterrupt()
+
+        with mock.patch('builtins.input', return_value=hora), \
+                mock.patch('src.scheduler.booking_window.esperar_hasta', esperar), \
+                contextlib.redirect_stdout(io.StringIO()):
+            self.assertFalse(scheduler.programar_y_ejecutar())
+        self.assertEqual(scheduler.reservas_pendientes, reservas)
+        self.assertTrue(scheduler.indice_pendientes.conflictos(reservas[0]))
+        self.assertEqual(scheduler.ventana.disparos, [])
+        self.assertEqual(api.llamadas, 0)
+
+
+class TestConfirmarReservasStream(unittest.TestCase):
+    def setUp(self):
+        import requests
+        from app import app, user_sessions
+        from src.sessions.store import crear_sesion_usuario
+        self.api = FakeAPI(latencia=0, fallar={2})
+        self.api.session = requests.Session()
+        self.sesion = crear_sesion_usuario(None, self.api)
+        self.slots = [self.sesion['horarios'].registrar(r.tiquetera, r.horario)
+                      for r in (make_reserva(1), make_reserva(2))]
+        user_sessions.set('ruta-stream', self.sesion)
+        self.addCleanup(user_sessions.delete, 'ruta-stream')
+        self.client = app.test_client()
+        with self.client.session_transaction() as sesion_flask:
+            sesion_flask['user_id'] = 'ruta-stream'
+
+    def test_streams_one_event_per_reserva_and_a_final_resumen(self):
+        respuesta = self.client.post('/api/confirmar_reservas/stream', json={'slots': self.slots})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.mimetype, 'text/event-stream')
+        eventos = []
+        for bloque in respuesta.get_data(as_text=True).split('\n\n'):
+            if not bloque.strip():
+                continue
+            campos = dict(linea.split(': ', 1) for linea in bloque.split('\n'))
+            eventos.append((campos['event'], json.loads(campos['data'])))
+
+        self.assertEqual(eventos[0], ('inicio', {'total': 2}))
+        reservas = sorted((datos for evento, datos in eventos if evento == 'reserva'), key=lambda d: d['indice'])
+        self.assertEqual([(d['indice'], d['estado']) for d in reservas], [(0, 'exitosa'), (1, 'fallida')])
+        evento, resumen = eventos[-1]
+        self.assertEqual(evento, 'resumen')
+        self.assertEqual((resumen['exitosas'], resumen['fallidas'], resumen['total']), (1, 1, 2))
+        self.assertEqual(self.api.llamadas, 2)
+
+
+class FakeClockResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class FakeClockSession:
+    """Servidor simulado cuyo reloj va `offset` segundos adelante"""
+
+    def __init__(self, offset, rtt=0.004):
+        self.offset = offset
+        self.rtt = rtt
+
+    def head(self, url, **kwargs):
+        time.sleep(self.rtt / 2)
+        fecha = formatdate(time.time() + self.offset, usegmt=True)
+        time.sleep(self.rtt / 2)
+        return FakeClockResponse({'Date': fecha})
+
+
+class TestSincronizadorReloj(unittest.TestCase):
+    def test_estimates_offset_below_date_header_resolution(self):
+        reloj = SincronizadorReloj(FakeClockSession(offset=0.731), muestras=12)
+        estimacion = reloj.sincronizar()
+        self.assertAlmostEqual(estimacion.offset, 0.731, delta=0.15)
+        self.assertLess(estimacion.error, 0.2)
+        self.assertAlmostEqual(reloj.server_now() - time.time(), 0.731, delta=0.15)
+
+    def test_window_plans_send_in_server_time(self):
+        reloj = SincronizadorReloj(FakeClockSession(offset=-0.4), muestras=12)
+        api = FakeAPI(latencia=0)
+        ventana = VentanaReserva(api, preparacion=0, reloj=reloj)
+        objetivo_servidor = time.time() + 2.0
+        ventana.programar(make_reserva(1), objetivo_servidor)
+        ventana.preparar()
+        self.assertAlmostEqual(ventana.disparos[0].envio_local, objetivo_servidor + 0.4, delta=0.15)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import pickle
+import unittest
+from dataclasses import FrozenInstanceError
+from src.api.compensar_api import parsear_horarios, payload_reserva
+from src.api.horarios_compactos import parsear_horarios_compacto
+from src.models.booking import Tiquetera, Reserva
+from src.models.compact import Internador, TiqueteraCompacta, HorarioCompacto, ReservaCompacta
+from src.models.horario_table import HorarioTable, SIN_ID
+
+CENTRO = {'id': 93, 'idEscenario': 602, 'nombre': 'Cajicá'}
+
+
+def zona(id_turno, conteo, utilizado, timestamp=None):
+    info = {
+        'conteo': conteo, 'ids': [id_turno], 'totalUtilizado': utilizado,
+        'caracteristicas': {'1427': {'nombre': 'Semiolímpica'}},
+        'centroEntrenamiento': dict(CENTRO)
+    }
+    if timestamp is not None:
+        info.update({'timestamp': timestamp, 'timestamp_fin': timestamp + 3600})
+    return info
+
+
+def respuesta():
+    return {
+        '2025-12-01': {
+            '07:00 - 08:00': {'1427': zona(2, 0, 100.0, 2000)},
+            '06:00 - 07:00': {'1427': zona(1, 5, 50.0, 1000)},
+        },
+        '2025-12-02': {
+            '06:00 - 07:00': {'1427': zona(3, 8, 20.0, 3000)},
+            '09:00 - 10:00': {'1427': zona(4, 8, 20.0, 4000)},
+        }
+    }
+
+
+class TestModelosCompactos(unittest.TestCase):
+    def test_compact_parse_matches_regular_parse(self):
+        regulares = parsear_horarios(respuesta())
+        compactos = parsear_horarios_compacto(respuesta(), Internador())
+        self.assertEqual(
+            {f: [h.a_horario() for h in hs] for f, hs in compactos.items()},
+            regulares
+        )
+
+    def test_interning_shares_repeated_substructures(self):
+        horarios = [h for hs in parsear_horarios_compacto(respuesta(), Internador()).values() for h in hs]
+        self.assertTrue(all(h.raw_data['centroEntrenamiento'] is horarios[0].raw_data['centroEntrenamiento']
+                            for h in horarios))
+        self.assertTrue(all(h.raw_data['caracteristicas'] is horarios[0].raw_data['caracteristicas']
+                            for h in horarios))
+
+    def test_interning_does_not_modify_the_response(self):
+        data = respuesta()
+        originales = [z['centroEntrenamiento'] for franjas in data.values()
+                      for zonas in franjas.values() for z in zonas.values()]
+        horarios = [h for hs in parsear_horarios_compacto(data, Internador()).values() for h in hs]
+        despues = [z['centroEntrenamiento'] for franjas in data.values()
+                   for zonas in franjas.values() for z in zonas.values()]
+        self.assertEqual(len(set(map(id, despues))), len(originales))
+        self.assertTrue(all(a is b for a, b in zip(originales, despues)))
+        self.assertEqual(len({id(h.raw_data['centroEntrenamiento']) for h in horarios}), 1)
+
+    def test_models_are_frozen_hashable_and_ignore_raw_data(self):
+        a = HorarioCompacto('2025-12-01', '06:00', '07:00', 5, 1, 'Semiolímpica', {'x': 1})
+        b = HorarioCompacto('2025-12-01', '06:00', '07:00', 5, 1, 'Semiolímpica', {'x': 2})
+        self.assertEqual(a, b)
+        self.assertEqual(len({a, b}), 1)
+        with self.assertRaises(AttributeError):
+            a.cupos_disponibles = 0
+        self.assertFalse(hasattr(a, '__dict__'))
+        tiquetera = TiqueteraCompacta.desde_dict({'id': 1, 'nombre_centro_entrenamiento': 'Cajicá'})
+        with self.assertRaises(FrozenInstanceError):
+            tiquetera.entradas = 0
+        self.assertEqual(len({ReservaCompacta(tiquetera, a), ReservaCompacta(tiquetera, b)}), 1)
+        self.assertFalse(hasattr(tiquetera, '__dict__'))
+        self.assertEqual(pickle.loads(pickle.dumps(ReservaCompacta(tiquetera, a))), ReservaCompacta(tiquetera, a))
+
+    def test_compact_reserva_builds_same_payload(self):
+        tiquetera = Tiquetera(1, 'Cajicá', 'Piscina', 'Natación', 93, 4626802, 10, False, 131525776, 602, 93)
+        horario = parsear_horarios(respuesta())['2025-12-01'][1]
+        reserva = Reserva(tiquetera, horario)
+        compacta = ReservaCompacta.desde_reserva(reserva)
+        participantes = ({'id': 1},)
+        self.assertEqual(payload_reserva(compacta, participantes), payload_reserva(reserva, participantes))
+        self.assertEqual(compacta.to_api_payload(), reserva.to_api_payload())
+        self.assertEqual(compacta.a_reserva(), reserva)
+        self.assertEqual(TiqueteraCompacta.desde_dict({'id': 1}).id_tiquetera, 1)
+
+
+class TestHorarioTable(unittest.TestCase):
+    def setUp(self):
+        self.tabla = HorarioTable.desde_respuesta(parsear_horarios_compacto(respuesta()))
+
+    def test_filter_combines_criteria(self):
+        filtrada = self.tabla.filtrar(cupos_min=1, desde=1500)
+        self.assertEqual(list(filtrada.ids), [3, 4])
+        self.assertEqual([h.id_turno for h in filtrada], [3, 4])
+        self.assertEqual(len(self.tabla.filtrar()), 4)
+
+    def test_sort_by_several_columns(self):
+        ordenada = self.tabla.ordenar('utilizacion', 'inicio')
+        self.assertEqual(list(ordenada.ids), [3, 4, 1, 2])
+        self.assertEqual(list(self.tabla.ordenar(descendente=True).ids), [4, 3, 2, 1])
+        with self.assertRaises(KeyError):
+            self.tabla.ordenar('nombre')
+
+    def test_epoch_falls_back_to_fecha_and_hora(self):
+        sin_timestamp = {'2025-12-01': {'06:00 - 07:00': {'1427': {'conteo': 1, 'turnos': ['t1']}}}}
+        tabla = HorarioTable.desde_respuesta(parsear_horarios(sin_timestamp))
+        self.assertEqual(tabla.fin[0] - tabla.inicio[0], 3600)
+        self.assertEqual(tabla.ids[0], SIN_ID)
+        self.assertEqual(tabla.indice_turno(SIN_ID), 0)
+        self.assertEqual(len(HorarioTable()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,312 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from src.api.compensar_api import CompensarAPI, parsear_tiqueteras
+from src.api.tiqueteras_cache import TiqueterasCache
+from src.api.horarios_registry import RegistroHorarios
+from src.api.shared_availability import DisponibilidadCompartida
+from src.api.transport import configurar_transporte
+from src.models.booking import Reserva
+from src.sessions.cart import CarritoReservas
+from tests.fakes import FakeResponse, FakeSession, HORARIOS, PERSONAS, SLOT, make_tiquetera
+
+
+class TestParticipantesCache(unittest.TestCase):
+    def test_participantes_fetched_once(self):
+        session = FakeSession()
+        api = CompensarAPI(session)
+        api.get_tiqueteras()
+        api.get_horarios(make_tiquetera(), '2025-11-30')
+        api.get_horarios(make_tiquetera(), '2025-12-01')
+        self.assertEqual(session.count('grupofamiliar'), 1)
+        stats = api.participantes_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 2)
+
+    def test_invalidate_forces_refetch(self):
+        session = FakeSession()
+        api = CompensarAPI(session)
+        api.obtener_participantes()
+        api.invalidar_participantes()
+        api.obtener_participantes()
+        self.assertEqual(session.count('grupofamiliar'), 2)
+
+
+class TestHorariosHarvest(unittest.TestCase):
+    def test_every_date_in_response_is_cached(self):
+        session = FakeSession(HORARIOS)
+        api = CompensarAPI(session)
+        primero = api.get_horarios(make_tiquetera(), '2025-11-30')
+        segundo = api.get_horarios(make_tiquetera(), '2025-12-01')
+        self.assertEqual(len(primero), 1)
+        self.assertEqual(len(segundo), 2)
+        self.assertEqual(segundo[0].fecha, '2025-12-01')
+        self.assertEqual(session.count('/horarios'), 1)
+        stats = api.horarios_stats()
+        self.assertEqual(stats['llamadas_ahorradas'], 1)
+        self.assertEqual(stats['fechas_cosechadas'], 1)
+
+    def test_successful_booking_invalidates_date(self):
+        session = FakeSession(HORARIOS)
+        api = CompensarAPI(session)
+        tiquetera = make_tiquetera()
+        horario = api.get_horarios(tiquetera, '2025-11-30')[0]
+        self.assertTrue(api.realizar_reserva(Reserva(tiquetera, horario)))
+        api.get_horarios(tiquetera, '2025-11-30')
+        api.get_horarios(tiquetera, '2025-12-01')
+        self.assertEqual(session.count('/horarios'), 2)
+
+    def test_booking_without_response_is_uncertain(self):
+        class SesionLenta(FakeSession):
+            def post(self, url, **kwargs):
+                if url.endswith('/guardar'):
+                    raise requests.ReadTimeout('read timed out')
+                return super().post(url, **kwargs)
+
+        api = CompensarAPI(SesionLenta(HORARIOS))
+        tiquetera = make_tiquetera()
+        horario = api.get_horarios(tiquetera, '2025-11-30')[0]
+        resultado = api.realizar_reserva_detallada(Reserva(tiquetera, horario))
+        self.assertFalse(resultado.exitosa)
+        self.assertEqual(resultado.estado, 'incierta')
+        self.assertTrue(resultado.to_dict()['incierta'])
+
+    def test_exchanges_recorded_in_memory(self):
+        session = FakeSession(HORARIOS)
+        api = CompensarAPI(session)
+        api.get_horarios(make_tiquetera(), '2025-11-30')
+        recientes = api.transporte.intercambios.recientes()
+        self.assertEqual([i['endpoint'] for i in recientes], ['horarios', 'participantes'])
+        self.assertEqual(recientes[0]['request']['fecha'], '2025-11-30')
+
+
+class TestHorariosRange(unittest.TestCase):
+    def test_range_returns_every_requested_date(self):
+        fechas = ['2025-11-30', '2025-12-01', '2025-12-02']
+        session = FakeSession()
+        api = CompensarAPI(session)
+        resultado = api.get_horarios_range(make_tiquetera(), fechas + ['2025-11-30'])
+        self.assertEqual(list(resultado), fechas)
+        self.assertEqual(session.count('grupofamiliar'), 1)
+
+
+class TestParsearTiqueteras(unittest.TestCase):
+    def test_missing_entradas_is_unknown_and_zero_is_kept(self):
+        agotada, sin_dato = parsear_tiqueteras({'tiqueteras': [
+            {'id': 1, 'entradas': 0}, {'id': 2}
+        ]})
+        self.assertEqual(agotada.entradas, 0)
+        self.assertIsNone(sin_dato.entradas)
+
+
+class TestTiqueterasCache(unittest.TestCase):
+    def test_lookup_without_network_after_first_load(self):
+        session = FakeSession()
+        cache = TiqueterasCache(CompensarAPI(session), ttl=60)
+        self.assertIsNotNone(cache.buscar('7'))
+        self.assertIsNotNone(cache.buscar(7, campo='id'))
+        cache.get_all()
+        self.assertEqual(session.count('/tiqueteras'), 1)
+
+    def test_stale_data_served_while_refreshing(self):
+        session = FakeSession()
+        cache = TiqueterasCache(CompensarAPI(session), ttl=0)
+        cache.cargar([make_tiquetera()])
+        self.assertEqual(len(cache.get_all()), 1)
+        self.assertEqual(cache.stats()['stale_hits'], 1)
+
+
+class TestRegistroHorarios(unittest.TestCase):
+    def test_slots_resolve_to_original_horarios(self):
+        api = CompensarAPI(FakeSession(horarios=HORARIOS))
+        tiquetera = make_tiquetera()
+        registro = RegistroHorarios()
+        resumenes = [registro.resumir(tiquetera, h) for h in api.get_horarios(tiquetera, '2025-12-01')]
+        self.assertNotIn('raw_data', resumenes[0])
+        self.assertEqual(len(resumenes[0]['slot']), 12)
+
+        reservas, desconocidos = registro.resolver([r['slot'] for r in resumenes] + ['vencido'])
+        self.assertEqual(desconocidos, ['vencido'])
+        self.assertIs(reservas[0].tiquetera, tiquetera)
+        self.assertEqual(reservas[1].horario.raw_data, SLOT)
+
+    def test_slot_is_stable_and_registry_bounded(self):
+        api = CompensarAPI(FakeSession(horarios=HORARIOS))
+        tiquetera = make_tiquetera()
+        registro = RegistroHorarios(capacidad=2)
+        horarios = api.get_horarios(tiquetera, '2025-12-01') + api.get_horarios(tiquetera, '2025-11-30')
+        slots = [registro.registrar(tiquetera, h) for h in horarios]
+        self.assertEqual(registro.registrar(tiquetera, horarios[2]), slots[2])
+        self.assertEqual(len(registro), 2)
+        self.assertIsNone(registro.obtener(slots[0]))
+
+
+class TestConcurrenciaUsuario(unittest.TestCase):
+    """Muchos hilos usando el mismo cliente y el mismo carrito, como en Flask"""
+
+    def test_shared_client_is_not_corrupted(self):
+        session = FakeSession(HORARIOS)
+        api = CompensarAPI(session)
+        tiquetera = make_tiquetera()
+        participantes_originales = [dict(p) for p in PERSONAS['personas']]
+
+        def usuario(i):
+            if i % 4 == 0:
+                api.invalidar_horarios()
+            tiqueteras = api.get_tiqueteras()
+            horarios = api.get_horarios(tiquetera, '2025-12-01')
+            payload = api.construir_payload_reserva(Reserva(tiquetera, horarios[i % len(horarios)]))
+            exitosa = api.realizar_reserva(Reserva(tiquetera, horarios[0]))
+            return len(tiqueteras), len(horarios), payload['participantes'][0]['usos'], exitosa
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            resultados = list(executor.map(usuario, range(400)))
+
+        self.assertEqual(set(resultados), {(1, 2, 1, True)})
+        self.assertEqual(session.headers, {})
+        self.assertEqual(list(api.obtener_participantes()), participantes_originales)
+        self.assertEqual(session.count('grupofamiliar'), 1)
+
+    def test_cart_operations_are_atomic(self):
+        carrito = CarritoReservas()
+        confirmadas = []
+
+        def agregar(hilo):
+            for j in range(200):
+                carrito.agregar({'hilo': hilo, 'j': j})
+                if j % 50 == 0:
+                    confirmadas.extend(carrito.vaciar())
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(agregar, range(8)))
+
+        confirmadas.extend(carrito.vaciar())
+        self.assertEqual(len(confirmadas), 8 * 200)
+        self.assertEqual(len({(c['hilo'], c['j']) for c in confirmadas}), 8 * 200)
+        self.assertEqual(len(carrito), 0)
+
+
+class SlowSession(FakeSession):
+    """Tarda en responder horarios para que las consultas concurrentes se crucen"""
+
+    def post(self, url, **kwargs):
+        if not url.endswith('/guardar'):
+            time.sleep(0.05)
+        return super().post(url, **kwargs)
+
+
+class TestDisponibilidadCompartida(unittest.TestCase):
+    def test_other_users_are_served_with_their_own_tiquetera(self):
+        compartida = DisponibilidadCompartida(ttl=60)
+        sesion_a, sesion_b = FakeSession(HORARIOS), FakeSession(HORARIOS)
+        api_a = CompensarAPI(sesion_a, disponibilidad=compartida)
+        api_b = CompensarAPI(sesion_b, disponibilidad=compartida)
+        tiquetera_b = make_tiquetera()
+        tiquetera_b.id_tiquetera = 8
+
+        api_a.get_horarios(make_tiquetera(), '2025-11-30')
+        horarios_b = api_b.get_horarios(tiquetera_b, '2025-12-01')
+        self.assertEqual(len(horarios_b), 2)
+        self.assertEqual(sesion_b.count('/horarios'), 0)
+        self.assertEqual(horarios_b[0].raw_data['idTiquetera'], 8)
+        self.assertEqual(api_a.get_horarios(make_tiquetera(), '2025-12-01')[0].raw_data['idTiquetera'], 7)
+
+        # La reserva va por la sesión de B e invalida la fecha para todos
+        self.assertTrue(api_b.realizar_reserva(Reserva(tiquetera_b, horarios_b[0])))
+        self.assertEqual((sesion_a.count('/guardar'), sesion_b.count('/guardar')), (0, 1))
+        api_a.get_horarios(make_tiquetera(), '2025-12-01')
+        self.assertEqual(sesion_a.count('/horarios'), 2)
+
+    def test_concurrent_misses_share_one_upstream_call(self):
+        compartida = DisponibilidadCompartida(ttl=60)
+        sesiones = [SlowSession(HORARIOS) for _ in range(8)]
+        apis = [CompensarAPI(s, disponibilidad=compartida) for s in sesiones]
+        for api in apis:
+            api.obtener_participantes()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            resultados = list(executor.map(lambda api: api.get_horarios(make_tiquetera(), '2025-11-30'), apis))
+        self.assertTrue(all(len(r) == 1 for r in resultados))
+        self.assertEqual(sum(s.count('/horarios') for s in sesiones), 1)
+        self.assertEqual(compartida.stats()['coalescidas'], 7)
+
+    def test_fresh_fetch_refreshes_the_shared_entry_without_evicting_it(self):
+        compartida = DisponibilidadCompartida(ttl=60)
+        sesion_a, sesion_b = FakeSession(HORARIOS), FakeSession(HORARIOS)
+        api_a = CompensarAPI(sesion_a, disponibilidad=compartida)
+        api_b = CompensarAPI(sesion_b, disponibilidad=compartida)
+        api_a.get_horarios(make_tiquetera(), '2025-11-30')
+
+        sesion_b.horarios = {'2025-11-30': {'06:00 - 07:00': {'1427': {**SLOT, 'conteo': 3}}}}
+        self.assertEqual(api_b.get_horarios_frescos(make_tiquetera(), '2025-11-30')[0].cupos_disponibles, 3)
+        self.assertEqual(api_b.get_horarios_frescos(make_tiquetera(), '2025-11-30')[0].cupos_disponibles, 3)
+        self.assertEqual(sesion_b.count('/horarios'), 2)
+        # A sigue leyendo del cache, ya con los cupos nuevos
+        self.assertEqual(api_a.get_horarios(make_tiquetera(), '2025-11-30')[0].cupos_disponibles, 3)
+        self.assertEqual(sesion_a.count('/horarios'), 1)
+        self.assertEqual(api_a.invalidaciones_horarios, 0)
+
+    def test_fresh_fetch_raises_on_upstream_errors(self):
+        class SesionCaida(FakeSession):
+            def post(self, url, **kwargs):
+                self.calls.append(('POST', url))
+                return FakeResponse({'error': 'Servicio no disponible'}, status_code=503)
+
+        api = CompensarAPI(SesionCaida())
+        self.assertEqual(api.get_horarios(make_tiquetera(), '2025-11-30'), [])
+        with self.assertRaises(Exception):
+            api.get_horarios_frescos(make_tiquetera(), '2025-11-30')
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Responde 503 a la primera petición y 200 a las siguientes, con keep-alive"""
+    protocol_version = 'HTTP/1.1'
+    fallos = 1
+
+    def do_GET(self):
+        cls = type(self)
+        estado = 503 if cls.fallos > 0 else 200
+        cls.fallos -= 1
+        self.send_response(estado)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTransporteHTTP(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/'
+
+    def test_retries_idempotent_reads_and_reuses_connections(self):
+        FlakyHandler.fallos = 1
+        session = requests.Session()
+        transporte = configurar_transporte(session)
+        self.assertIs(configurar_transporte(session), transporte)
+        response = transporte.get('horarios', self.url, reintentar=True)
+        self.assertEqual(response.status_code, 200)
+        for _ in range(3):
+            transporte.get('horarios', self.url)
+        stats = transporte.estadisticas()
+        self.assertEqual(stats['reintentos'], 1)
+        self.assertEqual(stats['conexiones_abiertas'], 1)
+        self.assertGreater(stats['reutilizacion'], 0.5)
+
+    def test_writes_are_not_retried(self):
+        FlakyHandler.fallos = 1
+        transporte = configurar_transporte(requests.Session())
+        response = transporte.get('reserva', self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(transporte.estadisticas()['reintentos'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
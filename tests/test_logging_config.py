@@ -0,0 +1,61 @@
+import atexit
+import contextlib
+import io
+import logging
+import os
+import tempfile
+import unittest
+from config import logging_config
+from config.logging_config import configurar_logging, parsear_niveles
+from src.api.compensar_api import CompensarAPI
+from tests.fakes import FakeSession, HORARIOS, make_tiquetera
+
+
+class TestParsearNiveles(unittest.TestCase):
+    def test_parses_levels_and_ignores_bad_entries(self):
+        self.assertEqual(
+            parsear_niveles(' src.api = debug ,src.auth=WARNING,,src.x=RUIDOSO,=INFO'),
+            {'src.api': logging.DEBUG, 'src.auth': logging.WARNING}
+        )
+
+
+class TestConfigurarLogging(unittest.TestCase):
+    def setUp(self):
+        raiz = logging.getLogger()
+        self.addCleanup(setattr, raiz, 'handlers', raiz.handlers[:])
+        self.addCleanup(raiz.setLevel, raiz.level)
+        for nombre in ('src.api', 'src.auth'):
+            self.addCleanup(logging.getLogger(nombre).setLevel, logging.getLogger(nombre).level)
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.archivo = os.path.join(directorio.name, 'app.log')
+
+    def test_configures_once_with_module_levels_and_file(self):
+        # app.py ya lo configuró si se importó antes en la misma corrida
+        self.addCleanup(setattr, logging_config, '_listener', logging_config._listener)
+        logging_config._listener = None
+        listener = configurar_logging('WARNING', 'src.api=DEBUG', self.archivo)
+        self.addCleanup(atexit.unregister, listener.stop)
+        self.assertIs(configurar_logging('DEBUG', '', ''), listener)
+        self.assertEqual(logging.getLogger().level, logging.WARNING)
+        self.assertEqual(logging.getLogger('src.api').level, logging.DEBUG)
+
+        logging.getLogger('src.api.compensar_api').debug('visible %s', 'api')
+        logging.getLogger('src.auth.compensar_auth').info('oculto')
+        listener.stop()  # Vacía la cola y cierra el archivo
+        with open(self.archivo, encoding='utf-8') as f:
+            contenido = f.read()
+        self.assertIn('src.api.compensar_api - DEBUG - visible api', contenido)
+        self.assertNotIn('oculto', contenido)
+
+    def test_get_horarios_logs_instead_of_printing(self):
+        salida = io.StringIO()
+        api = CompensarAPI(FakeSession(HORARIOS))
+        with contextlib.redirect_stdout(salida), self.assertLogs('src.api', logging.DEBUG) as logs:
+            api.get_horarios(make_tiquetera(), '2025-11-30')
+        self.assertEqual(salida.getvalue(), '')
+        self.assertTrue(any('Obteniendo horarios' in linea for linea in logs.output))
+
+
+if __name__ == '__main__':
+    unittest.main()
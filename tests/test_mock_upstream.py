@@ -0,0 +1,52 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import requests
+from benchmarks.bench_e2e import percentil
+from benchmarks.mock_upstream import MockCompensar, UpstreamServer
+from config.config import Config
+from src.api.compensar_api import CompensarAPI
+from src.models.booking import Reserva
+
+
+class TestMockUpstream(unittest.TestCase):
+    def iniciar(self, **opciones):
+        self.mock = MockCompensar(latencia=0, semilla=1, **opciones)
+        server = UpstreamServer(('127.0.0.1', 0), self.mock)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        parche = mock.patch.object(Config, 'API_BASE_URL', f'http://127.0.0.1:{server.server_port}')
+        parche.start()
+        self.addCleanup(parche.stop)
+        return CompensarAPI(requests.Session())
+
+    def test_client_lists_and_books_until_cupos_run_out(self):
+        api = self.iniciar(cupos=2, dias=2)
+        tiquetera = api.get_tiqueteras()[0]
+        horarios = api.get_horarios(tiquetera, '2025-12-01')
+        self.assertEqual(len(horarios), 16)  # 06:00 a 22:00
+        self.assertEqual(horarios[0].cupos_disponibles, 2)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            resultados = list(executor.map(lambda _: api.realizar_reserva(Reserva(tiquetera, horarios[0])), range(4)))
+        self.assertEqual(sorted(resultados), [False, False, True, True])
+        self.assertEqual(self.mock.contadores['reservas'], 2)
+        self.assertEqual(self.mock.contadores['rechazadas'], 2)
+        self.assertEqual(api.get_horarios(tiquetera, '2025-12-01')[0].cupos_disponibles, 0)
+        self.assertEqual(api.get_horarios(tiquetera, '2025-12-02')[0].cupos_disponibles, 2)
+
+    def test_error_rate_surfaces_as_failed_calls(self):
+        api = self.iniciar(errores=1.0)
+        self.assertEqual(api.get_tiqueteras(), [])
+        self.assertGreaterEqual(self.mock.contadores['errores'], 1)
+
+    def test_percentil_uses_nearest_rank(self):
+        self.assertEqual(percentil([], 50), 0.0)
+        self.assertEqual(percentil([4, 1, 3, 2], 50), 2)
+        self.assertEqual(percentil(list(range(1, 101)), 99), 99)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import os
+import tempfile
+import time
+import unittest
+import requests
+from src.api.compensar_api import CompensarAPI
+from src.api.horarios_registry import RegistroHorarios
+from src.models.booking import Tiquetera, Horario, Reserva
+from src.sessions.memory_store import MemorySessionStore
+from src.sessions.sqlite_store import SQLiteSessionStore, VERSION
+from src.sessions.store import SessionStore, ConflictoSesion, crear_sesion_usuario
+
+
+def make_entrada():
+    session = requests.Session()
+    session.cookies.set('PHPSESSID', 'abc123', domain='sistemaplanbienestar.deportescompensar.com', path='/')
+    entrada = crear_sesion_usuario(None, CompensarAPI(session))
+    tiquetera = Tiquetera(
+        id=7, nombre_centro_entrenamiento='Calle 94', nombre_sede='Salones Calle 94',
+        nombre_deporte='Gimnasio', id_centro_entrenamiento=93, id_participacion_deportista=1,
+        entradas=10, ilimitado=False, id_tiquetera=7
+    )
+    horario = Horario('2025-11-30', '06:00', '07:00', 10, id_turno=113513310, raw_data={'ids': [113513310]})
+    entrada['reservas_pendientes'].agregar({
+        'tiquetera_nombre': 'Calle 94', 'sede': 'Salones Calle 94', 'fecha': '2025-11-30',
+        'hora_inicio': '06:00', 'hora_fin': '07:00', 'reserva_obj': Reserva(tiquetera, horario)
+    })
+    return entrada
+
+
+class TestMemorySessionStore(unittest.TestCase):
+    def test_lru_eviction_caps_entries(self):
+        store = MemorySessionStore(max_entradas=2, ttl_inactividad=60)
+        for uid in ('a', 'b'):
+            store.set(uid, {'uid': uid})
+        store.get('a')  # 'a' pasa a ser la más reciente
+        store.set('c', {'uid': 'c'})
+        self.assertIsNone(store.get('b'))
+        self.assertEqual(store.get('a'), {'uid': 'a'})
+        self.assertEqual(store.stats()['desalojadas'], 1)
+
+    def test_idle_entries_expire(self):
+        store = MemorySessionStore(max_entradas=10, ttl_inactividad=0.05)
+        store.set('a', {'uid': 'a'})
+        time.sleep(0.1)
+        self.assertNotIn('a', store)
+        self.assertEqual(store.stats()['expiradas'], 1)
+
+    def test_idle_entries_are_purged_without_the_user_coming_back(self):
+        store = MemorySessionStore(max_entradas=10, ttl_inactividad=0.05, intervalo_purga=0)
+        store.set('a', {'uid': 'a'})
+        time.sleep(0.1)
+        store.set('b', {'uid': 'b'})
+        self.assertEqual(store.stats()['entradas'], 1)
+        self.assertEqual(store.stats()['expiradas'], 1)
+
+
+class TestSessionStore(unittest.TestCase):
+    def test_backend_missing_a_method_fails_on_creation(self):
+        class Incompleto(SessionStore):
+            def get(self, user_id):
+                return None
+
+        with self.assertRaises(TypeError):
+            Incompleto()
+
+
+class TestSQLiteSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.directorio.name, 'sessions.db')
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_session_and_cart_visible_from_another_worker(self):
+        worker_a = SQLiteSessionStore(ruta=self.ruta, ttl_inactividad=60)
+        worker_b = SQLiteSessionStore(ruta=self.ruta, ttl_inactividad=60)
+        worker_a.set('u1', make_entrada())
+
+        entrada = worker_b.get('u1')
+        self.assertEqual(entrada['api'].session.cookies.get('PHPSESSID'), 'abc123')
+        reserva = entrada['reservas_pendientes'].items()[0]['reserva_obj']
+        self.assertEqual(reserva.horario.raw_data, {'ids': [113513310]})
+        self.assertIs(worker_b.get('u1'), entrada)  # Misma versión: se reutilizan los objetos vivos
+
+        entrada['reservas_pendientes'].vaciar()
+        worker_b.set('u1', entrada)
+        self.assertEqual(worker_a.get('u1')['reservas_pendientes'].items(), [])
+
+    def test_concurrent_edits_from_two_workers_conflict(self):
+        worker_a = SQLiteSessionStore(ruta=self.ruta, ttl_inactividad=60)
+        worker_b = SQLiteSessionStore(ruta=self.ruta, ttl_inactividad=60)
+        worker_a.set('u1', make_entrada())
+        entrada_a, entrada_b = worker_a.get('u1'), worker_b.get('u1')
+
+        entrada_a['reservas_pendientes'].vaciar()
+        worker_a.set('u1', entrada_a)
+        entrada_b['reservas_pendientes'].eliminar(0)
+        with self.assertRaises(ConflictoSesion):
+            worker_b.set('u1', entrada_b)
+
+        # Al releer, B recibe lo que guardó A y ya puede escribir
+        entrada_b = worker_b.get('u1')
+        self.assertEqual(len(entrada_b['reservas_pendientes']), 0)
+        worker_b.set('u1', entrada_b)
+        # Un login nuevo (entrada sin versión) reemplaza la sesión sin conflicto
+        worker_a.set('u1', make_entrada())
+        self.assertEqual(len(worker_b.get('u1')['reservas_pendientes']), 1)
+
+    def test_slots_listed_on_one_worker_resolve_on_another(self):
+        worker_a = SQLiteSessionStore(ruta=self.ruta, ttl_inactividad=60)
+        worker_b = SQLiteSessionStore(ruta=self.ruta, ttl_inactividad=60)
+        entrada = make_entrada()
+        reserva = entrada['reservas_pendientes'].items()[0]['reserva_obj']
+        worker_a.set('u1', entrada)
+        worker_b.get('u1')  # B ya tiene la sesión viva, sin slots
+
+        slot = entrada['horarios'].registrar(reserva.tiquetera, reserva.horario)
+        worker_a.guardar_horarios('u1', entrada['horarios'])
+        self.assertEqual(entrada[VERSION], 1)  # Listar no reescribe la sesión
+        reservas, desconocidos = worker_b.get('u1')['horarios'].resolver([slot])
+        self.assertEqual(desconocidos, [])
+        self.assertEqual(reservas[0].horario.raw_data, {'ids': [113513310]})
+        # Un worker que restaura la sesión desde cero también los encuentra
+        worker_c = SQLiteSessionStore(ruta=self.ruta, ttl_inactividad=60)
+        self.assertIsNotNone(worker_c.get('u1')['horarios'].obtener(slot))
+        self.assertIsNone(worker_c.get('u1')['horarios'].obtener('no-existe'))
+
+    def test_slot_table_is_capped_and_written_incrementally(self):
+        store = SQLiteSessionStore(ruta=self.ruta, ttl_inactividad=60)
+        entrada = make_entrada()
+        entrada['horarios'] = RegistroHorarios(capacidad=2)
+        store.set('u1', entrada)
+        tiquetera = entrada['reservas_pendientes'].items()[0]['reserva_obj'].tiquetera
+        slots = []
+        for hora in range(6, 9):
+            slots.append(entrada['horarios'].registrar(tiquetera, Horario('2025-11-30', f'0{hora}:00', f'0{hora + 1}:00', 5)))
+            store.guardar_horarios('u1', entrada['horarios'])
+        self.assertEqual(entrada['horarios'].tomar_nuevos(), [])  # Ya se guardaron
+        filas = store._conexion().execute("SELECT slot FROM horarios_sesion ORDER BY rowid").fetchall()
+        self.assertEqual([f[0] for f in filas], slots[1:])
+        store.delete('u1')
+        self.assertEqual(store._conexion().execute("SELECT COUNT(*) FROM horarios_sesion").fetchone()[0], 0)
+
+    def test_logout_and_idle_expiry(self):
+        store = SQLiteSessionStore(ruta=self.ruta, ttl_inactividad=0.05)
+        store.set('u1', make_entrada())
+        store.set('u2', make_entrada())
+        store.delete('u1')
+        self.assertIsNone(store.get('u1'))
+        time.sleep(0.1)
+        self.assertEqual(store.purgar(), 1)
+        self.assertEqual(store.stats()['entradas'], 0)
+
+    def test_rows_of_users_who_never_return_are_purged(self):
+        worker_a = SQLiteSessionStore(ruta=self.ruta, ttl_inactividad=0.05, intervalo_purga=0)
+        worker_b = SQLiteSessionStore(ruta=self.ruta, ttl_inactividad=0.05, intervalo_purga=3600)
+        worker_b.set('u1', make_entrada())
+        worker_b.set('u2', make_entrada())
+        time.sleep(0.1)
+        worker_b.get('u3')  # A B todavía no le toca purgar
+        self.assertEqual(worker_b.stats()['entradas'], 2)
+        worker_a.get('u3')  # Cualquier acceso de otro usuario en A purga la tabla
+        self.assertEqual(worker_b.stats()['entradas'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
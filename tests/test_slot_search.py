@@ -0,0 +1,93 @@
+import unittest
+from datetime import datetime
+from src.api.slot_search import BuscadorHorarios, ConsultaHorarios
+from src.models.booking import Tiquetera, Horario
+
+FECHAS = ['2025-12-01', '2025-12-02', '2025-12-03']
+AHORA = datetime.fromisoformat('2025-12-01T00:00').timestamp()
+
+
+def make_tiquetera(id_tiquetera, deporte, sede):
+    return Tiquetera(id_tiquetera, 'Centro', sede, deporte, id_tiquetera, 4626802, 10, False,
+                     id_tiquetera, id_tiquetera, id_tiquetera)
+
+
+class FakeAPI:
+    """get_horarios con disponibilidad fija por tiquetera: {id: {fecha: [(hora, cupos)]}}"""
+
+    def __init__(self, disponibilidad):
+        self.disponibilidad = disponibilidad
+        self.consultas = []
+        self.invalidaciones_horarios = 0
+
+    def obtener_participantes(self):
+        return ()
+
+    def get_horarios(self, tiquetera, fecha):
+        self.consultas.append((tiquetera.id_tiquetera, fecha))
+        return [
+            Horario(fecha, hora, f'{int(hora[:2]) + 1:02d}:00', cupos, id_turno=hash((tiquetera.id, fecha, hora)))
+            for hora, cupos in self.disponibilidad.get(tiquetera.id_tiquetera, {}).get(fecha, [])
+        ]
+
+
+class TestBuscadorHorarios(unittest.TestCase):
+    def setUp(self):
+        self.tiqueteras = [
+            make_tiquetera(1, 'Natación', 'Piscina Cajicá'),
+            make_tiquetera(2, 'Natación', 'Piscina Calle 94'),
+            make_tiquetera(3, 'Gimnasio', 'Calle 94'),
+        ]
+        self.api = FakeAPI({
+            1: {'2025-12-01': [('17:00', 9), ('19:00', 2)], '2025-12-02': [('18:00', 5)]},
+            2: {'2025-12-01': [('20:00', 3)], '2025-12-03': [('06:00', 9)]},
+            3: {'2025-12-01': [('18:00', 9)]},
+        })
+        self.buscador = BuscadorHorarios(self.api, ttl=60, max_workers=2)
+
+    def buscar(self, **criterios):
+        consulta = ConsultaHorarios(desde=FECHAS[0], dias=len(FECHAS), **criterios)
+        return self.buscador.buscar(self.tiqueteras, consulta, ahora=AHORA)
+
+    def test_earliest_slot_across_matching_tiqueteras(self):
+        resultados = self.buscar(deporte='natacion', cupos_min=3, hora_desde='18:00', limite=1)
+        self.assertEqual(len(resultados), 1)
+        self.assertEqual(resultados[0].tiquetera.id_tiquetera, 2)
+        self.assertEqual((resultados[0].horario.fecha, resultados[0].horario.hora_inicio), ('2025-12-01', '20:00'))
+        # El gimnasio no coincide con el deporte: no se consultó
+        self.assertNotIn(3, {t for t, _ in self.api.consultas})
+
+    def test_results_are_sorted_and_filtered(self):
+        resultados = self.buscar(deporte='natación', sede='cajica')
+        self.assertEqual([(r.horario.fecha, r.horario.hora_inicio) for r in resultados],
+                         [('2025-12-01', '17:00'), ('2025-12-01', '19:00'), ('2025-12-02', '18:00')])
+        self.assertEqual(self.buscar(hora_hasta='06:00')[0].horario.fecha, '2025-12-03')
+
+    def test_repeated_queries_are_served_from_the_index(self):
+        self.buscar(deporte='natación')
+        consultas = len(self.api.consultas)
+        self.buscar(deporte='natación', cupos_min=5)
+        self.assertEqual(len(self.api.consultas), consultas)
+        self.assertEqual(self.buscador.stats()['tiqueteras'], 2)
+
+        # Una invalidación de horarios de la API (p. ej. una reserva) obliga a recargar
+        self.api.invalidaciones_horarios += 1
+        self.buscar(deporte='natación')
+        self.assertGreater(len(self.api.consultas), consultas)
+
+    def test_past_slots_are_skipped(self):
+        consulta = ConsultaHorarios(desde=FECHAS[0], dias=1)
+        resultados = self.buscador.buscar(
+            self.tiqueteras, consulta, ahora=datetime.fromisoformat('2025-12-01T18:30').timestamp()
+        )
+        self.assertEqual([r.horario.hora_inicio for r in resultados], ['19:00', '20:00'])
+
+    def test_invalid_queries_raise_value_error(self):
+        for datos in ({'hora_desde': '7pm'}, {'hora_hasta': '25:00'}, {'dias': 90},
+                      {'desde': '01/12/2025'}, {'cupos_min': 'x'}):
+            with self.assertRaises(ValueError):
+                ConsultaHorarios.desde_dict(datos)
+
+
+if __name__ == '__main__':
+    unittest.main()
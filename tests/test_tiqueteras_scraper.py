@@ -0,0 +1,38 @@
+import json
+import os
+import unittest
+from src.auth.tiqueteras_scraper import extraer_tiqueteras_html
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _leer(nombre):
+    with open(os.path.join(RAIZ, nombre), encoding='utf-8') as f:
+        return f.read()
+
+
+class TestExtraerTiqueterasHtml(unittest.TestCase):
+    def test_reservas_page_matches_saved_cache(self):
+        tiqueteras = extraer_tiqueteras_html(_leer('reservas_page_debug.html'))
+        self.assertEqual(tiqueteras, json.loads(_leer('tiqueteras_cache.json'))['tiqueteras'])
+
+    def test_page_without_tiqueteras_returns_empty(self):
+        self.assertEqual(extraer_tiqueteras_html(_leer('tiqueteras_page_debug.html')), [])
+
+    def test_unlimited_tiquetera_has_no_entries(self):
+        html = '''
+        <div ng-repeat="tiquetera in controller.tiqueteras.tiqueteras">
+          <h5><strong>Plan Gimnasio</strong></h5>
+          <label class="progress-label">Compensar Av. 68</label>
+          <label class="progress-label">Gimnasio</label>
+          <label class="progress-label">Ilimitada</label>
+        </div>'''
+        tiquetera, = extraer_tiqueteras_html(html)
+        self.assertTrue(tiquetera['ilimitado'])
+        self.assertEqual(tiquetera['entradas'], 0)
+        self.assertEqual(tiquetera['nombre'], 'Plan Gimnasio')
+        self.assertEqual(tiquetera['nombre_sede'], 'Gimnasio')
+
+
+if __name__ == '__main__':
+    unittest.main()